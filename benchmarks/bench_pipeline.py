@@ -0,0 +1,245 @@
+"""Times and memory-profiles every stage of the portfolio pipeline on synthetic data.
+
+Usage (from the repository root):
+    python benchmarks/bench_pipeline.py --size medium
+    python benchmarks/bench_pipeline.py --tickers 500 --years 10 --fills 200000 --repeat 3
+
+Every run appends one JSON record to `benchmarks/results.jsonl` (see `--output`) with
+the commit, library versions, configuration and, per stage, the best wall time and the
+peak traced memory. Runs with the same configuration are compared against the previous
+record, so a regression between commits shows up as a ratio above 1. The file holds the
+timings of one machine and is ignored by git.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+import contextlib
+import numpy as np
+import pandas as pd
+
+REPO_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_PATH not in sys.path:
+    sys.path.append(REPO_PATH)
+
+from src import *
+
+STAGES = ["ingestion", "ledger", "price merge", "valuation", "metrics", "dashboard prep", "panel valuation"]
+
+
+def ingestion(frames, store):
+    """Fetches every ticker through `DataTerminal` into an empty cache."""
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(open(os.devnull, "w")):
+        data_terminal = DataTerminal(tmp, store=store, downloader=StubSource(frames))
+        return data_terminal.fetch_data(list(frames))
+
+
+def ledger(df_transactions):
+    return realized_pnl(build_ledger(df_transactions))
+
+
+def price_merge(df_ledger, df_yf, end):
+    return merge_yf_to_portfolio(daily_basis(df_ledger, end=end), df_yf)
+
+
+def valuation(df, df_deposit):
+    df = unrealized_pnl(market_value(df))
+    df = merge_deposit_to_portfolio(df, df_deposit)
+    return df[PORTFOLIO_COLUMNS + REALIZED_COLUMNS]
+
+
+def panel_valuation(df_ledger, df_yf, df_deposit, end):
+    """Price merge and valuation on the `ValuationPanel` engine, back to the long layout."""
+    return ValuationPanel.from_ledger(df_ledger, df_yf, df_deposit, end=end).to_long()
+
+
+def dashboard_prep(df_portfolio, df_metrics):
+    """The data preparation of `streamlit_app.py`, without the plotting."""
+    latest_metrics = df_metrics.iloc[-1]
+
+    # Treemap of the latest date
+    latest_df = df_portfolio[df_portfolio["Date"] == df_portfolio["Date"].max()]
+    latest_df = latest_df.dropna(subset=["Ticker", "Asset Value (USD)", "Asset Unrealized PnL (%)"])
+    latest_df = latest_df[latest_df["Asset Value (USD)"] > 0]
+
+    # Per-ticker index, built once per data version
+    ticker_index = TickerIndex(df_portfolio)
+
+    # Asset line graph with the default selection
+    lines = {ticker: ticker_index.slice(ticker) for ticker in ticker_index.tickers[:3]}
+
+    # Stacked bar chart from one pivot
+    bars = ticker_index.pivot("Asset Value (USD)")
+
+    return latest_metrics, latest_df, lines, bars
+
+
+def _copy(arg):
+    return arg.copy() if isinstance(arg, (pd.DataFrame, dict)) else arg
+
+
+def measure(function, args, repeat):
+    """Best wall time over `repeat` runs, then one run under tracemalloc for the peak.
+
+    Stages modify their input frames, so every run gets fresh copies.
+    """
+    times = []
+    for _ in range(repeat):
+        copies = [_copy(arg) for arg in args]
+        started = time.perf_counter()
+        result = function(*copies)
+        times.append(time.perf_counter() - started)
+
+    copies = [_copy(arg) for arg in args]
+    tracemalloc.start()
+    function(*copies)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, {
+        "seconds": min(times),
+        "mean seconds": float(np.mean(times)),
+        "peak MiB": peak / 2 ** 20,
+    }
+
+
+def _rows(result):
+    if isinstance(result, pd.DataFrame):
+        return len(result)
+    if isinstance(result, tuple):
+        return int(result[-1].size)
+    return None
+
+
+def run(n_tickers, years, n_fills, seed=0, store="csv", repeat=1):
+    """Generates the inputs and runs every stage in order.
+
+    Returns:
+        dict: Machine-readable benchmark record.
+    """
+    started = time.perf_counter()
+    inputs = synthetic_portfolio(n_tickers, years, n_fills, seed=seed)
+    generate_seconds = time.perf_counter() - started
+
+    frames = {
+        ticker: group.drop(columns="Ticker").set_index("Date")
+        for ticker, group in inputs["prices"].groupby("Ticker", sort=False)
+    }
+    end = inputs["prices"]["Date"].max()
+
+    stages = {}
+    df_yf, stages["ingestion"] = measure(ingestion, [frames, store], repeat)
+    df_ledger, stages["ledger"] = measure(ledger, [inputs["transactions"]], repeat)
+    df, stages["price merge"] = measure(price_merge, [df_ledger, df_yf, end], repeat)
+    df_portfolio, stages["valuation"] = measure(valuation, [df, inputs["deposits"]], repeat)
+    df_metrics, stages["metrics"] = measure(
+        portfolio_metrics, [df_portfolio, inputs["risk_free_rate"]], repeat
+    )
+    prepared, stages["dashboard prep"] = measure(dashboard_prep, [df_portfolio, df_metrics], repeat)
+    df_panel, stages["panel valuation"] = measure(
+        panel_valuation, [df_ledger, df_yf, inputs["deposits"], end], repeat
+    )
+
+    for stage, result in zip(STAGES, [df_yf, df_ledger, df, df_portfolio, df_metrics, prepared, df_panel]):
+        stages[stage]["rows"] = _rows(result)
+
+    return {
+        "timestamp": pd.Timestamp.now().isoformat(timespec="seconds"),
+        "commit": _git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "config": {
+            "tickers": n_tickers,
+            "years": years,
+            "fills": n_fills,
+            "seed": seed,
+            "store": store,
+            "repeat": repeat,
+        },
+        "inputs": {name: len(df) for name, df in inputs.items()},
+        "generate seconds": generate_seconds,
+        "stages": stages,
+        "total seconds": sum(stage["seconds"] for stage in stages.values()),
+    }
+
+
+def _git(*args):
+    try:
+        return subprocess.run(
+            ["git", *args], cwd=REPO_PATH, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def previous_record(path, config):
+    """Last record in `path` with the same configuration, or None."""
+    if not os.path.exists(path):
+        return None
+    previous = None
+    with open(path) as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("config") == config:
+                previous = record
+    return previous
+
+
+def report(record, previous=None):
+    config = record["config"]
+    print(
+        f"{config['tickers']} tickers x {config['years']} years, {config['fills']:,} fills "
+        f"(seed {config['seed']}, {config['store']} store) at {record['commit']}"
+    )
+    header = f"{'stage':<16}{'seconds':>10}{'peak MiB':>11}{'rows':>13}"
+    if previous is not None:
+        header += f"{'vs ' + str(previous['commit']):>14}"
+    print(header)
+    for stage, result in record["stages"].items():
+        line = f"{stage:<16}{result['seconds']:>10.3f}{result['peak MiB']:>11.1f}{result['rows'] or 0:>13,}"
+        if previous is not None and stage in previous["stages"]:
+            line += f"{result['seconds'] / previous['stages'][stage]['seconds']:>13.2f}x"
+        print(line)
+    print(f"{'total':<16}{record['total seconds']:>10.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=sorted(SIZES), default="small", help="Preset of tickers, years and fills.")
+    parser.add_argument("--tickers", type=int, help="Number of tickers (overrides --size).")
+    parser.add_argument("--years", type=float, help="Years of history (overrides --size).")
+    parser.add_argument("--fills", type=int, help="Number of fills (overrides --size).")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--store", choices=["csv", "parquet"], default="csv", help="DataTerminal cache format.")
+    parser.add_argument("--repeat", type=int, default=1, help="Timed runs per stage; the best is kept.")
+    parser.add_argument("--output", default=os.path.join(REPO_PATH, "benchmarks", "results.jsonl"))
+    args = parser.parse_args()
+
+    n_tickers, years, n_fills = SIZES[args.size]
+    record = run(
+        args.tickers or n_tickers,
+        args.years or years,
+        args.fills or n_fills,
+        seed=args.seed,
+        store=args.store,
+        repeat=args.repeat,
+    )
+
+    previous = previous_record(args.output, record["config"])
+    report(record, previous)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Appended to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
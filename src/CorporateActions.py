@@ -0,0 +1,202 @@
+import os
+import numpy as np
+import pandas as pd
+from src.DataSource import *
+from src.YahooFinanceSource import download_range
+
+ACTION_COLUMNS = ["Dividends", "Stock Splits"]
+
+# Columns scaled by the split ratio, and by its inverse times the dividend factor
+VOLUME_ADJUSTED_COLUMNS = ["Volume", "Shares", "Cumulative Volume"]
+PRICE_ADJUSTED_COLUMNS = ["Executed Price (USD)", "Average Cost Price (USD)"]
+
+
+def adjustment_factors(df, actions, prices=None):
+    """Cumulative split and dividend factors of every row of `df`.
+
+    A row is adjusted by every event of its ticker dated after it (a trade on the
+    ex-date is already post-split). The per-event steps are multiplied into suffix
+    products per ticker, and one forward as-of join attaches the product of the first
+    later event to every row, for all tickers at once.
+
+    Args:
+        df (pd.DataFrame): Rows with 'Ticker' and 'Date'.
+        actions (pd.DataFrame): Events with 'Ticker', 'Date' and 'Stock Splits' (ratio,
+            e.g. 10 for 10:1) and/or 'Dividends' (per share).
+        prices (pd.DataFrame, optional): 'Ticker', 'Date', 'Close' from
+            `DataTerminal.fetch_data`. Dividends are applied only with prices, as
+            1 - dividend / previous close, the factor behind Yahoo's 'Adj Close'.
+
+    Returns:
+        pd.DataFrame: 'Volume Factor' and 'Price Factor' on the index of `df`.
+    """
+    events = pd.DataFrame({
+        "Ticker": actions["Ticker"].astype(str).to_numpy(),
+        "Date": pd.to_datetime(actions["Date"]).dt.normalize().astype("datetime64[ns]").to_numpy(),
+    })
+    splits = actions["Stock Splits"].to_numpy(dtype=float) if "Stock Splits" in actions else np.zeros(len(actions))
+    events["Volume Factor"] = np.where(splits > 0, splits, 1.0)
+    events["Price Factor"] = 1 / events["Volume Factor"].to_numpy()
+
+    if prices is not None and "Dividends" in actions:
+        dividends = np.nan_to_num(actions["Dividends"].to_numpy(dtype=float))
+        events["Dividend"] = dividends
+        df_close = pd.DataFrame({
+            "Ticker": prices["Ticker"].astype(str).to_numpy(),
+            "Date": pd.to_datetime(prices["Date"]).astype("datetime64[ns]").to_numpy(),
+            "Close": prices["Close"].to_numpy(dtype=float),
+        }).dropna().sort_values("Date", kind="stable")
+        previous = pd.merge_asof(
+            events.reset_index().sort_values("Date", kind="stable"),
+            df_close,
+            on="Date",
+            by="Ticker",
+            allow_exact_matches=False,
+        ).set_index("index").sort_index()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = 1 - dividends / previous["Close"].to_numpy()
+        events["Price Factor"] *= np.where((dividends > 0) & np.isfinite(step) & (step > 0), step, 1.0)
+        events = events.drop(columns="Dividend")
+
+    # One step per (Ticker, Date), then suffix products: the factor of everything after
+    events = events.groupby(["Ticker", "Date"], sort=True).prod().reset_index()
+    reverse = events.iloc[::-1]
+    events[["Volume Factor", "Price Factor"]] = (
+        reverse.groupby("Ticker", sort=False)[["Volume Factor", "Price Factor"]].cumprod().iloc[::-1]
+    )
+
+    rows = pd.DataFrame({
+        "Ticker": df["Ticker"].astype(str).to_numpy(),
+        "Date": pd.to_datetime(df["Date"]).astype("datetime64[ns]").to_numpy(),
+        "Row": np.arange(len(df)),
+    }).sort_values("Date", kind="stable")
+    factors = pd.merge_asof(
+        rows,
+        events.sort_values("Date", kind="stable"),
+        on="Date",
+        by="Ticker",
+        direction="forward",
+        allow_exact_matches=False,
+    )
+
+    order = np.empty(len(df), dtype=np.intp)
+    order[factors["Row"].to_numpy()] = np.arange(len(df))
+    return pd.DataFrame({
+        "Volume Factor": factors["Volume Factor"].to_numpy()[order],
+        "Price Factor": factors["Price Factor"].to_numpy()[order],
+    }, index=df.index).fillna(1.0)
+
+
+def adjust_for_actions(df, actions, prices=None):
+    """Restates volumes, prices and cost basis of `df` on the post-action share basis.
+
+    Replaces one `stock_split` call (two full-frame masks) per event with a single join
+    and one multiplication per column. Present columns of `VOLUME_ADJUSTED_COLUMNS` are
+    multiplied by the volume factor, those of `PRICE_ADJUSTED_COLUMNS` by the price
+    factor; the traded notional is unchanged by splits.
+
+    Args:
+        df (pd.DataFrame): Transactions or ledger rows with 'Ticker' and 'Date'.
+        actions (pd.DataFrame): Events, see `adjustment_factors`.
+        prices (pd.DataFrame, optional): Closes to apply the dividends with.
+    """
+    if actions is None or len(actions) == 0 or len(df) == 0:
+        return df
+    factors = adjustment_factors(df, actions, prices)
+    for column in VOLUME_ADJUSTED_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].to_numpy(dtype=float) * factors["Volume Factor"].to_numpy()
+    for column in PRICE_ADJUSTED_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].to_numpy(dtype=float) * factors["Price Factor"].to_numpy()
+    return df
+
+
+class CorporateActions:
+    """Split and dividend events per ticker, cached next to the price cache.
+
+    Events live in `data/yfinance/actions/<ticker>.csv`, one row per event date. The
+    file's modification time records the last successful check, so a refresh only asks
+    for the days since then; the first check asks for the full history. A failed or
+    empty download raises or returns the cache as it was, without touching it.
+    """
+
+    def __init__(self, REPO_PATH=os.path.abspath(os.path.join("..")), downloader=None):
+        """
+        Args:
+            REPO_PATH (str): The path to the repository.
+            downloader (str, DataSource or callable, optional): Source of the downloads,
+                see `get_source`. Defaults to live Yahoo Finance.
+        """
+        self.source = get_source(downloader)
+        self.actions_dir = os.path.join(REPO_PATH, "data/yfinance/actions/")
+        if not os.path.exists(self.actions_dir):
+            os.makedirs(self.actions_dir)
+
+    def _path(self, ticker):
+        return os.path.join(self.actions_dir, f"{ticker}.csv")
+
+    def fetch(self, tickers):
+        """Refreshes the events of `tickers` and returns them in one frame.
+
+        Returns:
+            pd.DataFrame: Columns ['Date', 'Ticker', 'Dividends', 'Stock Splits'].
+        """
+        frames = [self.fetch_ticker(ticker) for ticker in sorted(tickers)]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=["Date", "Ticker"] + ACTION_COLUMNS)
+        return pd.concat(frames, ignore_index=True)
+
+    def fetch_ticker(self, ticker):
+        path = self._path(ticker)
+        today = pd.Timestamp.today().normalize()
+        checked = pd.Timestamp(os.path.getmtime(path), unit="s").normalize() if os.path.exists(path) else None
+
+        if checked is None or checked < today:
+            if checked is None:
+                print(f"Download {ticker} corporate actions.")
+            else:
+                print(f"Update {ticker} corporate actions from {checked.date()}.")
+            data = self.source.download(
+                ticker,
+                **download_range(checked, today + pd.DateOffset(1)),
+                progress=False,
+                multi_level_index=False,
+                auto_adjust=False,
+                actions=True,
+            )
+            if data.empty:
+                # Leave the cache and its check time alone, so the range is asked again
+                print(f"No data for {ticker} corporate actions, cache left unchanged.")
+                return self.load(ticker)
+            new_events = self.events(data.reset_index(), ticker)
+            df = pd.concat([self.load(ticker), new_events], ignore_index=True) if checked is not None else new_events
+            df = df.drop_duplicates(subset="Date", keep="last").sort_values("Date", ignore_index=True)
+            # Written even without events: the modification time is the last check
+            df.to_csv(path, index=False)
+
+        return self.load(ticker)
+
+    def load(self, ticker):
+        path = self._path(ticker)
+        if not os.path.exists(path):
+            return pd.DataFrame(columns=["Date", "Ticker"] + ACTION_COLUMNS)
+        return pd.read_csv(path, parse_dates=["Date"])
+
+    @staticmethod
+    def events(data, ticker):
+        """Rows of a `download(..., actions=True)` frame with a dividend or a split."""
+        columns = [column for column in ACTION_COLUMNS if column in data.columns]
+        if data.empty or not columns:
+            return pd.DataFrame(columns=["Date", "Ticker"] + ACTION_COLUMNS)
+
+        values = data.reindex(columns=ACTION_COLUMNS).fillna(0.0)
+        mask = (values != 0).any(axis=1).to_numpy()
+        dates = pd.to_datetime(data["Date"], utc=True).dt.tz_localize(None).dt.normalize()
+        return pd.DataFrame({
+            "Date": dates.to_numpy()[mask],
+            "Ticker": ticker,
+            "Dividends": values["Dividends"].to_numpy()[mask],
+            "Stock Splits": values["Stock Splits"].to_numpy()[mask],
+        })
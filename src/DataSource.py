@@ -0,0 +1,134 @@
+import re
+import ast
+import asyncio
+import inspect
+import logging
+import threading
+from abc import ABC, abstractmethod
+
+SOURCES = {}
+
+
+class DownloadError(Exception):
+    """A failed download: throttling, a network error or an unknown symbol.
+
+    Raised instead of returning an empty frame, so `FetchScheduler` retries with backoff
+    and the failure ends up in `DataTerminal.failures`.
+    """
+
+
+def no_data_error(message):
+    """True for yfinance's "no price data found" message of an empty range, which a delta
+    request over a market holiday legitimately gets."""
+    return "no price data found" in message
+
+
+class _ErrorLog(logging.Handler):
+    """Collects the per-symbol failures `yf.download` logs in the calling thread.
+
+    yfinance catches download errors and only logs them as "['SYM', ...]: error" lines.
+    """
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.thread = threading.get_ident()
+        self.errors = {}
+
+    def emit(self, record):
+        if record.thread != self.thread:
+            return
+        match = re.match(r"^(\[.*?\]): (.*)$", record.getMessage(), re.DOTALL)
+        if match:
+            for symbol in ast.literal_eval(match.group(1)):
+                self.errors[symbol] = match.group(2).strip()
+
+
+def register_source(name):
+    """Class decorator that makes a `DataSource` available to `get_source(name)`."""
+    def register(cls):
+        SOURCES[name] = cls
+        return cls
+    return register
+
+
+def get_source(source=None, **kwargs):
+    """Resolves `source` to a `DataSource`.
+
+    Args:
+        source (str, DataSource or callable, optional): A registered name (e.g. "yahoo",
+            "stub", "record", "replay"), a `DataSource` instance, or a
+            `yf.download`-compatible function. Defaults to "yahoo".
+        **kwargs: Constructor arguments when `source` is a name.
+    """
+    if source is None:
+        source = "yahoo"
+    if isinstance(source, DataSource):
+        return source
+    if isinstance(source, str):
+        if source not in SOURCES:
+            raise ValueError(f"Unknown data source '{source}'. Registered: {sorted(SOURCES)}")
+        return SOURCES[source](**kwargs)
+    if callable(source):
+        return CallableSource(source)
+    raise TypeError(f"Cannot use {source!r} as a data source.")
+
+
+class DataSource(ABC):
+    """Market-data source with the `yf.download` call signature.
+
+    `download` returns a frame indexed by Date with yfinance price columns; a list of
+    tickers with `group_by="ticker"` returns (Ticker, Price) MultiIndex columns.
+    """
+
+    @abstractmethod
+    def download(self, tickers, start=None, end=None, **kwargs):
+        pass
+
+    async def adownload(self, tickers, start=None, end=None, **kwargs):
+        """Async `download`. Runs the blocking call in a worker thread unless overridden."""
+        return await asyncio.to_thread(self.download, tickers, start=start, end=end, **kwargs)
+
+
+@register_source("yahoo")
+class YahooDownloadSource(DataSource):
+    """Live Yahoo Finance through `yf.download`."""
+
+    def download(self, tickers, start=None, end=None, **kwargs):
+        """`yf.download` that raises `DownloadError` when a single-symbol request, or every
+        symbol of a multi-symbol request, failed. Failures of some symbols of a
+        multi-symbol request are listed in `data.attrs["errors"]` instead."""
+        # Imported on first use: modules that only need the ledger or the registry, such
+        # as the dashboard, do not pay for loading yfinance
+        import yfinance as yf
+
+        log = _ErrorLog()
+        logger = logging.getLogger("yfinance")
+        logger.addHandler(log)
+        try:
+            data = yf.download(tickers, start=start, end=end, **kwargs)
+        finally:
+            logger.removeHandler(log)
+
+        symbols = [tickers] if isinstance(tickers, str) else list(tickers)
+        failed = {symbol: message for symbol, message in log.errors.items() if not no_data_error(message)}
+        if failed and len(failed) >= len(symbols):
+            raise DownloadError("; ".join(f"{symbol}: {message}" for symbol, message in failed.items()))
+        if data is None:
+            raise DownloadError(f"No response for {symbols}.")
+        data.attrs["errors"] = log.errors
+        return data
+
+
+class CallableSource(DataSource):
+    """Adapts a `yf.download`-compatible function, sync or coroutine."""
+
+    def __init__(self, function):
+        self.function = function
+
+    def download(self, tickers, start=None, end=None, **kwargs):
+        return self.function(tickers, start=start, end=end, **kwargs)
+
+    async def adownload(self, tickers, start=None, end=None, **kwargs):
+        if inspect.iscoroutinefunction(self.function):
+            return await self.function(tickers, start=start, end=end, **kwargs)
+        return await super().adownload(tickers, start=start, end=end, **kwargs)
@@ -1,22 +1,270 @@
 import os
+import asyncio
+import numpy as np
 import pandas as pd
 from src.YahooFinanceSource import *
+from src.PriceStore import *
+from src.FetchScheduler import *
 
 class DataTerminal:
 
-    def __init__(self, REPO_PATH=os.path.abspath(os.path.join(".."))):
+    def __init__(self, REPO_PATH=os.path.abspath(os.path.join("..")), store="csv", downloader=None):
+        """
+        Args:
+            REPO_PATH (str): The path to the repository.
+            store (str): "csv" for one CSV per ticker, or "parquet" for the columnar
+                `PriceStore` partitioned by ticker and year.
+            downloader (str, DataSource or callable, optional): Source of the downloads:
+                a registered name ("yahoo", "stub", "record", "replay"), a `DataSource`
+                such as `ReplaySource(path)` to run offline, or a `yf.download`-compatible
+                function. Defaults to live Yahoo Finance.
+        """
         self.REPO_PATH = REPO_PATH
+        self.store = PriceStore(REPO_PATH) if store == "parquet" else None
+        self.source = get_source(downloader)
+        self.failures = {}
 
-    def fetch_data(self, tickers):
-        df_return = pd.DataFrame()
+    def _source(self, ticker):
+        return YahooFinanceSource(
+            ticker=ticker, REPO_PATH=self.REPO_PATH, store=self.store, downloader=self.source
+        )
 
-        for ticker in sorted(tickers):
-            data = YahooFinanceSource(ticker=ticker, REPO_PATH=self.REPO_PATH).fetch_ticker()
+    def fetch_data(self, tickers, start=None, end=None, batch_size=None, scheduler=None,
+                   compact=False, price_dtype=None):
+        """Refreshes the cache of `tickers` and returns their prices in [start, end].
 
-            df_return = pd.concat([df_return, data], axis=0)
+        Tickers whose download fails are skipped and collected in `self.failures`.
 
-        # Normalize date
-        df_return['Date'] = pd.to_datetime(df_return['Date'], utc=True)
-        df_return['Date'] = df_return['Date'].dt.date.astype('datetime64[ns]')
+        Args:
+            tickers (iterable): Ticker symbols.
+            start, end (str or pd.Timestamp, optional): Date slice of the result.
+            batch_size (int, optional): Download up to this many tickers per request
+                instead of one request per ticker. Per-ticker failures are collected in
+                `self.failures` and do not fail the batch.
+            scheduler (FetchScheduler, optional): Runs the requests on its worker pool with
+                rate limiting, retries and deadlines; its `summary` reports the run.
+                Failures are collected in `self.failures`.
+            compact (bool): Return a memory-compact frame: categorical Ticker, int64
+                Volume and a sorted (Ticker, Date) MultiIndex. Prints its memory usage.
+            price_dtype (str, optional): dtype of the price columns, e.g. "float32".
+        """
+        self.failures = {}
+        tickers = sorted(tickers)
 
+        if batch_size:
+            self._fetch_batched(tickers, batch_size, scheduler)
+            frames = [] if self.store is not None else [
+                self._source(ticker).load() for ticker in tickers if ticker not in self.failures
+            ]
+        elif scheduler is not None:
+            # With a store, tickers are only refreshed here and read once below
+            tasks = {
+                ticker: self._source(ticker).refresh if self.store is not None else self._source(ticker).fetch_ticker
+                for ticker in tickers
+            }
+            results, errors = scheduler.run(tasks)
+            self.failures.update(errors)
+            frames = [] if self.store is not None else [results[ticker] for ticker in tickers if ticker in results]
+        else:
+            frames = []
+            for ticker in tickers:
+                source = self._source(ticker)
+                try:
+                    if self.store is not None:
+                        source.refresh()
+                    else:
+                        frames.append(source.fetch_ticker())
+                except Exception as e:
+                    self.failures[ticker] = f"{type(e).__name__}: {e}"
+
+        if self.failures:
+            print(f"Failed to fetch: {sorted(self.failures)}")
+
+        if self.store is not None:
+            df_return = self.load_data(tickers, start=start, end=end)
+            if price_dtype is not None:
+                df_return = self._cast_prices(df_return, price_dtype)
+        else:
+            # Slice and shrink every ticker first, then concatenate once
+            frames = [self._slice_dates(frame, start, end) for frame in frames if not frame.empty]
+            if price_dtype is not None:
+                frames = [self._cast_prices(frame, price_dtype) for frame in frames]
+            if compact and frames:
+                # Rebuild Ticker as categorical codes instead of concatenating strings
+                codes = np.repeat(
+                    [tickers.index(frame["Ticker"].iloc[0]) for frame in frames],
+                    [len(frame) for frame in frames],
+                )
+                df_return = pd.concat([frame.drop(columns="Ticker") for frame in frames], axis=0)
+                df_return["Ticker"] = pd.Categorical.from_codes(codes, categories=tickers)
+            else:
+                df_return = pd.concat(frames, axis=0) if frames else pd.DataFrame(columns=["Date", "Ticker"])
+
+        if compact:
+            df_return = self._compact(df_return, tickers)
         return df_return
+
+    async def afetch(self, tickers, start=None, end=None, concurrency=5):
+        """Async `fetch_data` that yields each ticker as soon as its fetch completes.
+
+        At most `concurrency` tickers are fetched at once. Cache reads and writes run in
+        worker threads, so the event loop is never blocked. Failed tickers are skipped
+        and collected in `self.failures`.
+
+        Usage:
+            async for ticker, df in data_terminal.afetch(tickers):
+                ...
+
+        Yields:
+            tuple: (ticker, pd.DataFrame of its prices in [start, end])
+        """
+        self.failures = {}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(ticker):
+            async with semaphore:
+                try:
+                    return ticker, await self._source(ticker).afetch_ticker(), None
+                except Exception as e:
+                    return ticker, None, e
+
+        tasks = [asyncio.ensure_future(fetch(ticker)) for ticker in sorted(tickers)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                ticker, data, error = await next_done
+                if error is not None:
+                    self.failures[ticker] = f"{type(error).__name__}: {error}"
+                    continue
+                if data.empty:
+                    continue
+                yield ticker, self._slice_dates(data, start, end)
+        finally:
+            # the consumer may stop early
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    def _slice_dates(df, start=None, end=None):
+        # Normalize date to the UTC calendar day, without going through Python dates
+        dates = df['Date']
+        if not pd.api.types.is_datetime64_any_dtype(dates):
+            dates = pd.to_datetime(dates, utc=True, format="ISO8601")
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+        df['Date'] = dates.dt.normalize().astype('datetime64[ns]')
+
+        if start is not None:
+            df = df[df['Date'] >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df['Date'] <= pd.Timestamp(end)]
+
+        return df
+
+    def _fetch_batched(self, tickers, batch_size, scheduler=None):
+        """Downloads the missing range of `tickers` with one multi-symbol request per chunk."""
+        sources = {ticker: self._source(ticker) for ticker in tickers}
+
+        # Tickers missing the same range share requests
+        groups = {}
+        for ticker, source in sources.items():
+            pending = source.pending_range()
+            if pending is not None:
+                groups.setdefault(pending, []).append(ticker)
+
+        chunks = [
+            (start, end, tuple(group[i:i + batch_size]))
+            for (start, end), group in groups.items()
+            for i in range(0, len(group), batch_size)
+        ]
+
+        def download(start, end, chunk):
+            print(f"Download {len(chunk)} tickers from {start.date() if start is not None else 'inception'}.")
+            return self.source.download(
+                list(chunk),
+                **download_range(start, end),
+                group_by="ticker",
+                progress=False,
+                multi_level_index=True,
+                auto_adjust=False,  # keep 'Adj Close'
+            )
+
+        if scheduler is not None:
+            tasks = {key: (lambda key=key: download(*key)) for key in chunks}
+            downloads, errors = scheduler.run(tasks)
+        else:
+            downloads, errors = {}, {}
+            for key in chunks:
+                try:
+                    downloads[key] = download(*key)
+                except Exception as e:
+                    errors[key] = str(e)
+
+        for (start, end, chunk) in chunks:
+            if (start, end, chunk) in errors:
+                for ticker in chunk:
+                    self.failures[ticker] = errors[(start, end, chunk)]
+                continue
+
+            data = downloads[(start, end, chunk)]
+            symbol_errors = data.attrs.get("errors", {})
+            for ticker in chunk:
+                try:
+                    new_data = self._split_batch(data, ticker)
+                    error = symbol_errors.get(ticker.upper())
+                    if new_data.empty and error is not None and not no_data_error(error):
+                        self.failures[ticker] = f"DownloadError: {error}"
+                        continue
+                    # an empty full-history download means the symbol failed
+                    if new_data.empty and start is None:
+                        self.failures[ticker] = "No data returned."
+                        continue
+                    sources[ticker].save_new_data(new_data)
+                except Exception as e:
+                    self.failures[ticker] = str(e)
+
+    @staticmethod
+    def _cast_prices(df, price_dtype):
+        for column in PRICE_COLUMNS:
+            if column in df.columns:
+                df[column] = df[column].to_numpy(dtype=price_dtype)
+        return df
+
+    @staticmethod
+    def _compact(df, tickers):
+        """Categorical Ticker, int64 Volume and a sorted (Ticker, Date) index."""
+        df = df.astype({"Ticker": pd.CategoricalDtype(tickers)})
+        if "Volume" in df.columns:
+            df["Volume"] = pd.to_numeric(df["Volume"], errors="coerce").fillna(0).astype("int64")
+        df = df.set_index(["Ticker", "Date"]).sort_index()
+        print(f"Price frame: {len(df)} rows, {df.memory_usage(deep=True).sum() / 2 ** 20:.1f} MiB.")
+        return df
+
+    @staticmethod
+    def _split_batch(data, ticker):
+        """Extracts one ticker from a `group_by="ticker"` multi-symbol download."""
+        if ticker not in data.columns.get_level_values(0):
+            return pd.DataFrame()
+        new_data = data[ticker].dropna(how="all")
+        new_data.columns.name = None
+        new_data = new_data.reset_index()
+        new_data['Ticker'] = ticker
+        return new_data
+
+    def load_data(self, tickers=None, start=None, end=None, columns=None):
+        """Reads a ticker/date slice from the cache without touching the network.
+
+        Tickers that were never fetched are left out. With the CSV cache, `tickers` is
+        required and `columns` selects the price columns.
+        """
+        if self.store is not None:
+            return self.store.read(tickers, start=start, end=end, columns=columns)
+        if tickers is None:
+            raise ValueError("load_data needs the tickers to read from the CSV cache.")
+        frames = [self._source(ticker).load() for ticker in sorted(tickers)]
+        frames = [self._slice_dates(frame, start, end) for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=["Date", "Ticker"])
+        df = pd.concat(frames, axis=0)
+        if columns is not None:
+            df = df[["Date"] + list(columns) + ["Ticker"]]
+        return df
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+
+def pair_ticker(base, quote):
+    """Yahoo Finance symbol of the `base`/`quote` rate (units of `quote` per `base`).
+
+    Example: ("USD", "THB") -> "THB=X", ("EUR", "THB") -> "EURTHB=X".
+    """
+    return f"{quote}=X" if base == "USD" else f"{base}{quote}=X"
+
+
+class FXRates:
+    """Historical exchange rates fetched through `DataTerminal`, applied with as-of joins.
+
+    Every date takes the last rate published on or before it, so values on weekends and
+    holidays use the previous close. The full history of a pair is loaded once, and the
+    rates of each (pair, start, end) range are memoized, so converting further columns of
+    the same frame costs one `searchsorted` and one multiplication.
+
+    With `offline=True` only the rates already cached on disk are read, e.g. in the
+    dashboard, and dates before the first cached rate take the `fallback` rate.
+    """
+
+    def __init__(self, data_terminal=None, price_column="Adj Close", fallback=None, offline=False):
+        """
+        Args:
+            data_terminal (DataTerminal, optional): Terminal that fetches and caches the
+                rate tickers. None to use `fallback` only.
+            price_column (str): Column of the daily rate.
+            fallback (dict, optional): (base, quote) -> rate of the dates without a
+                rate, e.g. {("USD", "THB"): 34.275}.
+            offline (bool): Read the cached rates with `DataTerminal.load_data` instead of
+                fetching them.
+        """
+        self.data_terminal = data_terminal
+        self.price_column = price_column
+        self.fallback = fallback or {}
+        self.offline = offline
+        self._history = {}
+        self._rates = {}
+
+    def history(self, base, quote):
+        """Every cached rate of `base`/`quote`, as a Series indexed by sorted unique Date.
+
+        `quote`/"USD" is the inverse of "USD"/`quote`, as Yahoo Finance lists the USD
+        pairs one way only.
+        """
+        pair = (base, quote)
+        if pair not in self._history:
+            if quote == "USD" and base != "USD":
+                self._history[pair] = 1 / self.history(quote, base)
+            elif self.data_terminal is None:
+                self._history[pair] = pd.Series(
+                    dtype=float, index=pd.DatetimeIndex([], name="Date"), name=f"{base}{quote}"
+                )
+            else:
+                tickers = [pair_ticker(base, quote)]
+                if self.offline:
+                    df = self.data_terminal.load_data(tickers)
+                else:
+                    df = self.data_terminal.fetch_data(tickers)
+                if df.empty:
+                    rates = pd.Series(dtype=float, index=pd.DatetimeIndex([], name="Date"))
+                else:
+                    df = df.dropna(subset=[self.price_column]).sort_values("Date", kind="stable")
+                    df = df.drop_duplicates(subset="Date", keep="last")
+                    rates = pd.Series(
+                        df[self.price_column].to_numpy(dtype=float),
+                        index=pd.DatetimeIndex(df["Date"], name="Date"),
+                    )
+                self._history[pair] = rates.rename(f"{base}{quote}")
+        return self._history[pair]
+
+    def rates(self, base, quote, start=None, end=None):
+        """Rates of `base`/`quote` covering [start, end].
+
+        The range starts at the last rate on or before `start`, so every date in the range
+        has a rate to join with.
+        """
+        key = (base, quote, start, end)
+        if key not in self._rates:
+            rates = self.history(base, quote)
+            first, stop = 0, len(rates)
+            if start is not None:
+                first = max(int(rates.index.searchsorted(pd.Timestamp(start), side="right")) - 1, 0)
+            if end is not None:
+                stop = int(rates.index.searchsorted(pd.Timestamp(end), side="right"))
+            self._rates[key] = rates.iloc[first:stop]
+        return self._rates[key]
+
+    def rate_at(self, dates, base="USD", quote="THB"):
+        """As-of rate of `base`/`quote` for every date: the last rate on or before it.
+
+        Args:
+            dates (array-like): Dates, in any order.
+
+        Returns:
+            np.ndarray: One rate per date; 1.0 if `base == quote`. Dates before the first
+                rate take the `fallback` rate, NaN without one.
+        """
+        dates = pd.DatetimeIndex(dates)
+        if base == quote:
+            return np.ones(len(dates))
+        if len(dates) == 0:
+            return np.empty(0)
+
+        rates = self.rates(base, quote, dates.min(), dates.max())
+        positions = rates.index.searchsorted(dates, side="right") - 1
+        if len(rates) == 0:
+            return np.full(len(dates), self.fallback_rate(base, quote))
+        result = rates.to_numpy()[np.maximum(positions, 0)]
+        result[positions < 0] = self.fallback_rate(base, quote)
+        return result
+
+    def fallback_rate(self, base, quote):
+        """`fallback` rate of `base`/`quote`, or of its inverse pair; NaN without one."""
+        if (base, quote) in self.fallback:
+            return self.fallback[(base, quote)]
+        if (quote, base) in self.fallback:
+            return 1 / self.fallback[(quote, base)]
+        return np.nan
+
+    def convert(self, values, dates, base="USD", quote="THB"):
+        """`values` in `base` converted to `quote` at the as-of rate of their dates."""
+        return np.asarray(values, dtype=float) * self.rate_at(dates, base, quote)
+
+    def convert_frame(self, df, columns, base="USD", quote="THB", date_column=None):
+        """Converts `columns` of `df` in one join, renaming "(USD)" to "(THB)".
+
+        Args:
+            df (pd.DataFrame): Frame with a Date column, or indexed by Date.
+            columns (list): Columns in `base`.
+            date_column (str, optional): Date column. Defaults to the index.
+
+        Returns:
+            pd.DataFrame: The converted columns and the rate used, on the index of `df`.
+        """
+        dates = df.index if date_column is None else df[date_column]
+        rate = self.rate_at(dates, base, quote)
+        converted = {
+            column.replace(f"({base})", f"({quote})"): df[column].to_numpy(dtype=float) * rate
+            for column in columns
+        }
+        converted[f"{base}{quote}"] = rate
+        return pd.DataFrame(converted, index=df.index)
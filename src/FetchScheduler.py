@@ -0,0 +1,163 @@
+import time
+import random
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import numpy as np
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout=None):
+        """Blocks until a token is available.
+
+        Returns:
+            bool: False if no token became available within `timeout` seconds.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class FetchScheduler:
+    """Runs fetch tasks on a bounded worker pool under a shared request rate.
+
+    Each task gets a deadline, counted from the moment a worker starts it; failed
+    attempts are retried with full-jitter exponential backoff while the deadline allows.
+    A task still running at its deadline is reported as failed and its result dropped:
+    its thread cannot be stopped, so it finishes in the background. After `run`,
+    `summary` holds the latency and failure statistics of the batch.
+    """
+
+    def __init__(self, max_workers=5, rate=2.0, burst=None, max_retries=3,
+                 backoff=0.5, max_backoff=30.0, deadline=120.0, seed=None):
+        """
+        Args:
+            max_workers (int): Size of the worker pool.
+            rate (float): Requests per second allowed across all workers.
+            burst (float, optional): Token bucket capacity. Defaults to `max(1, rate)`.
+            max_retries (int): Retries per task after the first attempt.
+            backoff (float): Base backoff in seconds, doubled at every retry.
+            max_backoff (float): Cap of a single backoff sleep.
+            deadline (float): Seconds a task may take, retries included.
+            seed (int, optional): Seed of the jitter.
+        """
+        self.max_workers = max_workers
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.random = random.Random(seed)
+        self.summary = {}
+
+    def _backoff(self, attempt):
+        # full jitter
+        return self.random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def _run_task(self, task, started):
+        deadline = started + self.deadline
+        attempt = 0
+        while True:
+            if not self.bucket.acquire(timeout=deadline - time.monotonic()):
+                raise DeadlineExceeded(f"Deadline of {self.deadline}s exceeded waiting for the rate limit.")
+            try:
+                return task(), attempt, time.monotonic() - started
+            except Exception as e:
+                sleep = self._backoff(attempt)
+                if attempt >= self.max_retries or time.monotonic() + sleep >= deadline:
+                    e.attempts = attempt
+                    raise
+                attempt += 1
+                time.sleep(sleep)
+
+    def run(self, tasks):
+        """Runs `tasks` concurrently.
+
+        Args:
+            tasks (dict): Key (e.g. ticker) -> zero-argument callable.
+
+        Returns:
+            tuple: (results, failures) dicts keyed like `tasks`; failures hold the error message.
+        """
+        results, failures, latencies = {}, {}, []
+        retries = 0
+        started = time.monotonic()
+        # Key -> time a worker started the task, written by the workers
+        starts = {}
+
+        def start(key, task):
+            starts[key] = time.monotonic()
+            return self._run_task(task, starts[key])
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {executor.submit(start, key, task): key for key, task in tasks.items()}
+            pending = set(futures)
+            while pending:
+                # Wake up at the first deadline of a running task; a task not started
+                # yet cannot expire before now + deadline
+                now = time.monotonic()
+                expiries = [starts.get(futures[future], now) + self.deadline for future in pending]
+                done, pending = wait(pending, timeout=max(min(expiries) - now, 0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    key = futures[future]
+                    try:
+                        results[key], attempts, latency = future.result()
+                        retries += attempts
+                        latencies.append(latency)
+                    except Exception as e:
+                        retries += getattr(e, "attempts", 0)
+                        failures[key] = f"{type(e).__name__}: {e}"
+
+                now = time.monotonic()
+                for future in list(pending):
+                    key = futures[future]
+                    if key in starts and now >= starts[key] + self.deadline:
+                        pending.discard(future)
+                        error = DeadlineExceeded(f"Deadline of {self.deadline}s exceeded.")
+                        failures[key] = f"{type(error).__name__}: {error}"
+        finally:
+            # Expired tasks are not waited for
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        elapsed = time.monotonic() - started
+        latencies = np.array(latencies)
+        self.summary = {
+            "tasks": len(tasks),
+            "succeeded": len(results),
+            "failed": len(failures),
+            "retries": retries,
+            "elapsed (s)": elapsed,
+            "throughput (tasks/s)": len(tasks) / elapsed if elapsed else np.nan,
+            "latency p50 (s)": float(np.percentile(latencies, 50)) if latencies.size else np.nan,
+            "latency p95 (s)": float(np.percentile(latencies, 95)) if latencies.size else np.nan,
+            "latency max (s)": float(latencies.max()) if latencies.size else np.nan,
+            "failures": failures,
+        }
+        return results, failures
@@ -0,0 +1,261 @@
+import os
+import json
+import pandas as pd
+from src.ledger import *
+from src.metrics import *
+from src.PortfolioStore import *
+
+# Per-ticker state persisted after every update, on top of the ledger state
+TICKER_STATE_COLUMNS = ["Ticker", "Date"] + STATE_COLUMNS + ["Market Price (USD)"]
+
+# Layout version of the saved state, bumped whenever the state or the output columns
+# change; `update` refuses a state of another version
+STATE_VERSION = 2
+
+
+class IncrementalPortfolio:
+    """Keeps `Portfolio.csv`/`PortfolioMetrics.csv` up to date without full rebuilds.
+
+    `rebuild` runs the whole pipeline once and persists the state. `update` then only
+    recomputes rows from the first date touched by new fills, price bars or deposits:
+    a daily refresh appends the new days, a backdated fill restates from its date on.
+
+    Files under `data_dir`:
+        Portfolio.csv, PortfolioMetrics.csv: the outputs, or with `format="parquet"`
+            the normalized Assets/ and PortfolioMetrics/ year partitions of `PortfolioStore`.
+        state/Ledger.csv: one row per (Ticker, trade Date) with the state machine columns.
+        state/TickerState.csv: per-ticker state and last price at the last date.
+        state/MetricState.json: the `STATE_VERSION`, the last `PortfolioMetrics` row and the
+            `StreamingMetrics` state.
+    """
+
+    def __init__(self, REPO_PATH=os.path.abspath(os.path.join("..")), data_dir=None, format="csv",
+                 calendar="calendar"):
+        """
+        Args:
+            REPO_PATH (str): The path to the repository.
+            data_dir (str, optional): Output directory. Defaults to `data/private/csv/`.
+            format (str): "csv" for the wide `Portfolio.csv` layout, or "parquet" for the
+                normalized `PortfolioStore` tables.
+            calendar (str or array-like): Days of the daily grid, see `trading_days`.
+        """
+        self.data_dir = data_dir or os.path.join(REPO_PATH, "data/private/csv/")
+        self.store = PortfolioStore(self.data_dir) if format == "parquet" else None
+        self.calendar = calendar
+        self.state_dir = os.path.join(self.data_dir, "state/")
+        if not os.path.exists(self.state_dir):
+            os.makedirs(self.state_dir)
+
+        self.portfolio_path = os.path.join(self.data_dir, "Portfolio.csv")
+        self.metrics_path = os.path.join(self.data_dir, "PortfolioMetrics.csv")
+        self.ledger_path = os.path.join(self.state_dir, "Ledger.csv")
+        self.ticker_state_path = os.path.join(self.state_dir, "TickerState.csv")
+        self.metric_state_path = os.path.join(self.state_dir, "MetricState.json")
+
+    def rebuild(self, df_transactions, df_yf, df_deposit=None, end=None, risk_free_rate=None, actions=None):
+        """Runs the full pipeline and persists outputs and state.
+
+        Args:
+            risk_free_rate (pd.DataFrame, optional): Output of `fetch_risk_free_rate`.
+            actions (pd.DataFrame, optional): Corporate actions, see `build_portfolio`.
+
+        Returns:
+            tuple: (df_portfolio, df_portfolio_metrics)
+        """
+        ledger = build_ledger(df_transactions, actions, prices=df_yf if actions is not None else None)
+        df_portfolio = portfolio_from_ledger(ledger, df_yf, df_deposit, end=end, calendar=self.calendar)
+        streaming = StreamingMetrics()
+        df_metrics = portfolio_metrics(df_portfolio, risk_free_rate, streaming)
+
+        ledger = self._run_ledger(ledger)
+
+        self._write_outputs(df_portfolio, df_metrics)
+        self._save_state(ledger, df_portfolio, df_metrics, streaming)
+
+        return df_portfolio, df_metrics
+
+    def update(self, new_transactions=None, new_prices=None, new_deposit=None, end=None,
+               risk_free_rate=None, actions=None):
+        """Extends the outputs from the first affected date.
+
+        Args:
+            new_transactions (pd.DataFrame, optional): Raw fills not yet applied, in the
+                `Transactions.xlsx` layout. Fills may be backdated.
+            new_prices (pd.DataFrame, optional): `DataTerminal.fetch_data` output. Bars
+                after the last built date are new; earlier bars only price the tickers and
+                dates the outputs lack, e.g. a backdated fill of a new ticker.
+            new_deposit (pd.DataFrame, optional): Deposit frame; like prices, only rows
+                after the last built date are applied.
+            end (pd.Timestamp, optional): Last date to build. Defaults to today.
+            risk_free_rate (pd.DataFrame, optional): Output of `fetch_risk_free_rate`. A
+                backdated restatement replays the risk metrics, so it must cover the history.
+            actions (pd.DataFrame, optional): Corporate actions the new fills are restated
+                with, as in `rebuild`. Dividends use the closes of `new_prices`.
+
+        Returns:
+            tuple: (tail of df_portfolio, tail of df_portfolio_metrics) that was (re)written,
+                starting at the first affected date.
+        """
+        ledger, ticker_state, metric_state, streaming = self._load_state()
+        last_date = ticker_state["Date"].max()
+        end = pd.Timestamp.today() if end is None else pd.Timestamp(end)
+        end = max(end.normalize(), last_date)
+
+        fills = None
+        if new_transactions is not None and not new_transactions.empty:
+            fills = rename_ticker(preprocess_securities(new_transactions))
+            fills = adjust_for_actions(fills, actions, new_prices if actions is not None else None)
+
+        # First affected date
+        start = last_date + pd.DateOffset(1)
+        if fills is not None:
+            start = min(start, fills["Date"].min())
+        if start > end:
+            return pd.DataFrame(columns=PORTFOLIO_COLUMNS + REALIZED_COLUMNS), pd.DataFrame()
+        seed_date = start - pd.DateOffset(1)
+
+        if start > last_date:
+            df_head, df_metrics_head = None, None
+            seed_prices = ticker_state[["Ticker", "Market Price (USD)"]]
+            seed_deposit = pd.DataFrame([metric_state])
+            old_prices = old_deposit = None
+        else:
+            df_old, df_metrics_old = self._read_outputs()
+            df_head = df_old[df_old["Date"] < start]
+            df_metrics_head = df_metrics_old[df_metrics_old.index < start]
+            streaming = StreamingMetrics()
+            streaming.backfill(df_metrics_head.copy(), risk_free_rate)
+
+            seed_prices = df_old.loc[df_old["Date"] == seed_date, ["Ticker", "Market Price (USD)"]]
+            seed_deposit = df_metrics_old[df_metrics_old.index == seed_date].reset_index()
+            old_prices = df_old.loc[df_old["Date"] >= start, ["Ticker", "Date", "Market Price (USD)"]]
+            old_deposit = df_metrics_old[df_metrics_old.index >= start].reset_index()
+
+        # Ledger: resume the state machine from the state before `start`
+        ledger_head = ledger[ledger["Date"] < start]
+        seed = ledger_head.groupby("Ticker").last()[STATE_COLUMNS]
+
+        ledger_tail = ledger.loc[ledger["Date"] >= start, ["Date", "Ticker", "Executed Price (USD)", "Volume"]]
+        if fills is not None:
+            ledger_tail = pd.concat([ledger_tail, fills], ignore_index=True)
+        ledger_tail = aggregate_intraday_to_daily(ledger_tail)
+        ledger_tail = self._run_ledger(ledger_tail, initial=seed)
+        ledger = pd.concat([ledger_head, ledger_tail]).sort_values(["Ticker", "Date"], ignore_index=True)
+
+        # Daily grid from the seed date, which only carries the state forward
+        seed_rows = seed.reset_index()
+        seed_rows["Date"] = seed_date
+        df = daily_basis(pd.concat([seed_rows, ledger_tail], ignore_index=True), end=end, calendar=self.calendar)
+        df = df.drop(columns=["Cumulative Notional"])
+
+        # Prices
+        bars = [seed_prices.assign(Date=seed_date)]
+        if old_prices is not None:
+            bars.append(old_prices)
+        if new_prices is not None:
+            new_bars = new_prices.rename(columns={"Adj Close": "Market Price (USD)"})
+            new_bars = new_bars[["Ticker", "Date", "Market Price (USD)"]]
+            # Up to `last_date`, only the (Ticker, Date) the outputs have no price for: new
+            # tickers or days before a ticker's first row. Tickers without a seed price
+            # also take earlier bars, so the as-of join has a price on `start`.
+            priced = pd.concat(bars).dropna(subset=["Market Price (USD)"])
+            missing = ~pd.MultiIndex.from_frame(new_bars[["Ticker", "Date"]]).isin(
+                pd.MultiIndex.from_frame(priced[["Ticker", "Date"]])
+            )
+            unseeded = ~new_bars["Ticker"].isin(priced.loc[priced["Date"] == seed_date, "Ticker"])
+            bars.append(new_bars[
+                (new_bars["Date"] > last_date) | (missing & ((new_bars["Date"] >= start) | unseeded))
+            ])
+        bars = pd.concat(bars, ignore_index=True).rename(columns={"Market Price (USD)": "Adj Close"})
+        bars = bars.dropna(subset=["Adj Close"]).drop_duplicates(["Ticker", "Date"], keep="last")
+        df = merge_yf_to_portfolio(df, bars, calendar=self.calendar)
+
+        df = market_value(df)
+        df = unrealized_pnl(df)
+
+        # Deposits
+        deposit = [seed_deposit.assign(Date=seed_date)]
+        if old_deposit is not None:
+            deposit.append(old_deposit)
+        if new_deposit is not None:
+            new_deposit = new_deposit.reset_index() if "Date" not in new_deposit.columns else new_deposit
+            new_deposit = new_deposit.rename(columns={"Balance": "Cash"})
+            deposit.append(new_deposit[new_deposit["Date"] > last_date])
+        deposit = pd.concat(deposit, ignore_index=True)[["Date", "Cash", "Cumulative Deposit (USD)"]]
+        deposit = deposit.drop_duplicates("Date", keep="last")
+        df = merge_deposit_to_portfolio(df, deposit)
+
+        df_tail = df.loc[df["Date"] >= start, PORTFOLIO_COLUMNS + REALIZED_COLUMNS].reset_index(drop=True)
+        if df_tail.empty:
+            # No grid day in [start, end], e.g. a weekend on the business calendar
+            return df_tail, pd.DataFrame()
+        df_metrics_tail = portfolio_metrics(df_tail, risk_free_rate, streaming)
+
+        # Write: append when only new days were added, restate the tail otherwise
+        if df_head is None:
+            self._write_outputs(df_tail, df_metrics_tail, append=True)
+        else:
+            self._write_outputs(pd.concat([df_head, df_tail]), pd.concat([df_metrics_head, df_metrics_tail]))
+        self._save_state(ledger, df_tail, df_metrics_tail, streaming)
+
+        return df_tail, df_metrics_tail
+
+    def _write_outputs(self, df_portfolio, df_metrics, append=False):
+        if self.store is not None:
+            if append:
+                self.store.append(df_portfolio, df_metrics)
+            else:
+                self.store.write(df_portfolio, df_metrics)
+        elif append:
+            df_portfolio.to_csv(self.portfolio_path, mode="a", header=False, index=False)
+            df_metrics.to_csv(self.metrics_path, mode="a", header=False)
+        else:
+            df_portfolio.to_csv(self.portfolio_path, index=False)
+            df_metrics.to_csv(self.metrics_path)
+
+    def _read_outputs(self):
+        if self.store is not None:
+            df_portfolio = self.store.read_portfolio()
+            df_portfolio["Ticker"] = df_portfolio["Ticker"].astype(str)
+            return df_portfolio, self.store.read_metrics()
+        return (
+            pd.read_csv(self.portfolio_path, parse_dates=["Date"]),
+            pd.read_csv(self.metrics_path, parse_dates=["Date"], index_col="Date"),
+        )
+
+    @staticmethod
+    def _run_ledger(ledger, initial=None):
+        state = average_cost_state(ledger, initial=initial)
+        ledger = ledger[["Ticker", "Date", "Executed Price (USD)", "Volume"]].copy()
+        ledger[state.columns] = state
+        return ledger
+
+    def _save_state(self, ledger, df_portfolio, df_metrics, streaming):
+        ledger.to_csv(self.ledger_path, index=False)
+
+        last_date = df_portfolio["Date"].max()
+        ticker_state = (
+            df_portfolio.loc[df_portfolio["Date"] == last_date, ["Ticker", "Date", "Market Price (USD)"]]
+            .merge(ledger.groupby("Ticker").last()[STATE_COLUMNS].reset_index(), on="Ticker", how="left")
+        )
+        ticker_state[TICKER_STATE_COLUMNS].to_csv(self.ticker_state_path, index=False)
+
+        metric_state = df_metrics.iloc[-1].to_dict()
+        metric_state["Date"] = df_metrics.index[-1].strftime("%Y-%m-%d")
+        with open(self.metric_state_path, "w") as f:
+            json.dump({"version": STATE_VERSION, "row": metric_state, "streaming": streaming.to_dict()}, f)
+
+    def _load_state(self):
+        with open(self.metric_state_path) as f:
+            state = json.load(f)
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(
+                f"State in {self.state_dir} has version {state.get('version')}, expected "
+                f"{STATE_VERSION}: run rebuild() once to start from the current layout."
+            )
+        ledger = pd.read_csv(self.ledger_path, parse_dates=["Date"])
+        ticker_state = pd.read_csv(self.ticker_state_path, parse_dates=["Date"])
+        metric_state = state["row"]
+        metric_state["Date"] = pd.Timestamp(metric_state["Date"])
+        streaming = StreamingMetrics.from_dict(state["streaming"])
+        return ledger, ticker_state, metric_state, streaming
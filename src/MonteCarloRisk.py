@@ -0,0 +1,189 @@
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.ValuationPanel import *
+
+# Shared by the worker processes, set once per worker by `_init_worker`
+_model = None
+
+
+def _init_worker(mean, cholesky, values, horizons):
+    global _model
+    _model = (mean, cholesky, values, horizons)
+
+
+def _simulate_in_worker(n_paths, seed, block_size):
+    return _simulate_pnl(*_model, n_paths, seed, block_size)
+
+
+def _simulate_pnl(mean, cholesky, values, horizons, n_paths, seed, block_size):
+    """PnL of `n_paths` correlated scenarios for every horizon.
+
+    Daily log returns are N(mean, L L^T); an h-day return is N(h mean, h L L^T). Every
+    block draws one standard normal matrix, shares it across the horizons, and reprices
+    the positions exactly: PnL = sum_i v_i (exp(r_i) - 1).
+
+    Returns:
+        np.ndarray: (len(horizons), n_paths) PnL in the currency of `values`.
+    """
+    rng = np.random.default_rng(seed)
+    pnl = np.empty((len(horizons), n_paths))
+    for start in range(0, n_paths, block_size):
+        stop = min(start + block_size, n_paths)
+        shocks = rng.standard_normal((stop - start, len(values))) @ cholesky.T
+        for i, horizon in enumerate(horizons):
+            returns = np.sqrt(horizon) * shocks
+            returns += horizon * mean
+            np.expm1(returns, out=returns)
+            pnl[i, start:stop] = returns @ values
+    return pnl
+
+
+class MonteCarloRisk:
+    """Monte Carlo VaR and CVaR of the current holdings from the cached price panel.
+
+    Daily log returns of the held tickers over a trailing window give the mean and the
+    covariance; its Cholesky factor is cached per (window end, window, tickers), so
+    several runs on the same day factorize once. Scenarios are drawn in vectorized blocks
+    from a seeded generator, optionally spread over a process pool. Every chunk of paths
+    has its own `SeedSequence` child, so results depend on the seed and the number of
+    chunks, not on the number of workers.
+
+    VaR and CVaR follow the sign of `PortfolioMetrics`' 'CVaR 95%': the PnL quantile and
+    the mean PnL below it, negative for a loss.
+    """
+
+    def __init__(self, prices, window=252, seed=0, block_size=20_000):
+        """
+        Args:
+            prices (PricePanel or pd.DataFrame): Shared price panel, or prices from
+                `DataTerminal.fetch_data` to build one from.
+            window (int): Trailing price dates of the covariance estimate.
+            seed (int): Seed of the scenario generator.
+            block_size (int): Paths drawn per block; memory is about
+                block_size x tickers x 16 bytes.
+        """
+        self.prices = prices if isinstance(prices, PricePanel) else PricePanel(prices)
+        self.window = window
+        self.seed = seed
+        self.block_size = block_size
+        self._factors = {}
+        self.summary = {}
+
+    def returns(self, tickers, end=None):
+        """Daily log returns of `tickers` over the window ending at `end` (the last price
+        date on or before it). Missing prices count as no move."""
+        stop = len(self.prices.dates) if end is None else int(
+            np.searchsorted(self.prices.dates, np.datetime64(pd.Timestamp(end)), side="right")
+        )
+        first = max(stop - self.window - 1, 0)
+        prices = self.prices.asof(self.prices.dates[first:stop], tickers)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = np.diff(np.log(prices), axis=0)
+        return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0), self.prices.dates[stop - 1]
+
+    def factor(self, tickers, end=None):
+        """(mean, Cholesky factor) of the daily log returns, cached per window.
+
+        A covariance that is not positive definite (e.g. a ticker without moves) gets a
+        small diagonal load before the factorization.
+        """
+        returns, window_end = self.returns(tickers, end)
+        key = (window_end, self.window, tuple(tickers))
+        if key not in self._factors:
+            mean = returns.mean(axis=0)
+            covariance = np.atleast_2d(np.cov(returns, rowvar=False))
+            jitter = 1e-12 * max(np.trace(covariance) / len(covariance), 1e-12)
+            for _ in range(8):
+                try:
+                    cholesky = np.linalg.cholesky(covariance + jitter * np.eye(len(covariance)))
+                    break
+                except np.linalg.LinAlgError:
+                    jitter *= 100
+            else:
+                raise np.linalg.LinAlgError("Return covariance is not positive definite.")
+            self._factors[key] = (mean, cholesky)
+        return self._factors[key]
+
+    def simulate(self, positions, end=None, horizons=(1, 10, 21), confidence=(0.95, 0.99),
+                 n_paths=100_000, max_workers=None, n_chunks=None):
+        """VaR and CVaR of `positions` at every horizon and confidence level.
+
+        Args:
+            positions (pd.Series): Position value (USD) per ticker, e.g. `holdings(df_portfolio)`.
+            end (pd.Timestamp, optional): Last date of the estimation window. Defaults to
+                the last price date.
+            horizons (tuple): Horizons in trading days.
+            confidence (tuple): Confidence levels.
+            n_paths (int): Simulated paths, shared by all horizons.
+            max_workers (int, optional): Worker processes. None or 1 runs in this process.
+            n_chunks (int, optional): Independent seeded chunks. Defaults to 4 per worker
+                (one without workers).
+
+        Returns:
+            pd.DataFrame: Indexed by ('Horizon (days)', 'Confidence') with 'VaR (USD)',
+                'CVaR (USD)', 'VaR (%)' and 'CVaR (%)' of the portfolio value. Throughput
+                is printed and kept in `summary`.
+        """
+        started = time.perf_counter()
+        positions = positions[positions != 0]
+        tickers = list(positions.index)
+        values = positions.to_numpy(dtype=float)
+        mean, cholesky = self.factor(tickers, end)
+
+        workers = max_workers or 1
+        n_chunks = n_chunks or (1 if workers == 1 else 4 * workers)
+        sizes = np.diff(np.linspace(0, n_paths, n_chunks + 1).astype(int))
+        seeds = np.random.SeedSequence(self.seed).spawn(n_chunks)
+
+        if workers == 1:
+            chunks = [
+                _simulate_pnl(mean, cholesky, values, horizons, size, seed, self.block_size)
+                for size, seed in zip(sizes, seeds)
+            ]
+        else:
+            with ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(mean, cholesky, values, horizons)
+            ) as pool:
+                chunks = list(pool.map(_simulate_in_worker, sizes, seeds, [self.block_size] * n_chunks))
+        pnl = np.concatenate(chunks, axis=1)
+        seconds = time.perf_counter() - started
+
+        self.summary = {
+            "paths": n_paths,
+            "tickers": len(tickers),
+            "workers": workers,
+            "seconds": seconds,
+            "paths per second": n_paths / seconds if seconds > 0 else float("inf"),
+        }
+        print(
+            f"Simulated {n_paths:,} paths of {len(tickers)} tickers in {seconds:.2f}s "
+            f"({self.summary['paths per second']:,.0f} paths/s, {workers} workers)."
+        )
+
+        total = values.sum()
+        rows = []
+        for i, horizon in enumerate(horizons):
+            for level in confidence:
+                tail = int(np.floor((1 - level) * n_paths))
+                # The `tail` worst paths, unordered, and the VaR at their boundary
+                worst = np.partition(pnl[i], tail)[:tail + 1]
+                var = worst.max()
+                cvar = worst[:-1].mean() if tail else var
+                rows.append({
+                    "Horizon (days)": horizon,
+                    "Confidence": level,
+                    "VaR (USD)": var,
+                    "CVaR (USD)": cvar,
+                    "VaR (%)": var / total * 100,
+                    "CVaR (%)": cvar / total * 100,
+                })
+        return pd.DataFrame(rows).set_index(["Horizon (days)", "Confidence"])
+
+
+def holdings(df_portfolio, date=None):
+    """Position value per ticker on `date` (default: the last date) of a portfolio frame."""
+    date = df_portfolio["Date"].max() if date is None else pd.Timestamp(date)
+    df = df_portfolio[df_portfolio["Date"] == date]
+    return df.set_index("Ticker")["Asset Value (USD)"].dropna()
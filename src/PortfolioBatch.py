@@ -0,0 +1,143 @@
+import os
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from src.ValuationPanel import *
+from src.PortfolioStore import *
+
+# Latest `PortfolioMetrics` columns reported per account in `PortfolioBatch.summary_frame`
+SUMMARY_COLUMNS = [
+    "Portfolio Value (USD)",
+    "Cash",
+    "Cumulative Deposit (USD)",
+    "Portfolio Net Profit (USD)",
+    "ROI (%)",
+    "Portfolio Unrealized PnL (%)",
+    "Dynamic Sharpe Ratio",
+    "Volatility_30d (%)",
+    "CVaR 95%",
+]
+
+# Shared by the worker processes, set once per worker by `_init_worker`
+_batch = None
+
+
+def _init_worker(batch):
+    global _batch
+    _batch = batch
+
+
+def _evaluate_in_worker(account, inputs):
+    return account, _batch.evaluate(inputs)
+
+
+class PortfolioBatch:
+    """Evaluates many accounts against one shared price panel.
+
+    The prices are laid out once as a `PricePanel`. Each account then only runs its own
+    ledger, a `ValuationPanel` that takes its columns of the shared panel, and the
+    metrics. Accounts run in the calling process, or on a process pool where every worker
+    receives the shared inputs once.
+    """
+
+    def __init__(self, df_yf, risk_free_rate=None, end=None, calendar="calendar", actions=None):
+        """
+        Args:
+            df_yf (pd.DataFrame): Prices of every ticker of every account, from
+                `DataTerminal.fetch_data`.
+            risk_free_rate (pd.DataFrame, optional): Output of `fetch_risk_free_rate`.
+            end (pd.Timestamp, optional): Last date of the grids. Defaults to today.
+            calendar (str or array-like): Grid days, see `trading_days`.
+            actions (pd.DataFrame, optional): Corporate actions, see `build_ledger`.
+        """
+        self.prices = PricePanel(df_yf)
+        self.closes = df_yf[["Ticker", "Date", "Close"]] if actions is not None else None
+        self.risk_free_rate = risk_free_rate
+        self.end = end
+        self.calendar = calendar
+        self.actions = actions
+        self.summary = {}
+
+    def evaluate(self, inputs):
+        """Ledger, valuation and metrics of one account.
+
+        Args:
+            inputs (dict): 'transactions' (raw `Transactions.xlsx` layout) and optionally
+                'deposits' (`Deposit.csv` layout).
+
+        Returns:
+            tuple: (df_portfolio, df_portfolio_metrics)
+        """
+        df_ledger = realized_pnl(build_ledger(inputs["transactions"], self.actions, self.closes))
+        panel = ValuationPanel.from_ledger(
+            df_ledger, self.prices, inputs.get("deposits"), end=self.end, calendar=self.calendar
+        )
+        return panel.to_long(), panel.metrics(self.risk_free_rate)
+
+    def run(self, accounts, max_workers=None):
+        """Evaluates every account.
+
+        Args:
+            accounts (dict): Account name -> inputs, see `evaluate`.
+            max_workers (int, optional): Worker processes. None or 1 runs in this process.
+
+        Returns:
+            dict: Account name -> (df_portfolio, df_portfolio_metrics). Throughput is
+                printed and kept in `summary`.
+        """
+        started = time.perf_counter()
+        if max_workers is None or max_workers <= 1:
+            results = {account: self.evaluate(inputs) for account, inputs in accounts.items()}
+        else:
+            with ProcessPoolExecutor(max_workers, initializer=_init_worker, initargs=(self,)) as pool:
+                chunksize = max(1, len(accounts) // (4 * max_workers))
+                results = dict(pool.map(
+                    _evaluate_in_worker, accounts.keys(), accounts.values(), chunksize=chunksize
+                ))
+        seconds = time.perf_counter() - started
+
+        self.summary = {
+            "accounts": len(results),
+            "workers": max_workers or 1,
+            "seconds": seconds,
+            "accounts per second": len(results) / seconds if seconds > 0 else float("inf"),
+        }
+        print(
+            f"Evaluated {len(results)} accounts in {seconds:.2f}s "
+            f"({self.summary['accounts per second']:.1f} accounts/s, {self.summary['workers']} workers)."
+        )
+        return results
+
+    @staticmethod
+    def summary_frame(results):
+        """Cross-account summary: the latest metrics and the position count of each account.
+
+        Returns:
+            pd.DataFrame: Indexed by 'Account', with 'Date', 'Tickers Held' and the
+                available `SUMMARY_COLUMNS`.
+        """
+        rows = {}
+        for account, (df_portfolio, df_metrics) in results.items():
+            if df_metrics.empty:
+                continue
+            latest = df_metrics.iloc[-1]
+            last_day = df_portfolio[df_portfolio["Date"] == df_metrics.index[-1]]
+            rows[account] = {
+                "Date": df_metrics.index[-1],
+                "Tickers Held": int((last_day["Cumulative Volume"] != 0).sum()),
+                **{column: latest[column] for column in SUMMARY_COLUMNS if column in latest.index},
+            }
+        return pd.DataFrame.from_dict(rows, orient="index").rename_axis("Account")
+
+    @staticmethod
+    def write(results, data_dir, format="csv"):
+        """Writes `<account>-Portfolio.csv`/`<account>-PortfolioMetrics.csv`, or with
+        `format="parquet"` the `PortfolioStore` tables, for every account."""
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        for account, (df_portfolio, df_metrics) in results.items():
+            if format == "parquet":
+                PortfolioStore(data_dir, prefix=f"{account}-").write(df_portfolio, df_metrics)
+            else:
+                df_portfolio.to_csv(os.path.join(data_dir, f"{account}-Portfolio.csv"), index=False)
+                df_metrics.to_csv(os.path.join(data_dir, f"{account}-PortfolioMetrics.csv"))
@@ -0,0 +1,179 @@
+import os
+import json
+import shutil
+import pandas as pd
+from src.ledger import *
+from src.metrics import *
+
+try:
+    import pyarrow
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for the normalized store
+    pyarrow = None
+
+# Per-asset table: everything in `Portfolio.csv` that is not repeated per date
+ASSET_TABLE_COLUMNS = [column for column in PORTFOLIO_COLUMNS if column not in PORTFOLIO_LEVEL_COLUMNS]
+
+
+def portfolio_view(df_assets, df_metrics):
+    """Joins the per-asset and per-date tables back into the wide `Portfolio.csv` layout.
+
+    Args:
+        df_assets (pd.DataFrame): Per-asset table with 'Ticker' and 'Date'.
+        df_metrics (pd.DataFrame): Per-date table indexed by 'Date'.
+    """
+    df = df_assets.merge(df_metrics[PORTFOLIO_LEVEL_COLUMNS], left_on="Date", right_index=True, how="left")
+    realized = [column for column in REALIZED_COLUMNS if column in df.columns]
+    return df[PORTFOLIO_COLUMNS + realized]
+
+
+class PortfolioStore:
+    """Normalized, typed storage of the portfolio outputs.
+
+    `Portfolio.csv` repeats the portfolio-level columns (value, unrealized PnL, cash,
+    deposits) on every ticker row, and `PortfolioMetrics.csv` holds them again per date.
+    The store keeps each fact once, in Parquet files partitioned by year like `PriceStore`:
+
+        <prefix>Assets/Year=<year>/part.parquet: keyed by (Ticker, Date),
+            `ASSET_TABLE_COLUMNS` and the realized PnL columns.
+        <prefix>PortfolioMetrics/Year=<year>/part.parquet: keyed by Date, the
+            `PortfolioMetrics` columns.
+
+    Appends rewrite only the years of the new rows. Readers open only the table, years and
+    columns a view needs; `read_portfolio` joins both tables into the wide layout on demand.
+    """
+
+    def __init__(self, data_dir, prefix=""):
+        """
+        Args:
+            data_dir (str): Directory of the tables.
+            prefix (str): Table name prefix, e.g. "20241110-".
+        """
+        if pyarrow is None:
+            raise ImportError("PortfolioStore requires pyarrow: pip install pyarrow")
+        self.data_dir = data_dir
+        if not os.path.exists(data_dir):
+            os.makedirs(data_dir)
+        self.assets_dir = os.path.join(data_dir, f"{prefix}Assets")
+        self.metrics_dir = os.path.join(data_dir, f"{prefix}PortfolioMetrics")
+
+    @classmethod
+    def from_snapshot(cls, loader, prefix, data_dir):
+        """Store of the `<prefix>Portfolio.csv` and `<prefix>PortfolioMetrics.csv` snapshots
+        of `loader`, converted on first use and again whenever one of them changes.
+
+        Args:
+            loader (SnapshotLoader): Source of the CSV snapshots.
+            prefix (str): Snapshot prefix, e.g. "20241110-".
+            data_dir (str): Directory of the converted tables.
+        """
+        store = cls(data_dir, prefix)
+        names = [f"{prefix}Portfolio.csv", f"{prefix}PortfolioMetrics.csv"]
+        versions = [loader.version(name) for name in names]
+        versions_path = os.path.join(data_dir, f"{prefix}versions.json")
+        if store.exists() and os.path.exists(versions_path):
+            with open(versions_path) as f:
+                if json.load(f) == versions:
+                    return store
+        store.import_csv(*[loader.path(name) for name in names])
+        with open(versions_path, "w") as f:
+            json.dump(versions, f)
+        return store
+
+    @staticmethod
+    def _years(table_dir):
+        if not os.path.exists(table_dir):
+            return []
+        return sorted(int(name.split("=")[1]) for name in os.listdir(table_dir) if name.startswith("Year="))
+
+    @staticmethod
+    def _part_path(table_dir, year):
+        return os.path.join(table_dir, f"Year={year}", "part.parquet")
+
+    def exists(self):
+        return bool(self._years(self.assets_dir)) and bool(self._years(self.metrics_dir))
+
+    @staticmethod
+    def split(df_portfolio):
+        """Per-asset table of a wide portfolio frame, sorted by Ticker then Date."""
+        columns = ASSET_TABLE_COLUMNS + [column for column in REALIZED_COLUMNS if column in df_portfolio.columns]
+        df = df_portfolio[columns].sort_values(["Ticker", "Date"], ignore_index=True)
+        return df.astype({"Ticker": "category"})
+
+    def write(self, df_portfolio, df_metrics):
+        """Writes a wide portfolio frame and its metrics as the two tables, replacing them."""
+        shutil.rmtree(self.assets_dir, ignore_errors=True)
+        shutil.rmtree(self.metrics_dir, ignore_errors=True)
+        self.append(df_portfolio, df_metrics)
+
+    def append(self, df_portfolio, df_metrics):
+        """Adds rows, replacing existing (Ticker, Date) and Date keys, and rewriting only
+        the year partitions they fall in."""
+        self._upsert(self.assets_dir, self.split(df_portfolio).astype({"Ticker": str}), ["Ticker", "Date"])
+        self._upsert(self.metrics_dir, df_metrics.rename_axis("Date").reset_index(), ["Date"])
+
+    def _upsert(self, table_dir, df, keys):
+        for year, rows in df.groupby(df["Date"].dt.year):
+            path = self._part_path(table_dir, year)
+            if os.path.exists(path):
+                rows = pd.concat([pd.read_parquet(path), rows], ignore_index=True)
+                rows = rows.drop_duplicates(keys, keep="last")
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            rows.sort_values(keys, ignore_index=True).to_parquet(path, index=False)
+
+    def _read(self, table_dir, keys, condition, start, end, columns):
+        """Rows of the year partitions of `table_dir` that overlap [start, end]."""
+        paths = [
+            self._part_path(table_dir, year)
+            for year in self._years(table_dir)
+            if (start is None or year >= start.year) and (end is None or year <= end.year)
+        ]
+        if not paths:
+            return pd.DataFrame(columns=columns or keys)
+        # Later years may add columns, e.g. the realized PnL
+        dataset = ds.dataset(paths, schema=pyarrow.unify_schemas([pq.read_schema(path) for path in paths]))
+        if start is not None:
+            condition = self._and(condition, ds.field("Date") >= start)
+        if end is not None:
+            condition = self._and(condition, ds.field("Date") <= end)
+        return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+    @staticmethod
+    def _and(condition, other):
+        return other if condition is None else condition & other
+
+    def read_assets(self, tickers=None, start=None, end=None, columns=None):
+        """Reads the per-asset table, pushing ticker and date filters down to Parquet."""
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        condition = None if tickers is None else ds.field("Ticker").isin(list(tickers))
+        if columns is not None:
+            columns = ["Ticker", "Date"] + [column for column in columns if column not in ("Ticker", "Date")]
+        df = self._read(self.assets_dir, ["Ticker", "Date"], condition, start, end, columns)
+        df = df.sort_values(["Ticker", "Date"], ignore_index=True)
+        return df.astype({"Ticker": "category"})
+
+    def read_metrics(self, start=None, end=None, columns=None):
+        """Reads the per-date table, indexed by 'Date'."""
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        if columns is not None:
+            columns = ["Date"] + [column for column in columns if column != "Date"]
+        df = self._read(self.metrics_dir, ["Date"], None, start, end, columns)
+        return df.sort_values("Date").set_index("Date")
+
+    def read_portfolio(self, tickers=None, start=None, end=None):
+        """Wide `Portfolio.csv` layout, joined from both tables."""
+        return portfolio_view(
+            self.read_assets(tickers, start, end),
+            self.read_metrics(start, end, columns=PORTFOLIO_LEVEL_COLUMNS),
+        )
+
+    def import_csv(self, portfolio_csv, metrics_csv):
+        """Converts a `Portfolio.csv`/`PortfolioMetrics.csv` pair."""
+        self.write(
+            pd.read_csv(portfolio_csv, parse_dates=["Date"]),
+            pd.read_csv(metrics_csv, parse_dates=["Date"], index_col="Date"),
+        )
@@ -0,0 +1,138 @@
+import os
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is only needed for the parquet store
+    pa = None
+
+PRICE_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close"]
+
+
+class PriceStore:
+    """Columnar price cache: one Parquet file per ticker and year.
+
+    Layout: `<root>/Ticker=<ticker>/Year=<year>/part.parquet` (hive partitioning), with
+    typed columns Date (timestamp), OHLC/Adj Close (float64) and Volume (int64). Reads
+    push ticker and date filters down to the partitions, so a date slice only opens the
+    files of the requested tickers and years.
+    """
+
+    SCHEMA = None if pa is None else pa.schema(
+        [("Date", pa.timestamp("ns"))]
+        + [(column, pa.float64()) for column in PRICE_COLUMNS]
+        + [("Volume", pa.int64())]
+    )
+
+    def __init__(self, REPO_PATH):
+        if pa is None:
+            raise ImportError("PriceStore requires pyarrow: pip install pyarrow")
+        self.root = os.path.join(REPO_PATH, "data/yfinance/parquet/")
+        if not os.path.exists(self.root):
+            os.makedirs(self.root)
+
+    def _ticker_dir(self, ticker):
+        return os.path.join(self.root, f"Ticker={ticker}")
+
+    def _years(self, ticker):
+        ticker_dir = self._ticker_dir(ticker)
+        if not os.path.exists(ticker_dir):
+            return []
+        return sorted(int(name.split("=")[1]) for name in os.listdir(ticker_dir) if name.startswith("Year="))
+
+    def _part_path(self, ticker, year):
+        return os.path.join(self._ticker_dir(ticker), f"Year={year}", "part.parquet")
+
+    def has(self, ticker):
+        return bool(self._years(ticker))
+
+    def last_date(self, ticker):
+        """Last cached date of `ticker`, reading only the Date column of its latest year."""
+        years = self._years(ticker)
+        if not years:
+            return None
+        dates = pq.read_table(self._part_path(ticker, years[-1]), columns=["Date"]).column("Date")
+        return pd.Timestamp(dates.to_pandas().max())
+
+    @staticmethod
+    def _normalize(df):
+        """Casts a yfinance frame (or cached CSV) to the store schema."""
+        df = df.reindex(columns=["Date"] + PRICE_COLUMNS + ["Volume"])
+        df = pd.DataFrame({
+            "Date": pd.to_datetime(df["Date"], utc=True).dt.tz_localize(None).dt.normalize(),
+            **{column: pd.to_numeric(df[column], errors="coerce").astype("float64") for column in PRICE_COLUMNS},
+            "Volume": pd.to_numeric(df["Volume"], errors="coerce").fillna(0).astype("int64"),
+        })
+        return df.drop_duplicates("Date", keep="last").sort_values("Date", ignore_index=True)
+
+    def append(self, ticker, df):
+        """Upserts rows of `ticker`, rewriting only the year partitions they fall in."""
+        if df.empty:
+            return
+        df = self._normalize(df)
+
+        for year, rows in df.groupby(df["Date"].dt.year):
+            path = self._part_path(ticker, year)
+            if os.path.exists(path):
+                rows = pd.concat([pq.read_table(path).to_pandas(), rows])
+                rows = rows.drop_duplicates("Date", keep="last").sort_values("Date", ignore_index=True)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            pq.write_table(pa.Table.from_pandas(rows, schema=self.SCHEMA, preserve_index=False), path)
+
+    def import_csv(self, ticker, file_path):
+        """Moves a per-ticker CSV cache into the store."""
+        self.append(ticker, pd.read_csv(file_path))
+
+    def read(self, tickers=None, start=None, end=None, columns=None):
+        """Reads a ticker/date slice.
+
+        Args:
+            tickers (list, optional): Tickers to load. Defaults to every cached ticker.
+            start (str or pd.Timestamp, optional): First date, inclusive.
+            end (str or pd.Timestamp, optional): Last date, inclusive.
+            columns (list, optional): Price columns to load. Defaults to all.
+
+        Returns:
+            pd.DataFrame: Columns ['Date', *columns, 'Ticker'], sorted by Ticker then Date.
+        """
+        columns = list(self.SCHEMA.names[1:]) if columns is None else list(columns)
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+
+        # Prune partitions from the directory layout before opening any file
+        tickers = self.tickers() if tickers is None else tickers
+        paths = [
+            self._part_path(ticker, year)
+            for ticker in tickers
+            for year in self._years(ticker)
+            if (start is None or year >= start.year) and (end is None or year <= end.year)
+        ]
+        if not paths:
+            return pd.DataFrame(columns=["Date"] + columns + ["Ticker"])
+
+        dataset = ds.dataset(
+            paths,
+            schema=self.SCHEMA.append(pa.field("Ticker", pa.string())),
+            format="parquet",
+            partitioning=ds.partitioning(pa.schema([("Ticker", pa.string())]), flavor="hive"),
+            partition_base_dir=self.root,
+        )
+
+        condition = None
+        if start is not None:
+            condition = ds.field("Date") >= start
+        if end is not None:
+            condition = self._and(condition, ds.field("Date") <= end)
+
+        df = dataset.to_table(columns=["Date"] + columns + ["Ticker"], filter=condition).to_pandas()
+        return df.sort_values(["Ticker", "Date"], ignore_index=True)
+
+    def tickers(self):
+        return sorted(name.split("=", 1)[1] for name in os.listdir(self.root) if name.startswith("Ticker="))
+
+    @staticmethod
+    def _and(condition, other):
+        return other if condition is None else condition & other
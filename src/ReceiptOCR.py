@@ -0,0 +1,332 @@
+import os
+import re
+import json
+import time
+import hashlib
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, needed to read slip images
+    Image = None
+
+try:
+    import pytesseract
+except ImportError:  # pytesseract is optional, needed by the "tesseract" engine
+    pytesseract = None
+
+IMAGE_EXTENSIONS = (".PNG", ".JPEG", ".JPG")
+
+# PNG text chunk holding the slip text of generated slips, read by the "embedded" engine
+SLIP_TEXT_KEY = "Slip Text"
+
+
+def _search(pattern, text, strip=True):
+    """First group of the first match of `pattern`, or None."""
+    match = re.search(pattern, text)
+    if not match:
+        return None
+    return match.group(1).strip() if strip else match.group(1)
+
+
+def extract_us_stock(text):
+    """Extracts data from text for Dime US Stock Transactions
+
+    Args:
+        text (str): The OCR text from a transaction slip
+
+    Returns:
+        dict: Extracted information
+    """
+    order_pattern = re.search(r'(Buy|Sell) (.*?)\n', text)
+    if order_pattern:
+        position = order_pattern.group(1).strip()
+        ticker = order_pattern.group(2).strip().split()[0]
+    else:
+        position, ticker = None, None
+
+    order_id_pattern = re.search(r'Order ID\s+(.*)\n(\d+)', text)
+    order_id = order_id_pattern.group(1).strip() + order_id_pattern.group(2).strip() if order_id_pattern else None
+
+    return {
+        "Status": _search(r'Status.*\n.*\n(.*)\n', text),
+        "Position": position,
+        "Ticker": ticker,
+        "Market": _search(r'(NASDAQ|NYSE)', text),
+        "Total Amount (THB)": _search(r'(\d+\.\d+)\sTHB', text),
+        "Stock Amount (THB)": _search(r'Stock Amount\s+(\d+\.\d+)\sTHB', text),
+        "Commission Fee (THB)": _search(r'Commission Fee\s+(\d+\.\d+)\sTHB', text),
+        "VAT (THB)": _search(r'VAT 7%\s+(\d+\.\d+)\sTHB', text),
+        "Exchange Rate (1 USD to THB)": _search(r'Exchange Rate\s+1 USD =\s+(\d+\.\d+)\sTHB', text),
+        "USD Amount": _search(r'USD Amount\s+(\d+\.\d+)\sUSD', text),
+        "Submission Date": _search(r'Submission Date.*\n(.*\n.*\d{2}:\d{2})', text),
+        "Order Type": _search(r'Order Type.*\n(.*)', text),
+        "Dime! Portfolio": _search(r'Dime! Portfolio\s+(.*)', text),
+        "Offshore Account No.": _search(r'Offshore Account No.\s+(.*)', text),
+        "Order ID": order_id,
+        "Payment Account Name": _search(r'Account Name\s+(.*)', text),
+        "Payment Account No.": _search(r'Account No.\s+(.*)', text),
+        "Reference ID": _search(r'Reference ID\s+(.*)', text),
+        "Payment Ref ID": _search(r'Payment Ref ID\s+(.*)', text),
+        "Receiving Account Name": _search(r'Receiving Account\nAccount Name\s+(.*)', text),
+        "Receiving Account No.": _search(r'Receiving Account\nAccount No.\s+(.*)', text),
+        "Receiving Ref ID": _search(r'Receiving Ref ID\s+(.*)', text),
+    }
+
+
+def extract_mutual_fund(text):
+    """Extracts data from text for Dime Mutual Fund Transactions
+
+    Args:
+        text (str): The OCR text from a transaction slip
+
+    Returns:
+        dict: Extracted information
+    """
+    order_pattern = re.search(r'(Buy|Sell) (.*?)\n', text)
+    position, ticker = (order_pattern.group(1), order_pattern.group(2)) if order_pattern else (None, None)
+
+    reference_id_pattern = re.search(r'Reference ID (.*?)\n\n(\d+)', text)
+    reference_id = reference_id_pattern.group(1) + reference_id_pattern.group(2) if reference_id_pattern else None
+
+    return {
+        "Status": _search(r'@\S*\s([^\n]*)\n', text, strip=False),
+        "Position": position,
+        "Ticker": ticker,
+        "Amount (THB)": _search(r'(\d+,\d+.\d+) THB\n', text, strip=False),
+        "Submission Date": _search(r'Submission Date (.*?)\n', text, strip=False),
+        "Payment Date": _search(r'Payment Date (.*?)\n', text, strip=False),
+        "Effective Date": _search(r'Effective Date (.*?)\n', text, strip=False),
+        "Dime! Portfolio": _search(r'Dime! Portfolio (.*?)\n', text, strip=False),
+        "Unitholder No.": _search(r'Unitholder No. (.*?)\n', text, strip=False),
+        "Account No.": _search(r'Account No. (.*?)\n', text, strip=False),
+        "Order ID": _search(r'Order ID (.*?)\n', text, strip=False),
+        "Reference ID": reference_id,
+    }
+
+
+def mutual_fund_dtypes(df):
+    """Parses the dates and amounts of `extract_mutual_fund` rows, as in the notebook."""
+    for column in ["Submission Date", "Payment Date"]:
+        date_24h = pd.to_datetime(df[column], errors="coerce", format="%d %b %Y - %H:%M")
+        date_ampm = pd.to_datetime(df[column], errors="coerce", format="%d %b %Y - %I:%M %p")
+        df[column] = date_24h.combine_first(date_ampm)
+    df["Effective Date"] = pd.to_datetime(df["Effective Date"], format="%d %b %Y", errors="coerce")
+    df["Amount (THB)"] = df["Amount (THB)"].str.replace(",", "").astype(float)
+    return df
+
+
+# Slip layouts: name -> text parser
+PARSERS = {
+    "us_stock": extract_us_stock,
+    "mutual_funds": extract_mutual_fund,
+}
+
+
+def tesseract_ocr(path, lang="eng"):
+    """Text of the image at `path`, read by Tesseract."""
+    if pytesseract is None or Image is None:
+        raise ImportError("The 'tesseract' engine needs pytesseract and Pillow: pip install pytesseract pillow")
+    with Image.open(path) as image:
+        return pytesseract.image_to_string(image, lang=lang)
+
+
+def embedded_text(path):
+    """Text stored in the `SLIP_TEXT_KEY` chunk of a generated slip (see `synthetic_slips`),
+    an OCR stand-in to run the pipeline without Tesseract."""
+    if Image is None:
+        raise ImportError("The 'embedded' engine needs Pillow: pip install pillow")
+    with Image.open(path) as image:
+        return image.text.get(SLIP_TEXT_KEY, "")
+
+
+# OCR engines: name -> function of the image path
+ENGINES = {
+    "tesseract": tesseract_ocr,
+    "embedded": embedded_text,
+}
+
+
+def engine_id(engine, lang="eng"):
+    """Name of the OCR engine in the cache: "tesseract:<lang>", a name in `ENGINES`, or
+    the qualified name of a function."""
+    if engine == "tesseract":
+        return f"tesseract:{lang}"
+    if isinstance(engine, str):
+        return engine
+    engine = getattr(engine, "func", engine)  # functools.partial
+    return f"{engine.__module__}.{engine.__qualname__}"
+
+
+def file_hash(path):
+    """SHA-256 of the file content: renamed or copied slips share one cache entry."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ReceiptOCR:
+    """OCR of broker slip images with a persistent cache keyed by image content.
+
+    The cache is a JSON-lines file of {"hash", "engine", "file", "text"}, appended as
+    every slip is read, so an interrupted run keeps what it finished and a re-run only reads new or
+    changed images. The raw text is cached rather than the parsed row, so a parser fix
+    does not need another OCR pass. Uncached images are read in the calling process or on
+    a process pool, and rows are yielded as soon as their text is ready. Entries of
+    another engine or Tesseract language are skipped, so switching either re-reads the
+    slips.
+    """
+
+    def __init__(self, REPO_PATH=os.path.abspath(os.path.join("..")), cache_path=None, engine="tesseract",
+                 lang="eng"):
+        """
+        Args:
+            REPO_PATH (str): The path to the repository.
+            cache_path (str, optional): OCR cache file. Defaults to
+                `data/private/receipt/ocr_cache.jsonl`.
+            engine (str or callable): A name in `ENGINES`, or a picklable function of the
+                image path returning its text.
+            lang (str): Tesseract language of the "tesseract" engine.
+        """
+        self.cache_path = cache_path or os.path.join(REPO_PATH, "data/private/receipt/ocr_cache.jsonl")
+        self.engine_id = engine_id(engine, lang)
+        if engine == "tesseract":
+            engine = partial(tesseract_ocr, lang=lang)
+        elif isinstance(engine, str):
+            if engine not in ENGINES:
+                raise ValueError(f"Unknown OCR engine '{engine}'. Registered: {sorted(ENGINES)}")
+            engine = ENGINES[engine]
+        self.engine = engine
+        self.cache = self._load_cache()
+        self.summary = {}
+
+    def _load_cache(self):
+        cache = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        if entry.get("engine") == self.engine_id:
+                            cache[entry["hash"]] = entry["text"]
+        return cache
+
+    def _store(self, key, filename, text):
+        self.cache[key] = text
+        directory = os.path.dirname(self.cache_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        with open(self.cache_path, "a") as f:
+            entry = {"hash": key, "engine": self.engine_id, "file": filename, "text": text}
+            f.write(json.dumps(entry) + "\n")
+
+    @staticmethod
+    def images(folder):
+        """Slip images in `folder`, sorted by name."""
+        return [
+            filename for filename in sorted(os.listdir(folder))
+            if filename.upper().endswith(IMAGE_EXTENSIONS)
+        ]
+
+    def iter_texts(self, folder, max_workers=None):
+        """Yields (filename, text) of every slip in `folder`: cached slips first, in name
+        order, then the others as their OCR completes.
+
+        An image the engine fails on is skipped, left out of the cache so the next run
+        retries it, and listed under 'failures' in `summary`.
+
+        Args:
+            folder (str): Folder of slip images.
+            max_workers (int, optional): Worker processes. None or 1 runs in this process.
+        """
+        started = time.perf_counter()
+        pending = {}
+        cached = 0
+        failures = {}
+        for filename in self.images(folder):
+            key = file_hash(os.path.join(folder, filename))
+            if key in self.cache:
+                cached += 1
+                yield filename, self.cache[key]
+            else:
+                pending.setdefault(key, []).append(filename)
+
+        def emit(key, text):
+            # Identical images are read once and yielded under every name
+            self._store(key, pending[key][0], text)
+            for filename in pending[key]:
+                yield filename, text
+
+        def fail(key, error):
+            for filename in pending[key]:
+                failures[filename] = f"{type(error).__name__}: {error}"
+
+        if max_workers is None or max_workers <= 1:
+            for key, filenames in pending.items():
+                try:
+                    text = self.engine(os.path.join(folder, filenames[0]))
+                except Exception as e:
+                    fail(key, e)
+                    continue
+                yield from emit(key, text)
+        elif pending:
+            with ProcessPoolExecutor(max_workers) as pool:
+                futures = {
+                    pool.submit(self.engine, os.path.join(folder, filenames[0])): key
+                    for key, filenames in pending.items()
+                }
+                for future in as_completed(futures):
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        fail(futures[future], e)
+                        continue
+                    yield from emit(futures[future], text)
+        seconds = time.perf_counter() - started
+
+        read = sum(len(filenames) for filenames in pending.values()) - len(failures)
+        self.summary = {
+            "slips": cached + read,
+            "cached": cached,
+            "read": read,
+            "failures": failures,
+            "workers": max_workers or 1,
+            "seconds": seconds,
+        }
+
+    def iter_rows(self, folder, parser="us_stock", max_workers=None):
+        """Yields one parsed row per slip, with its 'File' name, as soon as it is read.
+
+        Args:
+            parser (str or callable): A name in `PARSERS`, or a function of the text
+                returning a dict.
+        """
+        parser = PARSERS[parser] if isinstance(parser, str) else parser
+        for filename, text in self.iter_texts(folder, max_workers):
+            yield {"File": filename, **parser(text)}
+
+    def read(self, folder, parser="us_stock", max_workers=None, output=None):
+        """Parsed rows of every slip in `folder`, sorted by file name.
+
+        Args:
+            output (str, optional): CSV file the rows are appended to as they arrive,
+                rewritten sorted at the end.
+
+        Returns:
+            pd.DataFrame: 'File' and the columns of the parser.
+        """
+        rows = []
+        for row in self.iter_rows(folder, parser, max_workers):
+            if output is not None:
+                pd.DataFrame([row]).to_csv(output, mode="a" if rows else "w", header=not rows, index=False)
+            rows.append(row)
+        df = pd.DataFrame(rows)
+        if not df.empty:
+            df = df.sort_values("File", ignore_index=True)
+        if output is not None:
+            df.to_csv(output, index=False)
+        return df
@@ -0,0 +1,95 @@
+import os
+import threading
+import pandas as pd
+from src.DataSource import *
+from src.StubSource import *
+
+
+@register_source("record")
+class RecordingSource(DataSource):
+    """Passes requests through to `source` and records every response to disk.
+
+    Responses are split per ticker and upserted into `<path>/<ticker>.csv` (indexed by
+    Date), so a `ReplaySource` on the same directory can serve any later date range.
+    """
+
+    def __init__(self, path, source=None):
+        """
+        Args:
+            path (str): Recording directory.
+            source (str, DataSource or callable, optional): Source to record. Defaults
+                to live Yahoo Finance.
+        """
+        self.path = path
+        self.source = get_source(source)
+        self.lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def download(self, tickers, start=None, end=None, **kwargs):
+        data = self.source.download(tickers, start=start, end=end, **kwargs)
+        self.record(data, tickers, kwargs.get("group_by", "column"))
+        return data
+
+    async def adownload(self, tickers, start=None, end=None, **kwargs):
+        data = await self.source.adownload(tickers, start=start, end=end, **kwargs)
+        await asyncio.to_thread(self.record, data, tickers, kwargs.get("group_by", "column"))
+        return data
+
+    def record(self, data, tickers, group_by="column"):
+        for ticker, frame in self.split(data, tickers, group_by).items():
+            if frame.empty:
+                continue
+            file_path = os.path.join(self.path, f"{ticker}.csv")
+            with self.lock:
+                if os.path.exists(file_path):
+                    frame = pd.concat([pd.read_csv(file_path, index_col="Date", parse_dates=True), frame])
+                    frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+                frame.to_csv(file_path)
+
+    @staticmethod
+    def split(data, tickers, group_by="column"):
+        """Splits a `download` response into one frame per ticker.
+
+        Returns:
+            dict: Ticker -> DataFrame indexed by Date with flat price columns.
+        """
+        if not isinstance(data.columns, pd.MultiIndex):
+            return {tickers: data} if isinstance(tickers, str) else {}
+
+        # (Ticker, Price) with group_by="ticker", (Price, Ticker) otherwise
+        level = 0 if group_by == "ticker" else 1
+        frames = {}
+        for ticker in data.columns.get_level_values(level).unique():
+            frame = data.xs(ticker, axis=1, level=level).dropna(how="all")
+            frame.columns.name = None
+            frame.index.name = "Date"
+            frames[ticker] = frame
+        return frames
+
+
+@register_source("replay")
+class ReplaySource(StubSource):
+    """Serves the responses captured by a `RecordingSource`, without the network.
+
+    Requests are answered by slicing the recorded history of each ticker, so a run that
+    asks for other date ranges than the recorded one still replays deterministically.
+    Tickers that were never recorded come back empty, like a failed symbol.
+    """
+
+    def __init__(self, path, latency=0.0, jitter=0.0, seed=None, failures=()):
+        """
+        Args:
+            path (str): Recording directory of a `RecordingSource`.
+            latency (float): Seconds every request waits before answering.
+            jitter (float): Extra uniform random wait of up to `jitter` seconds.
+            seed (int, optional): Seed of the jitter.
+            failures (iterable): Recorded tickers to serve as failed anyway.
+        """
+        if not os.path.isdir(path):
+            raise FileNotFoundError(f"No recording at {path}.")
+        frames = {
+            name[:-len(".csv")]: pd.read_csv(os.path.join(path, name), index_col="Date", parse_dates=True)
+            for name in sorted(os.listdir(path))
+            if name.endswith(".csv")
+        }
+        super().__init__(frames, failures=failures, latency=latency, jitter=jitter, seed=seed)
@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import hashlib
+import urllib.error
+import urllib.request
+import pandas as pd
+
+DATA_URL = "https://raw.githubusercontent.com/pupipatsk/Investment-Portfolio/refs/heads/main/data/"
+
+
+class SnapshotLoader:
+    """Local-first access to the dashboard snapshots (`<date>-Portfolio.csv`, ...).
+
+    A file is read from the first of `local_dirs` that holds it, otherwise from
+    `base_url` through a download cache. Every snapshot has a `version` that only
+    changes with its content: mtime and size for local files, ETag (or the content hash
+    when the server sends none) for remote ones. Use it as the cache key of the parsed
+    frame, e.g. with `st.cache_data`.
+
+    Remote snapshots are revalidated with conditional requests (`If-None-Match`,
+    `If-Modified-Since`) at most once per `check_interval` seconds, so an unchanged file
+    costs a 304 and no parse.
+    """
+
+    def __init__(self, local_dirs=(), base_url=DATA_URL, cache_dir=None, check_interval=300):
+        """
+        Args:
+            local_dirs (iterable): Directories to look in first, in priority order.
+            base_url (str, optional): Remote fallback. None to stay offline.
+            cache_dir (str, optional): Download cache of remote snapshots. Defaults to
+                `~/.cache/investment-portfolio`.
+            check_interval (float): Seconds between revalidations of a remote snapshot.
+        """
+        self.local_dirs = [path for path in local_dirs if path]
+        self.base_url = base_url
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser("~"), ".cache", "investment-portfolio")
+        self.check_interval = check_interval
+
+    def local_path(self, name):
+        for directory in self.local_dirs:
+            path = os.path.join(directory, name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def path(self, name):
+        """Local path of `name`, downloading the remote snapshot if needed."""
+        local = self.local_path(name)
+        if local is not None:
+            return local
+        self._revalidate(name)
+        return os.path.join(self.cache_dir, name)
+
+    def version(self, name):
+        """Cache key that changes only when the content of `name` may have changed."""
+        local = self.local_path(name)
+        if local is not None:
+            stat = os.stat(local)
+            return f"file:{local}:{stat.st_mtime_ns}:{stat.st_size}"
+        validators = self._revalidate(name)
+        return f"{self.base_url}{name}:{validators.get('etag') or validators['sha256']}"
+
+    def read_csv(self, name, **kwargs):
+        return pd.read_csv(self.path(name), **kwargs)
+
+    def read(self, name, **kwargs):
+        """Reads `name` with the pandas reader of its extension (.csv or .parquet)."""
+        if name.endswith(".parquet"):
+            return pd.read_parquet(self.path(name), **kwargs)
+        return self.read_csv(name, **kwargs)
+
+    def _validators_path(self, name):
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def _revalidate(self, name):
+        """Refreshes the download cache of `name` with a conditional request.
+
+        Returns:
+            dict: Validators of the cached copy: 'etag', 'last_modified', 'sha256', 'checked'.
+        """
+        if self.base_url is None:
+            raise FileNotFoundError(f"{name} not found in {self.local_dirs}.")
+
+        cached = os.path.join(self.cache_dir, name)
+        validators_path = self._validators_path(name)
+        validators = {}
+        if os.path.exists(cached) and os.path.exists(validators_path):
+            with open(validators_path) as f:
+                validators = json.load(f)
+            if time.time() - validators.get("checked", 0) < self.check_interval:
+                return validators
+
+        request = urllib.request.Request(self.base_url + name)
+        if validators.get("etag"):
+            request.add_header("If-None-Match", validators["etag"])
+        if validators.get("last_modified"):
+            request.add_header("If-Modified-Since", validators["last_modified"])
+
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                body = response.read()
+                validators = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "sha256": hashlib.sha256(body).hexdigest(),
+                }
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cached + ".tmp", "wb") as f:
+                f.write(body)
+            os.replace(cached + ".tmp", cached)
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+        except urllib.error.URLError:
+            # Offline: serve the cached copy if there is one
+            if not validators:
+                raise
+
+        validators["checked"] = time.time()
+        with open(validators_path, "w") as f:
+            json.dump(validators, f)
+        return validators
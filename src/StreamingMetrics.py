@@ -0,0 +1,377 @@
+import math
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter, deque
+import numpy as np
+import pandas as pd
+
+# Risk columns of `PortfolioMetrics.csv`
+RISK_COLUMNS = [
+    "Dynamic Sharpe Ratio",
+    "Dynamic Sortino Ratio",
+    "Mean return (%)",
+    "Std return (%)",
+    "Volatility_30d (%)",
+    "CVaR 95%",
+]
+
+# Rolling historical CVaR of `PortfolioMetrics`: window sizes (days) and confidence levels
+TAIL_WINDOWS = (21, 63, 252)
+TAIL_LEVELS = (0.90, 0.95, 0.99)
+
+
+def tail_column(window, level):
+    """Column of the rolling CVaR, e.g. (21, 0.95) -> "CVaR_21d 95%"."""
+    return f"CVaR_{window}d {round(level * 100):g}%"
+
+
+TAIL_COLUMNS = [tail_column(window, level) for window in TAIL_WINDOWS for level in TAIL_LEVELS]
+
+
+class RunningMoments:
+    """Welford running count, mean and variance, skipping NaN."""
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, x):
+        if math.isnan(x):
+            return
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def sum(self):
+        return self.mean * self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        # ddof=1, like pandas
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1)) if self.count > 1 else np.nan
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+
+class RollingWindow:
+    """Fixed-size ring buffer with Welford add/remove; `std` needs a full window of values."""
+
+    def __init__(self, size, buffer=None, pos=0, count=0, mean=0.0, m2=0.0):
+        self.size = size
+        self.buffer = np.full(size, np.nan) if buffer is None else np.asarray(buffer, dtype=float)
+        self.pos = pos
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def update(self, x):
+        old = self.buffer[self.pos]
+        if not math.isnan(old):
+            self.count -= 1
+            if self.count == 0:
+                self.mean, self.m2 = 0.0, 0.0
+            else:
+                delta = old - self.mean
+                self.mean -= delta / self.count
+                self.m2 -= delta * (old - self.mean)
+
+        self.buffer[self.pos] = x
+        self.pos = (self.pos + 1) % self.size
+        if not math.isnan(x):
+            self.count += 1
+            delta = x - self.mean
+            self.mean += delta / self.count
+            self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self):
+        if self.count < self.size:
+            return np.nan
+        return math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+
+    def to_dict(self):
+        return {
+            "size": self.size,
+            "buffer": self.buffer.tolist(),
+            "pos": self.pos,
+            "count": self.count,
+            "mean": self.mean,
+            "m2": self.m2,
+        }
+
+
+class ExpandingTail:
+    """Expanding lower-tail mean: the mean of values strictly below the `q` quantile.
+
+    Only the smallest `floor((n-1)*q) + 2` values are kept in a max-heap (with their sum
+    and multiplicities); the rest sit in a min-heap. Each update is O(log n) and the
+    quantile, interpolated linearly like `pd.Series.quantile`, is read off the top of
+    the max-heap.
+    """
+
+    def __init__(self, q=0.05, low=None, high=None, total=0.0):
+        self.q = q
+        self.low = list(low or [])  # negated values, max-heap
+        self.high = list(high or [])  # min-heap
+        self.total = total  # sum of the values in `low`
+        self.counts = Counter(-v for v in self.low)
+
+    @property
+    def n(self):
+        return len(self.low) + len(self.high)
+
+    def _push_low(self, x):
+        heapq.heappush(self.low, -x)
+        self.total += x
+        self.counts[x] += 1
+
+    def _pop_low(self):
+        x = -heapq.heappop(self.low)
+        self.total -= x
+        self.counts[x] -= 1
+        if not self.counts[x]:
+            del self.counts[x]
+        return x
+
+    def update(self, x):
+        if math.isnan(x):
+            return
+        if self.low and x <= -self.low[0]:
+            self._push_low(x)
+        else:
+            heapq.heappush(self.high, x)
+
+        size = min(self.n, int((self.n - 1) * self.q) + 2)
+        while len(self.low) < size:
+            self._push_low(heapq.heappop(self.high))
+        while len(self.low) > size:
+            heapq.heappush(self.high, self._pop_low())
+
+    @property
+    def value(self):
+        n = self.n
+        if n < 2:
+            # a single value is its own quantile, nothing lies strictly below it
+            return np.nan
+
+        h = (n - 1) * self.q
+        frac = h - int(h)
+        upper = -self.low[0]
+        lower = -min(self.low[1:3])
+        diff = upper - lower
+        # numpy's linear interpolation
+        quantile = lower + diff * frac if frac < 0.5 else upper - diff * (1 - frac)
+
+        if lower < quantile:
+            total, count = self.total - upper, len(self.low) - 1
+        else:
+            excluded = self.counts[lower] + (upper != lower)
+            total = self.total - self.counts[lower] * lower - (upper if upper != lower else 0.0)
+            count = len(self.low) - excluded
+        return total / count if count else np.nan
+
+    def to_dict(self):
+        return {"q": self.q, "low": self.low, "high": self.high, "total": self.total}
+
+
+class RollingTail:
+    """Rolling lower-tail quantiles and means for several windows and levels at once.
+
+    Each window keeps its last values in arrival order and, sorted, in a list: an update
+    inserts the new value and deletes the expired one with `bisect`, so no window is ever
+    re-sorted, and every level reads its quantile off the same sorted list. A value is
+    reported once the window holds `window` non-NaN values, like `rolling(window)`.
+    The quantile is interpolated linearly like `pd.Series.quantile`; the CVaR is the
+    mean of the values strictly below it, as in `ExpandingTail`.
+    """
+
+    def __init__(self, windows=TAIL_WINDOWS, levels=TAIL_LEVELS, buffers=None):
+        self.windows = list(windows)
+        self.levels = list(levels)
+        buffers = buffers or [[] for _ in self.windows]
+        self.buffers = [deque(buffer, maxlen=window) for buffer, window in zip(buffers, self.windows)]
+        self.sorted = [sorted(x for x in buffer if not math.isnan(x)) for buffer in self.buffers]
+
+    def update(self, x):
+        for window, buffer, values in zip(self.windows, self.buffers, self.sorted):
+            if len(buffer) == window:
+                old = buffer[0]
+                if not math.isnan(old):
+                    del values[bisect_left(values, old)]
+            buffer.append(x)
+            if not math.isnan(x):
+                insort(values, x)
+
+    def _quantile(self, values, q):
+        h = (len(values) - 1) * q
+        i = int(h)
+        lower, upper = values[i], values[min(i + 1, len(values) - 1)]
+        frac = h - i
+        # numpy's linear interpolation
+        return lower + (upper - lower) * frac if frac < 0.5 else upper - (upper - lower) * (1 - frac)
+
+    def quantiles(self):
+        """Lower-tail quantile of every (window, level), window-major like `TAIL_COLUMNS`."""
+        return [
+            self._quantile(values, 1 - level) if len(values) == window else np.nan
+            for window, values in zip(self.windows, self.sorted)
+            for level in self.levels
+        ]
+
+    def cvars(self):
+        """Mean below the lower-tail quantile of every (window, level), window-major."""
+        result = []
+        for window, values in zip(self.windows, self.sorted):
+            for level in self.levels:
+                if len(values) < window:
+                    result.append(np.nan)
+                    continue
+                count = bisect_left(values, self._quantile(values, 1 - level))
+                result.append(math.fsum(values[:count]) / count if count else np.nan)
+        return result
+
+    def to_dict(self):
+        return {
+            "windows": self.windows,
+            "levels": self.levels,
+            "buffers": [list(buffer) for buffer in self.buffers],
+        }
+
+
+class StreamingMetrics:
+    """Updates the `RISK_COLUMNS` of `PortfolioMetrics` one day at a time.
+
+    Follows the notebook definitions: the Sharpe/Sortino ratios use the daily change of
+    'ROI (%)' in excess of the daily risk-free rate and skip days without a rate (their
+    value is carried forward); 'Mean return (%)', 'Std return (%)', 'Volatility_30d (%)'
+    and 'CVaR 95%' use the daily change of 'Portfolio Unrealized PnL (%)'. The rolling
+    `TAIL_COLUMNS` use the same daily change.
+    """
+
+    def __init__(self, window=30, cvar_level=0.05, tail_windows=TAIL_WINDOWS, tail_levels=TAIL_LEVELS):
+        self.prev_roi = np.nan
+        self.prev_unrealized = np.nan
+        self.excess = RunningMoments()
+        self.downside_sq = 0.0
+        self.returns = RunningMoments()
+        self.mean_returns = RunningMoments()
+        self.window = RollingWindow(window)
+        self.tail = ExpandingTail(cvar_level)
+        self.rolling_tail = RollingTail(tail_windows, tail_levels)
+        self.sharpe = np.nan
+        self.sortino = np.nan
+
+    def update(self, roi, unrealized, daily_rate=0.0):
+        """Consumes one day.
+
+        Args:
+            roi (float): 'ROI (%)' of the day.
+            unrealized (float): 'Portfolio Unrealized PnL (%)' of the day.
+            daily_rate (float): Daily risk-free rate (%), NaN on non-trading days.
+
+        Returns:
+            dict: `RISK_COLUMNS` and rolling CVaR values for the day.
+        """
+        if not math.isnan(daily_rate):
+            excess = (roi - self.prev_roi) - daily_rate
+            self.excess.update(excess)
+            if not math.isnan(excess):
+                self.downside_sq += min(excess, 0.0) ** 2
+
+            count = self.excess.count
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sharpe = np.float64(self.excess.sum) / (self.excess.std * math.sqrt(count))
+                downside_std = math.sqrt(self.downside_sq / count) if count else np.nan
+                sortino = np.float64(self.excess.sum) / (downside_std * math.sqrt(count))
+            # forward fill
+            self.sharpe = self.sharpe if np.isnan(sharpe) else float(sharpe)
+            self.sortino = self.sortino if np.isnan(sortino) else float(sortino)
+        self.prev_roi = roi
+
+        return_1d = unrealized - self.prev_unrealized
+        self.prev_unrealized = unrealized
+        self.returns.update(return_1d)
+        self.tail.update(return_1d)
+        self.rolling_tail.update(return_1d)
+
+        mean_return = self.returns.mean * 100 if self.returns.count else np.nan
+        self.mean_returns.update(mean_return)
+        self.window.update(mean_return)
+
+        return {
+            "Dynamic Sharpe Ratio": self.sharpe,
+            "Dynamic Sortino Ratio": self.sortino,
+            "Mean return (%)": mean_return,
+            "Std return (%)": self.mean_returns.std,
+            "Volatility_30d (%)": self.window.std * math.sqrt(self.window.size),
+            "CVaR 95%": self.tail.value,
+            **dict(zip(self.tail_columns, self.rolling_tail.cvars())),
+        }
+
+    @property
+    def tail_columns(self):
+        return [tail_column(window, level) for window in self.rolling_tail.windows for level in self.rolling_tail.levels]
+
+    def backfill(self, df, risk_free_rate=None):
+        """Adds `RISK_COLUMNS` and the rolling CVaR columns to a `PortfolioMetrics` frame
+        in a single pass.
+
+        Args:
+            df (pd.DataFrame): Indexed by 'Date' with 'ROI (%)' and 'Portfolio Unrealized PnL (%)'.
+            risk_free_rate (pd.DataFrame, optional): Indexed by 'Date' with 'Daily Rate (%)'.
+                Without it every day counts with a zero rate.
+
+        Returns:
+            pd.DataFrame: `df` with `RISK_COLUMNS` and `tail_columns`.
+        """
+        if risk_free_rate is None:
+            daily_rate = np.zeros(len(df))
+        else:
+            daily_rate = risk_free_rate["Daily Rate (%)"].reindex(df.index).to_numpy(dtype=float)
+
+        rows = [
+            self.update(roi, unrealized, rate)
+            for roi, unrealized, rate in zip(
+                df["ROI (%)"].to_numpy(dtype=float),
+                df["Portfolio Unrealized PnL (%)"].to_numpy(dtype=float),
+                daily_rate,
+            )
+        ]
+        columns = RISK_COLUMNS + self.tail_columns
+        df[columns] = pd.DataFrame(rows, index=df.index, columns=columns)
+        return df
+
+    def to_dict(self):
+        return {
+            "prev_roi": self.prev_roi,
+            "prev_unrealized": self.prev_unrealized,
+            "excess": self.excess.to_dict(),
+            "downside_sq": self.downside_sq,
+            "returns": self.returns.to_dict(),
+            "mean_returns": self.mean_returns.to_dict(),
+            "window": self.window.to_dict(),
+            "tail": self.tail.to_dict(),
+            "rolling_tail": self.rolling_tail.to_dict(),
+            "sharpe": self.sharpe,
+            "sortino": self.sortino,
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        metrics = cls()
+        metrics.prev_roi = state["prev_roi"]
+        metrics.prev_unrealized = state["prev_unrealized"]
+        metrics.excess = RunningMoments(**state["excess"])
+        metrics.downside_sq = state["downside_sq"]
+        metrics.returns = RunningMoments(**state["returns"])
+        metrics.mean_returns = RunningMoments(**state["mean_returns"])
+        metrics.window = RollingWindow(**state["window"])
+        metrics.tail = ExpandingTail(**state["tail"])
+        metrics.rolling_tail = RollingTail(**state["rolling_tail"])
+        metrics.sharpe = state["sharpe"]
+        metrics.sortino = state["sortino"]
+        return metrics
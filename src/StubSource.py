@@ -0,0 +1,99 @@
+import time
+import random
+import asyncio
+import numpy as np
+import pandas as pd
+from src.DataSource import *
+
+PRICE_FIELDS = ["Adj Close", "Close", "High", "Low", "Open", "Volume"]
+
+
+@register_source("stub")
+class StubSource(DataSource):
+    """Serves canned price frames with the `yf.download` call signature.
+
+    Pass a `StubSource` (or its `download`) as the `downloader` of `YahooFinanceSource`
+    or `DataTerminal` to run the fetch path offline. Every call is recorded in `calls`.
+    """
+
+    def __init__(self, frames, failures=(), latency=0.0, jitter=0.0, seed=None):
+        """
+        Args:
+            frames (dict): Ticker -> DataFrame indexed by 'Date' with yfinance columns.
+            failures (iterable): Tickers that return no data, like a delisted symbol.
+            latency (float): Seconds every request waits before answering, to simulate
+                the network.
+            jitter (float): Extra uniform random wait of up to `jitter` seconds.
+            seed (int, optional): Seed of the jitter.
+        """
+        self.frames = frames
+        self.failures = set(failures)
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.calls = []
+
+    @classmethod
+    def random_walk(cls, tickers, start="2020-01-01", end=None, seed=0, failures=(), latency=0.0, jitter=0.0):
+        """Builds a stub with seeded geometric random-walk prices on business days."""
+        rng = np.random.default_rng(seed)
+        dates = pd.bdate_range(start, end or pd.Timestamp.today().normalize(), name="Date")
+        frames = {}
+        for ticker in tickers:
+            close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+            frames[ticker] = pd.DataFrame({
+                "Adj Close": close,
+                "Close": close,
+                "High": close * 1.01,
+                "Low": close * 0.99,
+                "Open": close,
+                "Volume": rng.integers(1_000, 1_000_000, len(dates)),
+            }, index=dates)
+        return cls(frames, failures, latency, jitter, seed)
+
+    def _delay(self):
+        return self.latency + (self.random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def _slice(self, ticker, start, end):
+        frame = self.frames.get(ticker)
+        if frame is None or ticker in self.failures:
+            return None
+        if start is not None:
+            frame = frame[frame.index >= pd.Timestamp(start)]
+        if end is not None:
+            frame = frame[frame.index < pd.Timestamp(end)]
+        return frame
+
+    def download(self, tickers, start=None, end=None, group_by="column", multi_level_index=True, **kwargs):
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+        return self._answer(tickers, start, end, group_by, multi_level_index)
+
+    async def adownload(self, tickers, start=None, end=None, group_by="column", multi_level_index=True, **kwargs):
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        return self._answer(tickers, start, end, group_by, multi_level_index)
+
+    def _answer(self, tickers, start, end, group_by, multi_level_index):
+        self.calls.append((tickers, start, end))
+
+        if isinstance(tickers, str):
+            frame = self._slice(tickers, start, end)
+            if frame is None:
+                return pd.DataFrame(columns=PRICE_FIELDS)
+            if multi_level_index:
+                frame = pd.concat({tickers: frame}, axis=1).swaplevel(axis=1)
+            return frame.copy()
+
+        # Multi-symbol request: failed symbols come back as all-NaN columns
+        frames = {}
+        for ticker in tickers:
+            frame = self._slice(ticker, start, end)
+            frames[ticker] = frame if frame is not None else pd.DataFrame(columns=PRICE_FIELDS, dtype=float)
+        data = pd.concat(frames, axis=1, names=["Ticker", "Price"]).sort_index()
+        data.index.name = "Date"
+        if group_by != "ticker":
+            data = data.swaplevel(axis=1)
+        return data
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+
+class TickerIndex:
+    """Per-ticker row bounds of a long portfolio frame, built once per data version.
+
+    The frame is sorted by (Ticker, Date) once; `slice(ticker)` is then a positional
+    view instead of a boolean mask over every row, and `pivot(column)` lays a column out
+    as a Date x Ticker matrix, memoized per column.
+    """
+
+    def __init__(self, df):
+        """
+        Args:
+            df (pd.DataFrame): Long frame with 'Ticker' and 'Date' columns, e.g. `Portfolio.csv`.
+        """
+        # Tickers in order of appearance, like `df["Ticker"].unique()`
+        self.tickers = list(pd.unique(df["Ticker"]))
+
+        self.df = df.sort_values(["Ticker", "Date"], kind="stable", ignore_index=True)
+        ticker_values = self.df["Ticker"].to_numpy()
+        boundaries = np.flatnonzero(ticker_values[1:] != ticker_values[:-1]) + 1
+        starts = np.r_[0, boundaries] if len(ticker_values) else np.array([], dtype=int)
+        stops = np.r_[boundaries, len(ticker_values)] if len(ticker_values) else np.array([], dtype=int)
+        self.bounds = {ticker_values[start]: (start, stop) for start, stop in zip(starts, stops)}
+
+        self.dates, self._date_codes = np.unique(self.df["Date"].to_numpy(), return_inverse=True)
+        self._pivots = {}
+
+    def __contains__(self, ticker):
+        return ticker in self.bounds
+
+    def slice(self, ticker, columns=None, start=None, end=None):
+        """Rows of `ticker` in the date range [start, end], sorted by Date."""
+        first, stop = self.bounds[ticker]
+        if start is not None or end is not None:
+            dates = self.df["Date"].to_numpy()[first:stop]
+            if end is not None:
+                stop = first + int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side="right"))
+            if start is not None:
+                first += int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side="left"))
+        df = self.df.iloc[first:stop]
+        return df if columns is None else df[columns]
+
+    def pivot(self, column):
+        """Date x Ticker matrix of `column`, NaN where a ticker has no row.
+
+        Returns:
+            pd.DataFrame: Indexed by 'Date', one column per ticker in `self.tickers` order.
+        """
+        if column not in self._pivots:
+            matrix = np.full((len(self.dates), len(self.tickers)), np.nan)
+            position = {ticker: i for i, ticker in enumerate(self.tickers)}
+            ticker_codes = np.empty(len(self.df), dtype=np.intp)
+            for ticker, (start, stop) in self.bounds.items():
+                ticker_codes[start:stop] = position[ticker]
+            matrix[self._date_codes, ticker_codes] = self.df[column].to_numpy(dtype=float)
+            self._pivots[column] = pd.DataFrame(
+                matrix, index=pd.DatetimeIndex(self.dates, name="Date"), columns=self.tickers
+            )
+        return self._pivots[column]
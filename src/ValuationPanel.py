@@ -0,0 +1,258 @@
+import numpy as np
+import pandas as pd
+from src.ledger import *
+from src.metrics import *
+
+
+def _ffill(matrix):
+    """Forward-fills NaN along the dates (axis 0), column by column."""
+    rows = np.where(np.isnan(matrix), 0, np.arange(len(matrix))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return np.take_along_axis(matrix, rows, axis=0)
+
+
+def _scatter(shape, date_rows, ticker_columns, values):
+    matrix = np.full(shape, np.nan)
+    matrix[date_rows, ticker_columns] = values
+    return matrix
+
+
+def _asof_rows(dates, grid):
+    """Row of `dates` holding the last value on or before each grid date, -1 before the first."""
+    return np.searchsorted(dates, grid, side="right") - 1
+
+
+def _asof_take(values, rows):
+    """`values[rows]` along axis 0, NaN where `rows` is -1."""
+    if len(values) == 0:
+        return np.full((len(rows),) + values.shape[1:], np.nan)
+    taken = values[np.maximum(rows, 0)]
+    taken[rows < 0] = np.nan
+    return taken
+
+
+def _asof_vector(df, column, grid):
+    """As-of values of `df[column]` (with a 'Date' column) on the grid dates."""
+    df = df[["Date", column]].dropna().sort_values("Date", kind="stable")
+    rows = _asof_rows(df["Date"].to_numpy(dtype=grid.dtype), grid)
+    return _asof_take(df[column].to_numpy(dtype=float), rows)
+
+
+class PricePanel:
+    """Prices laid out once as a Date x Ticker matrix on their own dates, forward-filled.
+
+    Built once and shared: every `ValuationPanel` (one per account in `PortfolioBatch`)
+    takes its columns with one as-of row lookup instead of merging the long price frame.
+    """
+
+    def __init__(self, df_yf, column="Adj Close", tickers=None):
+        """
+        Args:
+            df_yf (pd.DataFrame): Prices from `DataTerminal.fetch_data`.
+            column (str): Price column.
+            tickers (array-like, optional): Tickers to keep. Defaults to all of `df_yf`.
+        """
+        if tickers is None:
+            columns, tickers = pd.factorize(df_yf["Ticker"], sort=True)
+        else:
+            tickers = pd.Index(tickers)
+            columns = pd.Categorical(df_yf["Ticker"], categories=tickers).codes
+        close = df_yf[column].to_numpy(dtype=float)
+        kept = (columns >= 0) & ~np.isnan(close)
+        rows, dates = pd.factorize(df_yf["Date"].to_numpy()[kept], sort=True)
+
+        self.tickers = tickers
+        self.dates = np.asarray(dates)
+        self.matrix = _ffill(_scatter((len(self.dates), len(tickers)), rows, columns[kept], close[kept]))
+
+    def asof(self, dates, tickers):
+        """Date x Ticker prices: the last price on or before every date, NaN for unknown tickers."""
+        columns = self.tickers.get_indexer(tickers)
+        rows = _asof_rows(self.dates, np.asarray(dates, dtype=self.dates.dtype))
+        prices = _asof_take(self.matrix[:, np.maximum(columns, 0)], rows)
+        prices[:, columns < 0] = np.nan
+        return prices
+
+
+class ValuationPanel:
+    """Portfolio state and valuation as aligned Date x Ticker matrices.
+
+    Holdings, average cost, realized PnL, prices and FX rates share one (dates, tickers)
+    layout, so asset values, unrealized PnL and the portfolio totals are elementwise
+    products and row sums instead of merges, grouped fills and `groupby("Date")`
+    transforms on the long frame. `to_long` converts to the `Portfolio.csv` layout at the
+    boundary; `portfolio_frame` gives the per-date totals without going through it.
+
+    A ticker is active from its first trade on; inactive cells are NaN.
+    """
+
+    def __init__(self, dates, tickers, holdings, cost, prices, realized=None, cum_realized=None,
+                 fx=None, cash=None, deposit=None):
+        """
+        Args:
+            dates (np.ndarray): Sorted grid dates (datetime64).
+            tickers (array-like): Ticker of every column.
+            holdings, cost (np.ndarray): 'Cumulative Volume' and 'Average Cost Price (USD)'
+                carried forward, NaN before the first trade.
+            prices (np.ndarray): Market prices in the listing currency.
+            realized, cum_realized (np.ndarray, optional): 'Asset Realized PnL (USD)' flows
+                and their running total.
+            fx (np.ndarray, optional): USD per unit of the listing currency. Defaults to 1.
+            cash, deposit (np.ndarray, optional): Per-date 'Cash' and 'Cumulative Deposit (USD)'.
+        """
+        self.dates = dates
+        self.tickers = np.asarray(tickers, dtype=object)
+        shape = (len(dates), len(self.tickers))
+        self.holdings = holdings
+        self.cost = cost
+        self.active = ~np.isnan(holdings)
+        self.realized = np.zeros(shape) if realized is None else realized
+        self.cum_realized = np.full(shape, np.nan) if cum_realized is None else cum_realized
+        self.prices = prices if fx is None else prices * fx
+        self.cash = np.full(len(dates), np.nan) if cash is None else cash
+        self.deposit = np.full(len(dates), np.nan) if deposit is None else deposit
+        self.value()
+
+    @classmethod
+    def from_ledger(cls, df_ledger, df_yf, df_deposit=None, end=None, calendar="calendar",
+                    currencies=None, fx_rates=None):
+        """Lays a ledger and its prices out on the daily grid.
+
+        Args:
+            df_ledger (pd.DataFrame): Output of `realized_pnl(build_ledger(...))`.
+            df_yf (pd.DataFrame or PricePanel): Prices from `DataTerminal.fetch_data`, or
+                a shared `PricePanel`; every grid date takes the last price on or before it.
+            df_deposit (pd.DataFrame, optional): Deposit frame, see `merge_deposit_to_portfolio`.
+            end (pd.Timestamp, optional): Last date of the grid. Defaults to today.
+            calendar (str or array-like): Grid days, see `trading_days`.
+            currencies (dict, optional): Listing currency of the tickers not quoted in USD,
+                e.g. {"PTT.BK": "THB"}, converted with `fx_rates` at the rate of each date.
+            fx_rates (FXRates, optional): Rates for `currencies`.
+        """
+        end = (pd.Timestamp.today() if end is None else pd.Timestamp(end)).normalize()
+        df_ledger = df_ledger[(df_ledger["Date"] <= end).to_numpy()]
+        codes, tickers = pd.factorize(df_ledger["Ticker"], sort=True)
+        trade_dates = df_ledger["Date"].to_numpy()
+
+        grid = trading_days(trade_dates.min(), end, calendar).union(pd.DatetimeIndex(pd.unique(trade_dates)))
+        dates = grid.to_numpy(dtype=trade_dates.dtype)
+        shape = (len(dates), len(tickers))
+        rows = np.searchsorted(dates, trade_dates)
+
+        def state(column):
+            return _ffill(_scatter(shape, rows, codes, df_ledger[column].to_numpy(dtype=float)))
+
+        realized = None
+        if "Asset Realized PnL (USD)" in df_ledger.columns:
+            realized = np.zeros(shape)
+            realized[rows, codes] = df_ledger["Asset Realized PnL (USD)"].to_numpy(dtype=float)
+
+        # Prices: Date x Ticker on their own dates, then one as-of row lookup per grid date
+        if not isinstance(df_yf, PricePanel):
+            df_yf = PricePanel(df_yf, tickers=tickers)
+        prices = df_yf.asof(dates, tickers)
+
+        fx = None
+        if currencies:
+            fx = np.ones(shape)
+            for ticker, currency in currencies.items():
+                if ticker in tickers and currency != "USD":
+                    fx[:, tickers.get_loc(ticker)] = fx_rates.rate_at(dates, currency, "USD")
+
+        cash = deposit = None
+        if df_deposit is not None:
+            if "Date" not in df_deposit.columns:
+                df_deposit = df_deposit.reset_index()
+            df_deposit = df_deposit.rename(columns={"Balance": "Cash"})
+            cash = _asof_vector(df_deposit, "Cash", dates)
+            deposit = _asof_vector(df_deposit, "Cumulative Deposit (USD)", dates)
+
+        return cls(
+            dates,
+            tickers,
+            holdings=state("Cumulative Volume"),
+            cost=state("Average Cost Price (USD)"),
+            prices=prices,
+            realized=realized,
+            cum_realized=state("Asset CumRealized PnL (USD)") if realized is not None else None,
+            fx=fx,
+            cash=cash,
+            deposit=deposit,
+        )
+
+    def value(self):
+        """Asset values, unrealized PnL and the per-date portfolio totals."""
+        price_gap = self.prices - self.cost
+        self.asset_value = self.prices * self.holdings
+        self.unrealized = np.abs(self.holdings) * price_gap
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.unrealized_pct = price_gap * 100 / self.cost
+
+        # Totals per date; inactive cells and missing prices are NaN and count as zero
+        self.portfolio_value = np.nansum(self.asset_value, axis=1)
+        self.portfolio_unrealized = np.nansum(self.unrealized, axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.portfolio_unrealized_pct = self.portfolio_unrealized / self.portfolio_value * 100
+        return self
+
+    def portfolio_frame(self):
+        """Per-date `PORTFOLIO_LEVEL_COLUMNS`, indexed by 'Date', for the dates with a position."""
+        dated = self.active.any(axis=1)
+        return pd.DataFrame({
+            "Portfolio Value (USD)": self.portfolio_value[dated],
+            "Portfolio Unrealized PnL (USD)": self.portfolio_unrealized[dated],
+            "Portfolio Unrealized PnL (%)": self.portfolio_unrealized_pct[dated],
+            "Cash": self.cash[dated],
+            "Cumulative Deposit (USD)": self.deposit[dated],
+        }, index=pd.DatetimeIndex(self.dates[dated], name="Date"))
+
+    def metrics(self, risk_free_rate=None, streaming=None):
+        """`portfolio_metrics` of the panel, without the long frame."""
+        df = portfolio_profit(self.portfolio_frame())
+        streaming = StreamingMetrics() if streaming is None else streaming
+        return streaming.backfill(df, risk_free_rate)
+
+    def to_long(self):
+        """The `Portfolio.csv` layout: `PORTFOLIO_COLUMNS` and `REALIZED_COLUMNS` in order,
+        one row per active (Ticker, Date), sorted by Ticker then Date."""
+        # Ticker-major order: transpose to Ticker x Date before masking
+        mask = self.active.T
+        n_dates = len(self.dates)
+
+        def long(matrix):
+            return matrix.T[mask]
+
+        def per_date(vector):
+            return np.broadcast_to(vector, (len(self.tickers), n_dates))[mask]
+
+        ticker_codes = np.broadcast_to(np.arange(len(self.tickers))[:, None], mask.shape)[mask]
+        return pd.DataFrame({
+            "Ticker": pd.Index(self.tickers).take(ticker_codes),
+            "Date": per_date(self.dates),
+            "Average Cost Price (USD)": long(self.cost),
+            "Cumulative Volume": long(self.holdings),
+            "Market Price (USD)": long(self.prices),
+            "Asset Value (USD)": long(self.asset_value),
+            "Portfolio Value (USD)": per_date(self.portfolio_value),
+            "Asset Unrealized PnL (USD)": long(self.unrealized),
+            "Asset Unrealized PnL (%)": long(self.unrealized_pct),
+            "Portfolio Unrealized PnL (USD)": per_date(self.portfolio_unrealized),
+            "Portfolio Unrealized PnL (%)": per_date(self.portfolio_unrealized_pct),
+            "Cash": per_date(self.cash),
+            "Cumulative Deposit (USD)": per_date(self.deposit),
+            "Asset Realized PnL (USD)": long(self.realized),
+            "Asset CumRealized PnL (USD)": long(self.cum_realized),
+        }, copy=False)
+
+
+def build_portfolio_panel(df_transactions, df_yf, df_deposit=None, end=None, actions=None,
+                          calendar="calendar"):
+    """`build_portfolio` on the `ValuationPanel` engine.
+
+    Returns:
+        tuple: (df_portfolio in the `build_portfolio` layout, ValuationPanel)
+    """
+    df = build_ledger(df_transactions, actions, prices=df_yf if actions is not None else None)
+    df = realized_pnl(df)
+    panel = ValuationPanel.from_ledger(df, df_yf, df_deposit, end=end, calendar=calendar)
+    return panel.to_long(), panel
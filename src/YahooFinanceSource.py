@@ -1,67 +1,169 @@
 import os
+import asyncio
 import pandas as pd
-import yfinance as yf
+from src.DataSource import *
+
+
+def download_range(start, end):
+    """`download` arguments of a pending range: the full history (`period="max"`) when
+    `start` is None, since `yf.download` with only `end` returns a single month."""
+    if start is None:
+        return dict(period="max", end=end)
+    return dict(start=start, end=end)
 
 
 class YahooFinanceSource:
 
-    def __init__(self, ticker, REPO_PATH):
+    def __init__(self, ticker, REPO_PATH, store=None, downloader=None):
+        """
+        Args:
+            ticker (str): The ticker symbol.
+            REPO_PATH (str): The path to the repository.
+            store (PriceStore, optional): Columnar cache to use instead of
+                `data/yfinance/<ticker>.csv`.
+            downloader (str, DataSource or callable, optional): Source of the downloads,
+                see `get_source`. Defaults to live Yahoo Finance.
+        """
         self.ticker = ticker
+        self.store = store
+        self.source = get_source(downloader)
         self.yf_dir = os.path.join(REPO_PATH, "data/yfinance/")
         if not os.path.exists(self.yf_dir):
             os.makedirs(self.yf_dir)
         self.file_path = os.path.join(self.yf_dir, f"{self.ticker}.csv")
 
     def fetch_ticker(self):
-        data = pd.DataFrame()
+        self.refresh()
+        return self.load()
 
-        # Check if already have data in local
-        if os.path.exists(self.file_path):
-            # data = self._update_existing_data()
-            # TODO: Debug
-            data = self._download_new_data()
-        else:
-            data = self._download_new_data()
+    def refresh(self):
+        """Downloads and caches the missing range without reading the cache back."""
+        pending = self.pending_range()
+        if pending is not None:
+            start, end = pending
+            if start is None:
+                print(f"Download new {self.ticker} data.")
+            else:
+                print(f"Update {self.ticker} data from {start.date()}.")
+            self.save_new_data(self._download(start=start, end=end))
 
-        return data
+    async def afetch_ticker(self):
+        """Async `fetch_ticker`: file I/O runs in worker threads and the download goes
+        through the source's `adownload`."""
+        pending = await asyncio.to_thread(self.pending_range)
+        if pending is not None:
+            start, end = pending
+            if start is None:
+                print(f"Download new {self.ticker} data.")
+            else:
+                print(f"Update {self.ticker} data from {start.date()}.")
+            data = await self._adownload(start=start, end=end)
+            await asyncio.to_thread(self.save_new_data, data)
 
-    def _download_new_data(self):
-        print(f"Download new {self.ticker} data.")
-        new_data = yf.download(
-            self.ticker,
-            end=pd.Timestamp.today(),
-            progress=False,
-            multi_level_index=False,
-        )
-        new_data.reset_index(inplace=True)
-        new_data['Ticker'] = self.ticker
-        # save to local
-        new_data.to_csv(self.file_path, index=False)
-        return new_data
-
-    def _update_existing_data(self):
-        # TODO: Debug
-        print("--------------------")
-        print(f"Update {self.ticker} data.")
-        old_data = pd.read_csv(self.file_path, index_col="Date", parse_dates=True)
-        latest_local_date = old_data.index.max()
-
-        # Download new data [latest_local_date+1,today)
-        new_data = yf.download(
-            self.ticker,
-            start=latest_local_date + pd.DateOffset(1),
-            end=pd.Timestamp.today().normalize(),
+        return await asyncio.to_thread(self.load)
+
+    def _download_kwargs(self, start, end):
+        return dict(
+            **download_range(start, end),
             progress=False,
             multi_level_index=False,
+            auto_adjust=False,  # keep 'Adj Close'
         )
+
+    def _download(self, start=None, end=None):
+        data = self.source.download(self.ticker, **self._download_kwargs(start, end))
+        return self._label(data, start)
+
+    async def _adownload(self, start=None, end=None):
+        data = await self.source.adownload(self.ticker, **self._download_kwargs(start, end))
+        return self._label(data, start)
+
+    def _label(self, data, start):
+        # An empty delta is a market holiday, an empty full history a failed symbol
+        if data.empty and start is None:
+            raise DownloadError(f"No data returned for {self.ticker}.")
+        data.reset_index(inplace=True)
+        data['Ticker'] = self.ticker
+        return data
+
+    def pending_range(self):
+        """Range still missing from the cache.
+
+        Returns:
+            tuple: (start, end) to request, with `start=None` for the full history, or
+                None when the cache is already current. `end` is today and exclusive, so
+                today's unfinished bar is never cached.
+        """
+        latest_local_date = self.latest_local_date()
+        end = pd.Timestamp.today().normalize()
+        if latest_local_date is None:
+            return None, end
+
+        # [latest_local_date+1,today), only if it holds a business day
+        start = latest_local_date + pd.DateOffset(1)
+        if len(pd.bdate_range(start, end - pd.DateOffset(1))) == 0:
+            print(f"{self.ticker} is up-to-date.")
+            return None
+        return start, end
+
+    def latest_local_date(self):
+        if self.store is not None:
+            # Move an existing CSV cache into the store once
+            if not self.store.has(self.ticker) and os.path.exists(self.file_path):
+                print(f"Import {self.ticker} CSV cache into the price store.")
+                self.store.import_csv(self.ticker, self.file_path)
+            return self.store.last_date(self.ticker)
+
+        if not os.path.exists(self.file_path):
+            return None
+        return self._read_cache_tail()[1]
+
+    def save_new_data(self, new_data):
+        """Appends the rows newer than the cache, or writes the cache if there is none."""
+        latest_local_date = self.latest_local_date()
+        if not new_data.empty and latest_local_date is not None:
+            new_dates = pd.to_datetime(new_data["Date"], utc=True).dt.tz_localize(None).dt.normalize()
+            new_data = new_data[(new_dates > latest_local_date).to_numpy()]
         if new_data.empty:
             print(f"No new data for {self.ticker}.")
-            return old_data
-
-        # Merge old and new data
-        updated_data = pd.concat([old_data, new_data])
-        # Remove duplicate dates
-        updated_data = updated_data[~updated_data.index.duplicated(keep="last")]
-        # save to local
-        updated_data.to_csv(self.file_path, index=False)
-        return updated_data
+            return
+
+        if self.store is not None:
+            self.store.append(self.ticker, new_data)
+        elif latest_local_date is None:
+            # save to local
+            new_data.to_csv(self.file_path, index=False)
+        else:
+            # append to local in the cached column order
+            columns = self._read_cache_tail()[0]
+            new_data.reindex(columns=columns).to_csv(
+                self.file_path, mode="a", header=False, index=False
+            )
+
+    def load(self):
+        if self.store is not None:
+            return self.store.read([self.ticker])
+        if not os.path.exists(self.file_path):
+            return pd.DataFrame()
+        return pd.read_csv(self.file_path)
+
+    def _read_cache_tail(self):
+        """Reads the header and the last row of the cache without parsing the whole file.
+
+        Returns:
+            tuple: (header columns, pd.Timestamp of the last cached date or None if empty)
+        """
+        with open(self.file_path, "rb") as f:
+            header_line = f.readline().decode().strip()
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - 4096))
+            lines = [line for line in f.read().decode().splitlines() if line.strip()]
+
+        header = header_line.split(",")
+        if not lines or lines[-1].strip() == header_line:
+            return header, None
+
+        last_row = dict(zip(header, lines[-1].split(",")))
+        # keep only date, the cache may hold timezone-aware timestamps
+        return header, pd.Timestamp(last_row["Date"][:10])
@@ -1,2 +1,44 @@
-from .DataTerminal import *
-from .YahooFinanceSource import *
\ No newline at end of file
+import importlib
+
+# Modules re-exported by `from src import *`, imported on first use only: importing one
+# module (e.g. `from src.SnapshotLoader import *` in the dashboard) loads no other
+MODULES = [
+    "DataSource",
+    "DataTerminal",
+    "PriceStore",
+    "YahooFinanceSource",
+    "StubSource",
+    "RecordingSource",
+    "FetchScheduler",
+    "pnl",
+    "ledger",
+    "StreamingMetrics",
+    "metrics",
+    "IncrementalPortfolio",
+    "ValuationPanel",
+    "PortfolioBatch",
+    "MonteCarloRisk",
+    "FXRates",
+    "CorporateActions",
+    "synthetic",
+    "ReceiptOCR",
+    "SnapshotLoader",
+    "PortfolioStore",
+    "TickerIndex",
+    "downsample",
+    "charts",
+]
+
+
+def __getattr__(name):
+    if name.startswith("_") and name != "__all__" or "__all__" in globals():
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    names = {}
+    for module in MODULES:
+        module = importlib.import_module(f"{__name__}.{module}")
+        names.update({key: value for key, value in vars(module).items() if not key.startswith("_")})
+    globals().update(names)
+    globals()["__all__"] = list(names)
+    if name not in globals():
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return globals()[name]
\ No newline at end of file
@@ -0,0 +1,238 @@
+import numpy as np
+
+try:
+    import plotly.express as px
+    import plotly.graph_objects as go
+except ImportError:  # plotly is only needed for the dashboard
+    go = None
+from src.downsample import *
+
+# Columns offered by the asset graph
+ASSET_COLUMNS = [
+    "Average Cost Price (USD)",
+    "Cumulative Volume",
+    "Market Price (USD)",
+    "Asset Value (USD)",
+    "Asset Unrealized PnL (USD)",
+    "Asset Unrealized PnL (%)",
+]
+
+DASH_STYLES = ["solid", "dot", "dash", "longdash", "dashdot", "longdashdot"]
+
+# Figures drawing more points than this render with WebGL instead of SVG
+WEBGL_MIN_POINTS = 5000
+
+LEGEND = dict(
+    orientation="h",
+    yanchor="top",
+    y=-0.2,
+    xanchor="center",
+    x=0.5
+)
+
+
+def _figure():
+    if go is None:
+        raise ImportError("The dashboard charts require plotly: pip install plotly")
+    return go.Figure()
+
+
+def scatter_trace(n_points):
+    """`go.Scattergl` for figures of more than `WEBGL_MIN_POINTS` points, else `go.Scatter`."""
+    return go.Scattergl if n_points > WEBGL_MIN_POINTS else go.Scatter
+
+
+def portfolio_return_figure(df_metrics, y1, y2, max_points=None):
+    """Unrealized PnL (%) line over the filled cumulative return (%).
+
+    Args:
+        df_metrics (pd.DataFrame): `PortfolioMetrics` indexed by Date.
+        y1, y2 (str): Line and area columns.
+        max_points (int, optional): Point budget per trace, see `downsample_frame`.
+    """
+    fig = _figure()
+    df = downsample_frame(df_metrics, [y1, y2], max_points, x=None)
+    Scatter = scatter_trace(2 * len(df))
+
+    # Portfolio Unrealized PnL (%) trace
+    color1 = "rgba(255, 0, 0, 1.0)" if df_metrics[y1].iloc[-1] < 0 else "rgba(0, 255, 0, 1.0)"
+    fig.add_trace(
+        Scatter(
+            x=df.index,
+            y=df[y1],
+            mode="lines",
+            name=y1,
+            line=dict(color=color1),
+        )
+    )
+
+    # Portfolio Cumulative Return (%) trace
+    color2 = "rgba(126, 0, 0, 0.5)" if df_metrics[y2].iloc[-1] < 0 else "rgba(0, 126, 0, 0.5)"
+    fig.add_trace(
+        Scatter(
+            x=df.index,
+            y=df[y2],
+            mode="lines",
+            name=y2,
+            fill="tozeroy",
+            fillcolor=color2,
+            line=dict(color=color2),
+        )
+    )
+
+    fig.update_layout(
+        title="Portfolio Return (%)",
+        xaxis_title="Date",
+        yaxis_title="Return (%)",
+        template="plotly_dark",
+        autosize=True,
+        legend=LEGEND
+    )
+    return fig
+
+
+def portfolio_usd_figure(df_metrics, max_points=None):
+    """Portfolio Value, Cumulative Deposit and Cash as lines, Unrealized PnL and Net
+    Profit as stacked bars.
+
+    Args:
+        df_metrics (pd.DataFrame): `PortfolioMetrics` indexed by Date.
+        max_points (int, optional): Point budget per trace. The bars are bucketed by
+            min/max so no spike is lost, and all traces share the kept dates.
+    """
+    fig = _figure()
+    line_columns = ["Portfolio Value (USD)", "Cumulative Deposit (USD)", "Cash"]
+    bar_columns = ["Portfolio Unrealized PnL (USD)", "Portfolio Net Profit (USD)"]
+    if max_points is not None and len(df_metrics) > max_points:
+        kept = [downsample_indices(df_metrics.index, df_metrics[column], max_points) for column in line_columns]
+        kept += [downsample_indices(df_metrics.index, df_metrics[column], max_points, "minmax") for column in bar_columns]
+        df = df_metrics.iloc[np.unique(np.concatenate(kept))]
+    else:
+        df = df_metrics
+    Scatter = scatter_trace(5 * len(df))
+
+    # Add Portfolio Value (USD) line
+    fig.add_trace(Scatter(
+        x=df.index,
+        y=df["Portfolio Value (USD)"],
+        mode="lines",
+        name="Portfolio Value (USD)",
+        line=dict(color="skyblue")
+    ))
+
+    # Add Cumulative Deposit (USD) line
+    fig.add_trace(Scatter(
+        x=df.index,
+        y=df["Cumulative Deposit (USD)"],
+        mode="lines",
+        name="Cumulative Deposit (USD)",
+        line=dict(color="orange", dash="dot")
+    ))
+
+    # Add Cash line
+    fig.add_trace(Scatter(
+        x=df.index,
+        y=df["Cash"],
+        mode="lines",
+        name="Cash",
+        line=dict(color="lightgrey", dash="dash")
+    ))
+
+    # Add Unrealized PnL (USD) stacked bar
+    fig.add_trace(go.Bar(
+        x=df.index,
+        y=df["Portfolio Unrealized PnL (USD)"],
+        name="Unrealized PnL (USD)",
+        marker=dict(color="green")
+    ))
+
+    # Add Net Profit (USD) stacked bar
+    fig.add_trace(go.Bar(
+        x=df.index,
+        y=df["Portfolio Net Profit (USD)"],
+        name="Net Profit (USD)",
+        marker=dict(color="rgb(0,255,0)")
+    ))
+
+    fig.update_layout(
+        title="Portfolio USD",
+        xaxis_title="Date",
+        yaxis_title="Value (USD)",
+        template="plotly_dark",
+        barmode="relative",  # Stacks the bars on top of each other
+        autosize=True,
+        legend=LEGEND
+    )
+    return fig
+
+
+def asset_line_figure(ticker_index, selected_tickers, selected_columns, start=None, end=None, max_points=None):
+    """Line graph of `selected_columns` for every selected ticker.
+
+    Args:
+        ticker_index (TickerIndex): Index of the portfolio frame.
+        selected_tickers (list): Tickers to draw, each in its own color.
+        selected_columns (list): Columns to draw, each in its own dash style.
+        start, end (optional): Visible date range.
+        max_points (int, optional): Point budget per trace, see `downsample_indices`.
+    """
+    fig = _figure()
+
+    # Map each ticker to a unique color
+    colors = px.colors.qualitative.Plotly
+    ticker_colors = {ticker: colors[i % len(colors)] for i, ticker in enumerate(selected_tickers)}
+
+    traces = []
+    for ticker in selected_tickers:
+        if ticker not in ticker_index:
+            continue
+        ticker_df = ticker_index.slice(ticker, start=start, end=end)
+        dates = ticker_df["Date"].to_numpy()
+
+        for i, column in enumerate(selected_columns):
+            values = ticker_df[column].to_numpy()
+            kept = downsample_indices(dates, values, max_points)
+            traces.append(dict(
+                x=dates[kept],
+                y=values[kept],
+                mode="lines",
+                name=f"{ticker} - {column}",
+                line=dict(color=ticker_colors[ticker], dash=DASH_STYLES[i % len(DASH_STYLES)])
+            ))
+
+    # Pick the renderer from the total point count
+    Scatter = scatter_trace(sum(len(trace["x"]) for trace in traces))
+    fig.add_traces([Scatter(**trace) for trace in traces])
+
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="Value",
+        template="plotly_dark",
+        height=600,
+        autosize=True,
+        legend=LEGEND
+    )
+    return fig
+
+
+def stacked_bar_figure(ticker_index, value_column, category_column="Ticker", start=None, end=None):
+    """Stacked bars of `value_column` per date, one trace per ticker, from one pivot."""
+    fig = _figure()
+
+    pivot = ticker_index.pivot(value_column).loc[start:end]
+    for category in pivot.columns:
+        fig.add_trace(go.Bar(
+            x=pivot.index,
+            y=pivot[category].to_numpy(),
+            name=category
+        ))
+
+    fig.update_layout(
+        barmode='stack',
+        title=f"Stacked Bar Chart of {value_column} by {category_column}",
+        xaxis_title="Date",
+        yaxis_title=value_column,
+        template="plotly_dark",
+        autosize=True,
+    )
+    return fig
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, LTTB falls back to one numpy step per bucket
+    njit = None
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[ns]").astype(np.int64)
+    return x.astype(float)
+
+
+def _lttb_kernel(x, y, n_out):
+    n = len(y)
+    every = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.intp)
+    indices[0] = 0
+    indices[n_out - 1] = n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        mean_x = 0.0
+        mean_y = 0.0
+        for j in range(next_start, next_end):
+            mean_x += x[j]
+            mean_y += y[j]
+        mean_x /= next_end - next_start
+        mean_y /= next_end - next_start
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - mean_x) * (y[j] - y[a]) - (x[a] - x[j]) * (mean_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        a = best
+        indices[i + 1] = a
+    return indices
+
+
+if njit is not None:
+    _lttb_kernel = njit(cache=True)(_lttb_kernel)
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: positions of `n_out` points that keep the shape of y(x).
+
+    The first and last points are always kept. In every bucket, the point forming the
+    largest triangle with the previously kept point and the mean of the next bucket wins.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x, y = _as_float(x), np.asarray(y, dtype=float)
+    if njit is not None:
+        return _lttb_kernel(x, y, n_out)
+
+    every = (n - 2) / (n_out - 2)
+    indices = np.empty(n_out, dtype=np.intp)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, n)
+        if next_start >= next_end:
+            next_start, next_end = n - 1, n
+        mean_x = x[next_start:next_end].mean()
+        mean_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[a] - mean_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (mean_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+
+def minmax_indices(y, n_out):
+    """Positions of the minimum and maximum of `n_out // 2` equal buckets, plus both ends.
+
+    Keeps every spike, which suits bar charts and noisy series better than LTTB.
+    """
+    n = len(y)
+    n_buckets = max(1, (n_out - 2) // 2)
+    if n_out >= n or n_buckets >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    bucket = (np.arange(n) * n_buckets) // n
+    order = np.lexsort((y, bucket))
+    last = np.r_[np.flatnonzero(np.diff(bucket[order])), n - 1]
+    first = np.r_[0, last[:-1] + 1]
+    return np.unique(np.r_[0, order[first], order[last], n - 1])
+
+
+def downsample_indices(x, y, max_points, method="lttb"):
+    """Positions of at most about `max_points` points of y(x) worth drawing.
+
+    Every run of finite values is downsampled on its own, with a share of the budget
+    proportional to its length, and the first NaN after a run is kept, so the line still
+    breaks where the data has gaps. Gaps denser than the budget can show are bridged.
+
+    Args:
+        x (array-like): Sorted x values (numbers or datetimes).
+        y (array-like): Values.
+        max_points (int, optional): Point budget. None keeps every point.
+        method (str): "lttb" or "minmax".
+
+    Returns:
+        np.ndarray: Sorted positions into `x` and `y`.
+    """
+    y = np.asarray(y, dtype=float)
+    if max_points is None or len(y) <= max_points:
+        return np.arange(len(y))
+    if method not in ("lttb", "minmax"):
+        raise ValueError(f"Unknown downsampling method '{method}'.")
+
+    # [start, stop) of every run of finite values; `stop` is the NaN that ends it
+    finite = np.isfinite(y)
+    edges = np.flatnonzero(np.diff(np.r_[0, finite.astype(np.int8), 0]))
+    starts, stops = edges[::2], edges[1::2]
+    gaps = stops[stops < len(y)]
+    n_finite = int(finite.sum())
+    if n_finite + len(gaps) <= max_points:
+        finite[gaps] = True
+        return np.flatnonzero(finite)
+
+    x = np.asarray(x)
+    if len(gaps) > max_points // 4:
+        # Gaps too dense to show at this budget: draw the finite points as one line
+        positions = np.flatnonzero(finite)
+        return positions[downsample_indices(x[positions], y[positions], max_points, method)]
+    budget = max(max_points - len(gaps), 3)
+    kept = [gaps]
+    for start, stop in zip(starts, stops):
+        n_out = max(budget * (stop - start) // n_finite, 3)
+        if method == "lttb":
+            kept.append(start + lttb_indices(x[start:stop], y[start:stop], n_out))
+        else:
+            kept.append(start + minmax_indices(y[start:stop], n_out))
+    return np.sort(np.concatenate(kept)).astype(np.intp)
+
+
+def downsample_frame(df, columns, max_points, x="Date", method="lttb"):
+    """Rows of `df` to draw `columns` against `x` within a budget of `max_points` per column.
+
+    Each column picks its own points and the rows are shared, so traces of one figure
+    keep aligned x values (e.g. for stacked bars).
+
+    Args:
+        df (pd.DataFrame): Sorted by `x`, or indexed by it when `x` is None.
+    """
+    if max_points is None or len(df) <= max_points:
+        return df
+    x_values = df.index if x is None else df[x]
+    kept = [downsample_indices(x_values, df[column], max_points, method) for column in columns]
+    return df.iloc[np.unique(np.concatenate(kept))] if kept else df
+
+
+def points_for_width(width_px, points_per_pixel=2):
+    """Point budget of a trace drawn `width_px` wide: more points are not visible."""
+    return int(width_px * points_per_pixel)
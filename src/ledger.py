@@ -0,0 +1,299 @@
+import numpy as np
+import pandas as pd
+from src.pnl import *
+from src.CorporateActions import *
+
+# Columns read by the dashboard from `<date>-Portfolio.csv`
+PORTFOLIO_COLUMNS = [
+    "Ticker",
+    "Date",
+    "Average Cost Price (USD)",
+    "Cumulative Volume",
+    "Market Price (USD)",
+    "Asset Value (USD)",
+    "Portfolio Value (USD)",
+    "Asset Unrealized PnL (USD)",
+    "Asset Unrealized PnL (%)",
+    "Portfolio Unrealized PnL (USD)",
+    "Portfolio Unrealized PnL (%)",
+    "Cash",
+    "Cumulative Deposit (USD)",
+]
+
+# Per-trade flows are not carried forward on days without a trade
+FLOW_COLUMNS = {
+    "Volume": 0.0,
+    "Executed Price (USD)": np.nan,
+    "Asset Realized PnL (USD)": 0.0,
+}
+
+
+def preprocess_securities(df):
+    """Selects the trade features and converts `Position`/`Shares` into a signed `Volume`.
+
+    Args:
+        df (pd.DataFrame): Raw transactions as read from `Transactions.xlsx`.
+
+    Returns:
+        pd.DataFrame: Columns ['Date', 'Ticker', 'Executed Price (USD)', 'Volume'].
+    """
+    position = np.where(df["Position"].to_numpy() == "Buy", 1.0, -1.0)
+
+    return pd.DataFrame({
+        "Date": pd.to_datetime(df["Date"]).dt.normalize().to_numpy(),
+        "Ticker": df["Ticker"].to_numpy(),
+        "Executed Price (USD)": df["Executed Price (USD)"].to_numpy(dtype=float),
+        "Volume": df["Shares"].to_numpy(dtype=float) * position,
+    })
+
+
+def rename_ticker(df):
+    # Rename Ticker from BRK.B to BRK-B for yfinance support
+    df["Ticker"] = df["Ticker"].str.replace(".", "-", regex=False)
+    return df
+
+
+def aggregate_intraday_to_daily(df):
+    """Collapses intraday fills into one row per (Ticker, Date).
+
+    The daily `Executed Price (USD)` is the volume-weighted price of the fills,
+    computed from grouped sums instead of a per-group `np.average`.
+
+    Args:
+        df (pd.DataFrame): Output of `preprocess_securities`.
+
+    Returns:
+        pd.DataFrame: One row per (Ticker, Date), sorted by Ticker then Date.
+    """
+    volume = df["Volume"].to_numpy(dtype=float)
+    df = pd.DataFrame({
+        "Ticker": df["Ticker"].to_numpy(),
+        "Date": pd.to_datetime(df["Date"]).dt.normalize().to_numpy(),
+        "Notional": df["Executed Price (USD)"].to_numpy(dtype=float) * volume,
+        "Volume": volume,
+    })
+
+    df = df.groupby(["Ticker", "Date"], sort=True).sum().reset_index()
+
+    # Buys and sells netting to zero within a day have no defined price
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price = df["Notional"].to_numpy() / df["Volume"].to_numpy()
+    df["Executed Price (USD)"] = np.where(np.isfinite(price), price, np.nan)
+
+    return df[["Ticker", "Date", "Executed Price (USD)", "Volume"]]
+
+
+def cumulative_volume(df):
+    """Adds the running position per ticker. `df` must be sorted by Ticker then Date."""
+    cum_volume = df.groupby("Ticker", sort=False)["Volume"].cumsum().to_numpy()
+    df["Cumulative Volume"] = np.where(
+        np.abs(cum_volume) < LEAST_SIGNIFICANT_DIGIT, 0.0, cum_volume
+    )
+    return df
+
+
+def average_cost_price(df):
+    """Adds the cumulative notional over the cumulative volume, per ticker.
+
+    Where the position is flat the previous cost of the same ticker is carried forward.
+    """
+    notional = pd.Series(
+        df["Executed Price (USD)"].to_numpy() * df["Volume"].to_numpy(), index=df.index
+    )
+    cum_notional = notional.groupby(df["Ticker"], sort=False).cumsum().to_numpy()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost = cum_notional / df["Cumulative Volume"].to_numpy()
+    cost = np.where(np.isfinite(cost), cost, np.nan)
+
+    df["Average Cost Price (USD)"] = (
+        pd.Series(cost, index=df.index).groupby(df["Ticker"], sort=False).ffill()
+    )
+    return df
+
+
+def build_ledger(df_transactions, actions=None, prices=None):
+    """Builds the per-ticker daily position ledger from raw transactions.
+
+    Args:
+        df_transactions (pd.DataFrame): Raw transactions with columns
+            ['Date', 'Position', 'Ticker', 'Executed Price (USD)', 'Shares'].
+        actions (pd.DataFrame, optional): Corporate actions from `CorporateActions.fetch`;
+            trades before an event are restated on the post-event share basis.
+        prices (pd.DataFrame, optional): Prices to apply the dividends with, see
+            `adjustment_factors`.
+
+    Returns:
+        pd.DataFrame: One row per (Ticker, trade Date) with the trade flows and
+            'Cumulative Volume', 'Average Cost Price (USD)'.
+    """
+    df = preprocess_securities(df_transactions)
+    df = rename_ticker(df)
+    df = adjust_for_actions(df, actions, prices)
+    df = aggregate_intraday_to_daily(df)
+    df = cumulative_volume(df)
+    df = average_cost_price(df)
+    return df
+
+
+def trading_days(start, end, calendar="calendar"):
+    """Dates of the daily grid in [start, end].
+
+    Args:
+        calendar (str or array-like): "calendar" for every day, "business" for Monday to
+            Friday, or the trading dates themselves, e.g. the dates of a price frame.
+    """
+    if isinstance(calendar, str):
+        if calendar == "calendar":
+            return pd.date_range(start, end)
+        if calendar == "business":
+            return pd.bdate_range(start, end)
+        raise ValueError(f"Unknown calendar '{calendar}'.")
+    dates = pd.DatetimeIndex(calendar).normalize().unique().sort_values()
+    return dates[(dates >= start) & (dates <= end)]
+
+
+def daily_basis(df, end=None, calendar="calendar"):
+    """Expands every ticker to one row per grid day from its own first row and
+    forward-fills its state.
+
+    The (Ticker x Date) grid is laid out once by position: ticker i takes the grid
+    dates from its first row on, and the input rows are scattered into it. The dates
+    of the input rows are always part of the grid, so a trade outside `calendar` is kept.
+
+    Args:
+        df (pd.DataFrame): Long frame with 'Ticker' and 'Date' columns, unique per pair.
+        end (pd.Timestamp, optional): Last date of the grid. Defaults to today.
+        calendar (str or array-like): Grid days, see `trading_days`. "business" drops
+            the weekend rows that "calendar" carries forward.
+
+    Returns:
+        pd.DataFrame: (Ticker x Date) grid sorted by Ticker then Date.
+    """
+    end = (pd.Timestamp.today() if end is None else pd.Timestamp(end)).normalize()
+    df = df[(df["Date"] <= end).to_numpy()]
+    codes, tickers = pd.factorize(df["Ticker"], sort=True)
+    dates = df["Date"].to_numpy()
+
+    grid = trading_days(dates.min(), end, calendar).union(pd.DatetimeIndex(pd.unique(dates)))
+    grid = grid.to_numpy(dtype=dates.dtype)
+
+    # Ticker i covers grid[first[i]:], stored at rows offsets[i]:offsets[i] + lengths[i]
+    first_dates = np.full(len(tickers), np.iinfo(np.int64).max)
+    np.minimum.at(first_dates, codes, dates.view(np.int64))
+    first = np.searchsorted(grid.view(np.int64), first_dates)
+    lengths = len(grid) - first
+    offsets = np.r_[0, np.cumsum(lengths)[:-1]]
+    grid_codes = np.repeat(np.arange(len(tickers)), lengths)
+    grid_dates = grid[np.arange(lengths.sum()) - np.repeat(offsets - first, lengths)]
+
+    rows = offsets[codes] + np.searchsorted(grid, dates) - first[codes]
+    values = df.drop(columns=["Ticker", "Date"]).set_axis(rows).reindex(np.arange(len(grid_codes)))
+    df = pd.concat([
+        pd.DataFrame({"Ticker": tickers.take(grid_codes), "Date": grid_dates}),
+        values.reset_index(drop=True),
+    ], axis=1)
+
+    state_columns = [column for column in values.columns if column not in FLOW_COLUMNS]
+    df[state_columns] = df[state_columns].groupby(grid_codes, sort=False).ffill()
+    for column, fill_value in FLOW_COLUMNS.items():
+        if column in df.columns:
+            df[column] = df[column].fillna(fill_value)
+
+    return df
+
+
+def merge_yf_to_portfolio(df_portfolio, df_yf, calendar="calendar"):
+    """Joins `Adj Close` from `DataTerminal.fetch_data` as 'Market Price (USD)'.
+
+    Args:
+        calendar (str or array-like): Grid days of the prices, see `trading_days`.
+    """
+    # Select useful features
+    df_yf = df_yf[["Ticker", "Date", "Adj Close"]]
+    df_yf = df_yf[df_yf["Ticker"].isin(df_portfolio["Ticker"].unique())]
+
+    df_yf = daily_basis(df_yf, end=df_portfolio["Date"].max(), calendar=calendar)
+
+    df_portfolio = df_portfolio.merge(df_yf, on=["Ticker", "Date"], how="left")
+    df_portfolio.rename(columns={"Adj Close": "Market Price (USD)"}, inplace=True)
+
+    # Forward fill missing market prices
+    df_portfolio["Market Price (USD)"] = (
+        df_portfolio.groupby("Ticker", sort=False)["Market Price (USD)"].ffill()
+    )
+    return df_portfolio
+
+
+def market_value(df):
+    # Asset Value
+    df["Asset Value (USD)"] = df["Market Price (USD)"] * df["Cumulative Volume"]
+
+    # Portfolio Value
+    df["Portfolio Value (USD)"] = df.groupby("Date")["Asset Value (USD)"].transform("sum")
+    return df
+
+
+def merge_deposit_to_portfolio(df_portfolio, df_deposit):
+    """Joins 'Cash' and 'Cumulative Deposit (USD)' from `<date>-Deposit.csv`.
+
+    Every row takes the last deposit record on or before its date, so tickers that
+    start after a deposit still see it.
+
+    Args:
+        df_portfolio (pd.DataFrame): Long portfolio frame.
+        df_deposit (pd.DataFrame): Deposit frame indexed (or keyed) by 'Date' with
+            'Balance' or 'Cash', and 'Cumulative Deposit (USD)'.
+    """
+    if "Date" not in df_deposit.columns:
+        df_deposit = df_deposit.reset_index()
+    df_deposit = df_deposit.rename(columns={"Balance": "Cash"})
+
+    dates = df_portfolio["Date"].to_numpy()
+    for column in ["Cash", "Cumulative Deposit (USD)"]:
+        df = df_deposit[["Date", column]].dropna().sort_values("Date", kind="stable")
+        values = df[column].to_numpy(dtype=float)
+        rows = np.searchsorted(df["Date"].to_numpy(dtype=dates.dtype), dates, side="right") - 1
+        joined = np.full(len(dates), np.nan)
+        joined[rows >= 0] = values[rows[rows >= 0]]
+        df_portfolio[column] = joined
+    return df_portfolio
+
+
+def build_portfolio(df_transactions, df_yf, df_deposit=None, end=None, actions=None,
+                    calendar="calendar"):
+    """Runs the full position pipeline and returns the `Portfolio.csv` layout.
+
+    Args:
+        df_transactions (pd.DataFrame): Raw transactions (`Transactions.xlsx`).
+        df_yf (pd.DataFrame): Prices from `DataTerminal.fetch_data`.
+        df_deposit (pd.DataFrame, optional): Deposit frame. Cash columns are NaN without it.
+        end (pd.Timestamp, optional): Last date of the daily grid. Defaults to today.
+        actions (pd.DataFrame, optional): Corporate actions, see `build_ledger`. Dividends
+            use the closes of `df_yf`, matching its 'Adj Close'.
+        calendar (str or array-like): Days of the grid, see `trading_days`. Each ticker
+            starts at its first trade.
+
+    Returns:
+        pd.DataFrame: Columns `PORTFOLIO_COLUMNS` and `REALIZED_COLUMNS`, sorted by
+            Ticker then Date.
+    """
+    df_ledger = build_ledger(df_transactions, actions, prices=df_yf if actions is not None else None)
+    return portfolio_from_ledger(df_ledger, df_yf, df_deposit, end=end, calendar=calendar)
+
+
+def portfolio_from_ledger(df_ledger, df_yf, df_deposit=None, end=None, calendar="calendar"):
+    """`build_portfolio` from a ledger already built by `build_ledger`."""
+    df = realized_pnl(df_ledger)
+    df = daily_basis(df, end=end, calendar=calendar)
+    df = merge_yf_to_portfolio(df, df_yf, calendar=calendar)
+    df = market_value(df)
+    df = unrealized_pnl(df)
+
+    if df_deposit is not None:
+        df = merge_deposit_to_portfolio(df, df_deposit)
+    else:
+        df["Cash"] = np.nan
+        df["Cumulative Deposit (USD)"] = np.nan
+
+    return df[PORTFOLIO_COLUMNS + REALIZED_COLUMNS]
@@ -0,0 +1,95 @@
+import pandas as pd
+from src.StreamingMetrics import *
+
+# Portfolio-level columns repeated on every ticker row of `Portfolio.csv`
+PORTFOLIO_LEVEL_COLUMNS = [
+    "Portfolio Value (USD)",
+    "Portfolio Unrealized PnL (USD)",
+    "Portfolio Unrealized PnL (%)",
+    "Cash",
+    "Cumulative Deposit (USD)",
+]
+
+
+def fetch_risk_free_rate(data_terminal, ticker="^TNX"):
+    """Daily risk-free rate from the CBOE 10-year Treasury yield (percent).
+
+    Args:
+        data_terminal (DataTerminal): Terminal used to fetch the yield.
+        ticker (str): Yield ticker. There is no data on market closing days.
+
+    Returns:
+        pd.DataFrame: Indexed by 'Date' with 'Annual Rate (%)' and 'Daily Rate (%)'.
+    """
+    risk_free_rate = data_terminal.fetch_data([ticker])
+
+    risk_free_rate = risk_free_rate.drop_duplicates(subset="Date").set_index("Date")
+    risk_free_rate = risk_free_rate.rename(columns={"Adj Close": "Annual Rate (%)"})
+
+    days_in_year = 252
+    risk_free_rate["Daily Rate (%)"] = risk_free_rate["Annual Rate (%)"] / days_in_year
+
+    return risk_free_rate[["Annual Rate (%)", "Daily Rate (%)"]]
+
+
+def portfolio_profit(df):
+    # Portfolio Net Profit (USD)
+    df["Portfolio Net Profit (USD)"] = (
+        (df["Portfolio Value (USD)"] + df["Cash"]) - df["Cumulative Deposit (USD)"]
+    )
+
+    # ROI (%)
+    df["ROI (%)"] = df["Portfolio Net Profit (USD)"] / df["Cumulative Deposit (USD)"] * 100
+    return df
+
+
+def portfolio_metrics(df_portfolio, risk_free_rate=None, streaming=None):
+    """Aggregates a long portfolio frame into the per-date `PortfolioMetrics.csv` layout.
+
+    Args:
+        df_portfolio (pd.DataFrame): Output of `build_portfolio`.
+        risk_free_rate (pd.DataFrame, optional): Output of `fetch_risk_free_rate`.
+        streaming (StreamingMetrics, optional): Risk-metric state to continue from, for
+            frames that extend an earlier history. It is updated in place.
+
+    Returns:
+        pd.DataFrame: Indexed by 'Date'.
+    """
+    df = df_portfolio.groupby("Date")[PORTFOLIO_LEVEL_COLUMNS].mean()
+    df = portfolio_profit(df)
+
+    streaming = StreamingMetrics() if streaming is None else streaming
+    df = streaming.backfill(df, risk_free_rate)
+    return df
+
+
+def asset_tail_risk(df_portfolio, windows=TAIL_WINDOWS, levels=TAIL_LEVELS):
+    """Rolling historical CVaR of every asset, in one sweep per ticker.
+
+    Uses the daily change (%) of 'Market Price (USD)', so a trade that moves the average
+    cost does not show up as a tail event.
+
+    Args:
+        df_portfolio (pd.DataFrame): Output of `build_portfolio`.
+        windows (tuple): Window sizes in rows (grid days).
+        levels (tuple): Confidence levels.
+
+    Returns:
+        pd.DataFrame: 'Ticker', 'Date' and one `tail_column` per (window, level), sorted
+            by Ticker then Date.
+    """
+    df = df_portfolio[["Ticker", "Date", "Market Price (USD)"]].sort_values(["Ticker", "Date"], ignore_index=True)
+    returns = df.groupby("Ticker")["Market Price (USD)"].pct_change(fill_method=None).to_numpy(dtype=float) * 100
+    tickers = df["Ticker"].to_numpy()
+
+    rows = []
+    tail = None
+    for i, return_1d in enumerate(returns):
+        if i == 0 or tickers[i] != tickers[i - 1]:
+            tail = RollingTail(windows, levels)
+        tail.update(return_1d)
+        rows.append(tail.cvars())
+
+    columns = [tail_column(window, level) for window in windows for level in levels]
+    df[columns] = pd.DataFrame(rows, index=df.index, columns=columns)
+    return df.drop(columns="Market Price (USD)")
@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional, the kernel also runs as plain Python
+    njit = None
+
+REALIZED_COLUMNS = ["Asset Realized PnL (USD)", "Asset CumRealized PnL (USD)"]
+
+# Per-ticker state carried between rows of the average-cost state machine
+STATE_COLUMNS = [
+    "Cumulative Volume",
+    "Cumulative Notional",
+    "Average Cost Price (USD)",
+    "Asset CumRealized PnL (USD)",
+]
+
+# remove small values resulting from decimal point arithmetic operations
+LEAST_SIGNIFICANT_DIGIT = 1e-6
+
+
+def _average_cost_kernel(codes, volume, price, init_volume, init_notional, init_cost, init_realized):
+    """Single pass over rows sorted by ticker (`codes`) then date.
+
+    Per ticker the state is (cumulative volume, cumulative notional, cost). The cost
+    is the cumulative notional over the cumulative volume, carried forward while the
+    position is flat; a sell realizes `|volume| * (price - cost)`. The `init_*`
+    arrays, indexed by code, hold the state each ticker starts from.
+    """
+    n = volume.shape[0]
+    cum_volume_out = np.empty(n)
+    cum_notional_out = np.empty(n)
+    cost_out = np.empty(n)
+    realized_out = np.empty(n)
+    cum_realized_out = np.empty(n)
+
+    cum_volume = 0.0
+    cum_notional = 0.0
+    cost = np.nan
+    cum_realized = 0.0
+    for i in range(n):
+        if i == 0 or codes[i] != codes[i - 1]:
+            cum_volume = init_volume[codes[i]]
+            cum_notional = init_notional[codes[i]]
+            cost = init_cost[codes[i]]
+            cum_realized = init_realized[codes[i]]
+
+        notional = price[i] * volume[i]
+        cum_volume += volume[i]
+        position = 0.0 if abs(cum_volume) < LEAST_SIGNIFICANT_DIGIT else cum_volume
+
+        if np.isnan(notional):
+            # the row has no price: cost carries forward and the notional stays out
+            pass
+        else:
+            cum_notional += notional
+            if position != 0.0:
+                cost = cum_notional / position
+
+        if volume[i] < 0:
+            realized = -volume[i] * (price[i] - cost)
+        else:
+            realized = 0.0
+
+        if np.isnan(realized):
+            cum_realized_out[i] = np.nan
+        else:
+            cum_realized += realized
+            cum_realized_out[i] = cum_realized
+
+        cum_volume_out[i] = position
+        cum_notional_out[i] = cum_notional
+        cost_out[i] = cost
+        realized_out[i] = realized
+
+    return cum_volume_out, cum_notional_out, cost_out, realized_out, cum_realized_out
+
+
+if njit is not None:
+    _average_cost_kernel = njit(cache=True)(_average_cost_kernel)
+
+
+def average_cost_state(df, initial=None):
+    """Runs the average-cost state machine over a ledger in one pass.
+
+    Args:
+        df (pd.DataFrame): Ledger with 'Ticker', 'Volume' and 'Executed Price (USD)',
+            sorted by Ticker then Date (e.g. `aggregate_intraday_to_daily` output).
+        initial (pd.DataFrame, optional): State to resume from, indexed by Ticker with
+            `STATE_COLUMNS`. Tickers missing from it start flat.
+
+    Returns:
+        pd.DataFrame: `STATE_COLUMNS` and 'Asset Realized PnL (USD)', aligned with `df.index`.
+    """
+    codes, uniques = pd.factorize(df["Ticker"])
+
+    init = pd.DataFrame(index=pd.Index(uniques, name="Ticker"), columns=STATE_COLUMNS, dtype=float)
+    init["Cumulative Volume"] = 0.0
+    init["Cumulative Notional"] = 0.0
+    init["Asset CumRealized PnL (USD)"] = 0.0
+    if initial is not None:
+        init.update(initial[STATE_COLUMNS])
+
+    cum_volume, cum_notional, cost, realized, cum_realized = _average_cost_kernel(
+        codes.astype(np.int64),
+        df["Volume"].to_numpy(dtype=np.float64),
+        df["Executed Price (USD)"].to_numpy(dtype=np.float64),
+        init["Cumulative Volume"].to_numpy(dtype=np.float64),
+        init["Cumulative Notional"].to_numpy(dtype=np.float64),
+        init["Average Cost Price (USD)"].to_numpy(dtype=np.float64),
+        init["Asset CumRealized PnL (USD)"].to_numpy(dtype=np.float64),
+    )
+
+    return pd.DataFrame(
+        {
+            "Cumulative Volume": cum_volume,
+            "Cumulative Notional": cum_notional,
+            "Average Cost Price (USD)": cost,
+            "Asset Realized PnL (USD)": realized,
+            "Asset CumRealized PnL (USD)": cum_realized,
+        },
+        index=df.index,
+    )
+
+
+def realized_pnl(df, engine="numpy"):
+    """Adds the realized PnL of each sell and its running total per ticker.
+
+    Args:
+        df (pd.DataFrame): Ledger with 'Volume', 'Executed Price (USD)' and
+            'Average Cost Price (USD)', sorted by Ticker then Date.
+        engine (str): "numpy" for masked array ops and a grouped cumsum, or "kernel"
+            for the one-pass state machine (JIT-compiled when numba is installed).
+
+    Returns:
+        pd.DataFrame: `df` with `REALIZED_COLUMNS` added.
+    """
+    if engine == "kernel":
+        df[REALIZED_COLUMNS] = average_cost_state(df)[REALIZED_COLUMNS]
+        return df
+    if engine != "numpy":
+        raise ValueError(f"Unknown engine: {engine}")
+
+    # Realized PnL (USD) occurs when the security is sold
+    volume = df["Volume"].to_numpy(dtype=float)
+    price_gap = (
+        df["Executed Price (USD)"].to_numpy(dtype=float)
+        - df["Average Cost Price (USD)"].to_numpy(dtype=float)
+    )
+    df["Asset Realized PnL (USD)"] = np.where(volume < 0, -volume * price_gap, 0.0)
+
+    # Cumulative Realized PnL
+    df["Asset CumRealized PnL (USD)"] = (
+        df.groupby("Ticker", sort=False)["Asset Realized PnL (USD)"].cumsum()
+    )
+    return df
+
+
+def unrealized_pnl(df):
+    # Unrealized PnL (USD) occurs when the security is still hold
+    price_gap = df["Market Price (USD)"] - df["Average Cost Price (USD)"]
+    df["Asset Unrealized PnL (USD)"] = df["Cumulative Volume"].abs() * price_gap
+    df["Asset Unrealized PnL (%)"] = price_gap * 100 / df["Average Cost Price (USD)"]
+
+    # Portfolio Unrealized PnL
+    df["Portfolio Unrealized PnL (USD)"] = (
+        df.groupby("Date")["Asset Unrealized PnL (USD)"].transform("sum")
+    )
+    df["Portfolio Unrealized PnL (%)"] = (
+        df["Portfolio Unrealized PnL (USD)"] / df["Portfolio Value (USD)"] * 100
+    )
+    return df
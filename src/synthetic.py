@@ -0,0 +1,221 @@
+import os
+import numpy as np
+import pandas as pd
+
+try:
+    from PIL import Image, ImageDraw
+    from PIL.PngImagePlugin import PngInfo
+except ImportError:  # Pillow is optional, needed by `synthetic_slips`
+    Image = None
+
+# Benchmark sizes: (tickers, years, fills)
+SIZES = {
+    "small": (10, 1, 1_000),
+    "medium": (200, 5, 100_000),
+    "large": (1_000, 10, 1_000_000),
+    "xlarge": (5_000, 30, 10_000_000),
+}
+
+
+def synthetic_tickers(n_tickers):
+    return [f"SYN{i:04d}" for i in range(n_tickers)]
+
+
+def synthetic_prices(n_tickers, years, end="2024-11-08", seed=0):
+    """Seeded geometric random-walk price panel on business days.
+
+    Args:
+        n_tickers (int): Number of tickers.
+        years (float): Length of the history.
+        end (str or pd.Timestamp): Last date of the panel.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: `DataTerminal.fetch_data` layout, columns ['Date', 'Open', 'High',
+            'Low', 'Close', 'Adj Close', 'Volume', 'Ticker'], sorted by Ticker then Date.
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp(end)
+    dates = pd.bdate_range(end - pd.DateOffset(days=int(365.25 * years)), end)
+    n_dates = len(dates)
+
+    drift = rng.normal(0.0003, 0.0002, (n_tickers, 1))
+    volatility = rng.uniform(0.008, 0.03, (n_tickers, 1))
+    start_price = rng.lognormal(4, 1, (n_tickers, 1))
+    log_returns = drift + volatility * rng.standard_normal((n_tickers, n_dates))
+    close = (start_price * np.exp(np.cumsum(log_returns, axis=1))).ravel()
+    spread = np.abs(rng.normal(0, 0.005, close.size))
+
+    return pd.DataFrame({
+        "Date": np.tile(dates.to_numpy(), n_tickers),
+        "Open": close * (1 + rng.normal(0, 0.003, close.size)),
+        "High": close * (1 + spread),
+        "Low": close * (1 - spread),
+        "Close": close,
+        "Adj Close": close,
+        "Volume": rng.integers(1_000, 10_000_000, close.size),
+        "Ticker": np.repeat(synthetic_tickers(n_tickers), n_dates),
+    })
+
+
+def synthetic_transactions(df_prices, n_fills, seed=0):
+    """Seeded fills priced off `df_prices`, in the raw `Transactions.xlsx` layout.
+
+    Tickers are drawn with Zipf-like popularity and dates uniformly; several fills can
+    land on the same day. Roughly 70% of the fills are buys and every ticker opens with
+    a buy, but a later sell may still take a position short.
+
+    Args:
+        df_prices (pd.DataFrame): Output of `synthetic_prices`.
+        n_fills (int): Number of fills.
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: Columns ['Date', 'Position', 'Ticker', 'Executed Price (USD)',
+            'Shares'], sorted by Date.
+    """
+    rng = np.random.default_rng(seed)
+    tickers = df_prices["Ticker"].unique()
+    n_dates = len(df_prices) // len(tickers)
+
+    popularity = 1 / np.arange(1, len(tickers) + 1)
+    ticker_code = rng.choice(len(tickers), n_fills, p=popularity / popularity.sum())
+    date_code = rng.integers(0, n_dates, n_fills)
+    order = np.lexsort((date_code, ticker_code))
+    ticker_code, date_code = ticker_code[order], date_code[order]
+
+    rows = ticker_code * n_dates + date_code
+    price = df_prices["Close"].to_numpy()[rows] * (1 + rng.normal(0, 0.002, n_fills))
+
+    buy = rng.random(n_fills) < 0.7
+    first_fill = np.r_[True, ticker_code[1:] != ticker_code[:-1]]
+    buy[first_fill] = True
+
+    df = pd.DataFrame({
+        "Date": df_prices["Date"].to_numpy()[rows],
+        "Position": np.where(buy, "Buy", "Sell"),
+        "Ticker": tickers[ticker_code],
+        "Executed Price (USD)": price,
+        "Shares": np.round(rng.lognormal(0, 1, n_fills), 6),
+    })
+    return df.sort_values("Date", kind="stable", ignore_index=True)
+
+
+def synthetic_deposits(df_transactions):
+    """Deposits that keep cash non-negative, in the `Deposit.csv` layout.
+
+    Returns:
+        pd.DataFrame: Indexed by 'Date' with 'Cash' and 'Cumulative Deposit (USD)'.
+    """
+    sign = np.where(df_transactions["Position"].to_numpy() == "Buy", 1.0, -1.0)
+    spend = pd.Series(
+        sign * df_transactions["Shares"].to_numpy() * df_transactions["Executed Price (USD)"].to_numpy(),
+        index=pd.DatetimeIndex(df_transactions["Date"], name="Date"),
+    )
+    net_spend = spend.groupby(level="Date").sum().cumsum()
+
+    # Deposit in round thousands whenever cash would go negative
+    cumulative_deposit = np.ceil(np.maximum.accumulate(np.maximum(net_spend.to_numpy(), 0)) / 1000) * 1000
+    return pd.DataFrame({
+        "Cash": cumulative_deposit - net_spend.to_numpy(),
+        "Cumulative Deposit (USD)": cumulative_deposit,
+    }, index=net_spend.index)
+
+
+def synthetic_risk_free_rate(dates, seed=0):
+    """Seeded annual yield around 4% on business days, like `fetch_risk_free_rate`."""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(pd.Timestamp(dates.min()), pd.Timestamp(dates.max()), name="Date")
+    annual = 4 + np.cumsum(rng.normal(0, 0.03, len(dates)))
+    return pd.DataFrame({"Annual Rate (%)": annual, "Daily Rate (%)": annual / 252}, index=dates)
+
+
+def synthetic_portfolio(n_tickers=10, years=1, n_fills=1_000, seed=0, end="2024-11-08"):
+    """Generates a complete seeded input set for `build_portfolio` and `portfolio_metrics`.
+
+    Returns:
+        dict: 'prices', 'transactions', 'deposits' and 'risk_free_rate' frames.
+    """
+    df_prices = synthetic_prices(n_tickers, years, end=end, seed=seed)
+    df_transactions = synthetic_transactions(df_prices, n_fills, seed=seed + 1)
+    return {
+        "prices": df_prices,
+        "transactions": df_transactions,
+        "deposits": synthetic_deposits(df_transactions),
+        "risk_free_rate": synthetic_risk_free_rate(df_prices["Date"], seed=seed + 2),
+    }
+
+
+def synthetic_slip_text(kind, ticker, position, amount, when, order_id):
+    """Slip text in the OCR layout that `extract_us_stock`/`extract_mutual_fund` parse."""
+    stamp = when.strftime("%d %b %Y - %H:%M")
+    if kind == "mutual_funds":
+        return (
+            f"@Dime Completed\n{position} {ticker}\n{amount:,.2f} THB\n"
+            f"Submission Date {stamp}\nPayment Date {stamp}\n"
+            f"Effective Date {when.strftime('%d %b %Y')}\nDime! Portfolio Growth\n"
+            f"Unitholder No. UH{order_id % 100_000:05d}\nAccount No. 000-1-23456-7\n"
+            f"Order ID MF{order_id}\nReference ID REF\n\n{order_id}\n"
+        )
+    rate = 34.0 + (order_id % 200) / 100
+    fee = round(amount * 0.0015, 2)
+    vat = round(fee * 0.07, 2)
+    return (
+        f"Status\nOrder Status\nMatched\n{position} {ticker} Inc.\nNASDAQ\n"
+        f"{amount + fee + vat:.2f} THB\nStock Amount {amount:.2f} THB\n"
+        f"Commission Fee {fee:.2f} THB\nVAT 7% {vat:.2f} THB\n"
+        f"Exchange Rate 1 USD = {rate:.2f} THB\nUSD Amount {amount / rate:.2f} USD\n"
+        f"Submission Date\n{stamp[:-8]}\n{stamp[-5:]}\nOrder Type\nMarket Order\n"
+        f"Dime! Portfolio US Stocks\nOffshore Account No. OA{order_id % 10_000:04d}\n"
+        f"Order ID US\n{order_id}\nReference ID R{order_id}\n"
+    )
+
+
+def synthetic_slips(folder, n_slips, kind="us_stock", seed=0):
+    """Writes seeded slip images to `folder`, to run `ReceiptOCR` end to end.
+
+    Every PNG renders its slip text and also stores it in the `SLIP_TEXT_KEY` chunk, which
+    the "embedded" OCR engine reads back without Tesseract.
+
+    Args:
+        folder (str): Output folder, created if missing.
+        n_slips (int): Number of slips.
+        kind (str): "us_stock" or "mutual_funds".
+        seed (int): Random seed.
+
+    Returns:
+        pd.DataFrame: 'File', 'Position', 'Ticker' and 'Order ID' of every slip.
+    """
+    from src.ReceiptOCR import SLIP_TEXT_KEY
+
+    if Image is None:
+        raise ImportError("synthetic_slips needs Pillow: pip install pillow")
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    rng = np.random.default_rng(seed)
+    tickers = synthetic_tickers(50)
+    start = pd.Timestamp("2024-01-01")
+
+    rows = []
+    for i in range(n_slips):
+        ticker = tickers[rng.integers(len(tickers))]
+        position = "Buy" if rng.random() < 0.7 else "Sell"
+        when = start + pd.Timedelta(minutes=int(rng.integers(0, 300 * 24 * 60)))
+        order_id = int(rng.integers(10**8, 10**9))
+        # Fund slips print thousands separators, and their parser expects one
+        amount = float(rng.lognormal(8, 1)) + (1_000 if kind == "mutual_funds" else 0)
+        text = synthetic_slip_text(kind, ticker, position, amount, when, order_id)
+
+        image = Image.new("L", (480, 24 + 16 * text.count("\n")), 255)
+        ImageDraw.Draw(image).multiline_text((12, 12), text, fill=0)
+        info = PngInfo()
+        info.add_text(SLIP_TEXT_KEY, text)
+        filename = f"slip_{i:05d}.png"
+        image.save(os.path.join(folder, filename), pnginfo=info)
+        rows.append({
+            "File": filename,
+            "Position": position,
+            "Ticker": ticker,
+            "Order ID": f"US{order_id}" if kind == "us_stock" else f"MF{order_id}",
+        })
+    return pd.DataFrame(rows)
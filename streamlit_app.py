@@ -3,38 +3,124 @@ import pandas as pd
 # import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-# import os
-# import sys
-
-# # --- System and Path --- #
-# REPO_PATH = os.path.abspath(os.path.join('..'))
-# if REPO_PATH not in sys.path:
-#     sys.path.append(REPO_PATH)
+import os
+import sys
+
+# --- System and Path --- #
+REPO_PATH = os.path.dirname(os.path.abspath(__file__))
+if REPO_PATH not in sys.path:
+    sys.path.append(REPO_PATH)
+
+from src.DataTerminal import *
+from src.FXRates import *
+from src.StreamingMetrics import TAIL_COLUMNS
+from src.SnapshotLoader import *
+from src.PortfolioStore import *
+from src.TickerIndex import *
+from src.charts import *
+
+# Local `data/` first, GitHub otherwise
+loader = SnapshotLoader(local_dirs=[os.path.join(REPO_PATH, 'data')])
+
+SNAPSHOT = '20241110-'
+PORTFOLIO_FILE = SNAPSHOT + 'Portfolio.csv'
+METRICS_FILE = SNAPSHOT + 'PortfolioMetrics.csv'
+
+# Parquet tables converted from the CSV snapshots on first load
+PARQUET_DIR = os.path.join(loader.cache_dir, 'parquet')
+
+# USD/THB rate of the snapshot, for the dates before the first cached THB=X rate
+SNAPSHOT_USDTHB = 34.275
+SNAPSHOT_RATE_DATE = pd.Timestamp('2024-11-10')
+
+@st.cache_data(show_spinner=False)
+def read_snapshot(version):
+    # `version` only keys the cache: a new mtime/ETag of a CSV means a new read
+    store = PortfolioStore.from_snapshot(loader, SNAPSHOT, PARQUET_DIR)
+    return store.read_assets(), store.read_metrics()
 
 # Load Data Function
 def load_data():
-    df_portfolio = pd.read_csv(
-        'https://raw.githubusercontent.com/pupipatsk/Investment-Portfolio/refs/heads/main/data/20241110-Portfolio.csv',
-        parse_dates=['Date']
+    # Normalized tables (see `PortfolioStore`): per-asset rows and per-date metrics,
+    # each fact stored once; the wide layout is joined with `portfolio_view` if needed
+    return read_snapshot((loader.version(PORTFOLIO_FILE), loader.version(METRICS_FILE)))
+
+@st.cache_resource(show_spinner=False, ttl=3600)
+def load_fx_rates():
+    # No download on page load: only the THB=X rows already cached in `data/yfinance/`
+    # are read, and the dates no cached rate covers take the snapshot rate
+    return FXRates(
+        DataTerminal(REPO_PATH),
+        offline=True,
+        fallback={("USD", "THB"): SNAPSHOT_USDTHB},
     )
-    df_portfolio_metrics = pd.read_csv(
-        'https://raw.githubusercontent.com/pupipatsk/Investment-Portfolio/refs/heads/main/data/20241110-PortfolioMetrics.csv',
-        parse_dates=['Date'],
-        index_col='Date'
+
+@st.cache_resource(show_spinner=False)
+def load_ticker_index(version, _df_assets):
+    # Built once per data version and shared by every session
+    return TickerIndex(_df_assets)
+
+df_assets, df_portfolio_metrics = load_data()
+portfolio_index = load_ticker_index(loader.version(PORTFOLIO_FILE), df_assets)
+
+# --- Chart Controls --- #
+first_date, last_date = df_assets['Date'].min().date(), df_assets['Date'].max().date()
+start_date, end_date = st.sidebar.slider(
+    "Date range",
+    min_value=first_date,
+    max_value=last_date,
+    value=(first_date, last_date)
+)
+start_date, end_date = pd.Timestamp(start_date), pd.Timestamp(end_date)
+full_resolution = st.sidebar.toggle("Full resolution", value=False)
+
+# Width of the main column of the centered page, where "stretch" charts are drawn
+CONTENT_WIDTH_PX = 704
+
+def chart_points(width):
+    # Points per trace: about 2 per pixel of the chart width, more are not visible
+    if full_resolution:
+        return None
+    return points_for_width(CONTENT_WIDTH_PX if width == "stretch" else width)
+
+# --- Figure Cache --- #
+# Figures are keyed by (data version, selection, date range, resolution), so going back
+# to an earlier selection reuses the built figure
+portfolio_version = loader.version(PORTFOLIO_FILE)
+metrics_version = loader.version(METRICS_FILE)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_portfolio_return_figure(version, _df_metrics, y1, y2, start, end, max_points):
+    return portfolio_return_figure(_df_metrics.loc[start:end], y1, y2, max_points=max_points)
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_portfolio_usd_figure(version, _df_metrics, start, end, max_points):
+    return portfolio_usd_figure(_df_metrics.loc[start:end], max_points=max_points)
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def cached_asset_line_figure(version, _ticker_index, selected_tickers, selected_columns, start, end, max_points):
+    return asset_line_figure(
+        _ticker_index,
+        list(selected_tickers),
+        list(selected_columns),
+        start=start,
+        end=end,
+        max_points=max_points
     )
-    return df_portfolio, df_portfolio_metrics
 
-df_portfolio, df_portfolio_metrics = load_data()
+@st.cache_data(show_spinner=False, max_entries=32)
+def cached_stacked_bar_figure(version, _ticker_index, value_column, start, end):
+    return stacked_bar_figure(_ticker_index, value_column, start=start, end=end)
 
 # Title
 st.title("Investment Portfolio Dashboard")
 # Display the latest data date
-latest_date = df_portfolio['Date'].max()
+latest_date = df_assets['Date'].max()
 st.write(f"Latest Data Date: {latest_date.date()}")
 st.write("(The financial data is no longer being updated for confidentiality reasons.)")
 
 st.header("Portfolio Return")
-st.write(f"First Investment Date: {df_portfolio['Date'].min().date()}")
+st.write(f"First Investment Date: {df_assets['Date'].min().date()}")
 
 # Percent Metrics
 usd_metrics = {
@@ -64,50 +150,9 @@ for i, metric in enumerate(usd_metrics):
 
 
 # Portfolio Return
-def plot_portfolio_return(df_metrics, y1, y2):
-    fig = go.Figure()
-
-    # Portfolio Unrealized PnL (%) trace
-    color1 = "rgba(255, 0, 0, 1.0)" if df_metrics[y1].iloc[-1] < 0 else "rgba(0, 255, 0, 1.0)"
-    fig.add_trace(
-        go.Scatter(
-            x=df_metrics.index,
-            y=df_metrics[y1],
-            mode="lines",
-            name=y1,
-            line=dict(color=color1),
-        )
-    )
-
-    # Portfolio Cumulative Return (%) trace
-    color2 = "rgba(126, 0, 0, 0.5)" if df_metrics[y2].iloc[-1] < 0 else "rgba(0, 126, 0, 0.5)"
-    fig.add_trace(
-        go.Scatter(
-            x=df_metrics.index,
-            y=df_metrics[y2],
-            mode="lines",
-            name=y2,
-            fill="tozeroy",
-            fillcolor=color2,
-            line=dict(color=color2),
-        )
-    )
-
-    fig.update_layout(
-        title="Portfolio Return (%)",
-        xaxis_title="Date",
-        yaxis_title="Return (%)",
-        template="plotly_dark",
-        autosize=True,
-        legend=dict(
-            orientation="h",
-            yanchor="top",
-            y=-0.2,
-            xanchor="center",
-            x=0.5
-        )
-    )
-    st.plotly_chart(fig, use_container_width=True)
+def plot_portfolio_return(df_metrics, y1, y2, width="stretch"):
+    fig = cached_portfolio_return_figure(metrics_version, df_metrics, y1, y2, start_date, end_date, chart_points(width))
+    st.plotly_chart(fig, width=width)
 
 # Plot Portfolio Metrics
 plot_portfolio_return(
@@ -118,13 +163,25 @@ plot_portfolio_return(
 
 
 # THB Metrics (convert to THB)
-# Exchange Rate
-exchange_rate = 34.275
+# Every date at its cached USD/THB rate, the snapshot rate before the first one
+fx_rates = load_fx_rates()
+df_metrics_thb = fx_rates.convert_frame(
+    df_portfolio_metrics,
+    [
+        "Portfolio Value (USD)",
+        "Cumulative Deposit (USD)",
+        "Portfolio Unrealized PnL (USD)",
+        "Portfolio Net Profit (USD)",
+    ],
+    base="USD",
+    quote="THB",
+)
+exchange_rate = df_metrics_thb["USDTHB"].iloc[-1]
 thb_metrics = {
-    "Portfolio Value (THB)": df_portfolio_metrics["Portfolio Value (USD)"].iloc[-1] * exchange_rate,
-    "Cumulative Deposit (THB)": df_portfolio_metrics["Cumulative Deposit (USD)"].iloc[-1] * exchange_rate,
-    "Unrealized PnL (THB)": df_portfolio_metrics["Portfolio Unrealized PnL (USD)"].iloc[-1] * exchange_rate,
-    "Net Profit (THB)": df_portfolio_metrics["Portfolio Net Profit (USD)"].iloc[-1] * exchange_rate,
+    "Portfolio Value (THB)": df_metrics_thb["Portfolio Value (THB)"].iloc[-1],
+    "Cumulative Deposit (THB)": df_metrics_thb["Cumulative Deposit (THB)"].iloc[-1],
+    "Unrealized PnL (THB)": df_metrics_thb["Portfolio Unrealized PnL (THB)"].iloc[-1],
+    "Net Profit (THB)": df_metrics_thb["Portfolio Net Profit (THB)"].iloc[-1],
 }
 
 # Display THB Metrics in 4 columns
@@ -133,7 +190,14 @@ for i, (metric, value) in enumerate(thb_metrics.items()):
     with cols_thb[i % 2]:
         st.metric(label=metric, value=f"฿ {value:,.2f}")
 
-st.write("2024-11-10 Exchange Rate: 34.275 THB / 1 USD")
+rates = fx_rates.rates("USD", "THB", end=df_portfolio_metrics.index[-1])
+if len(rates):
+    st.write(f"{rates.index[-1].date()} Exchange Rate: {exchange_rate:,.3f} THB / 1 USD")
+else:
+    st.write(
+        f"{SNAPSHOT_RATE_DATE.date()} Exchange Rate: {exchange_rate:,.3f} THB / 1 USD"
+        " (snapshot rate: no cached THB=X rate)"
+    )
 
 
 # Display Additional Portfolio Metrics
@@ -148,12 +212,20 @@ available_metrics = {
     "Mean Return (%)": df_portfolio_metrics["Mean return (%)"].iloc[-1],
     "Std Return (%)": df_portfolio_metrics["Std return (%)"].iloc[-1],
 }
+default_metrics = list(available_metrics.keys())
+
+# Rolling CVaR, for metrics files written with it
+available_metrics.update({
+    column: df_portfolio_metrics[column].iloc[-1]
+    for column in TAIL_COLUMNS
+    if column in df_portfolio_metrics.columns
+})
 
 # Multi-select widget for users to select metrics
 selected_metrics = st.multiselect(
     "Select metrics to display:",
     options=list(available_metrics.keys()),
-    default=list(available_metrics.keys())  # Default to showing all metrics
+    default=default_metrics
 )
 
 # Display selected metrics with a maximum of 4 columns
@@ -209,11 +281,11 @@ def plot_latest_treemap(df, path_column="Ticker", value_column="Asset Value (USD
     fig.update_coloraxes(cmid=0)
 
     # Display the plot in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, width="stretch")
 
 # Plotting the treemap with `Asset Value (USD)` as the size and `Asset Unrealized PnL (%)` as the color
 plot_latest_treemap(
-    df_portfolio,
+    df_assets,
     path_column="Ticker",
     value_column="Asset Value (USD)",
     color_column="Asset Unrealized PnL (%)"
@@ -241,78 +313,18 @@ for i, metric in enumerate(usd_metrics):
         st.metric(label=metric, value=f"$ {usd_metrics[metric]:,.2f}")
 
 
-def plot_portfolio_usd(df):
+def plot_portfolio_usd(df, width="stretch"):
     """
     Plots Portfolio Value, Cumulative Deposit, and Cash as lines, and Unrealized PnL & Net Profit as stacked bars.
 
     Args:
         df (DataFrame): The DataFrame containing the portfolio metrics with Date as index.
+        width ("stretch" or int): Chart width; its pixels set the point budget.
     """
-    # Create the figure
-    fig = go.Figure()
-
-    # Add Portfolio Value (USD) line
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df["Portfolio Value (USD)"],
-        mode="lines",
-        name="Portfolio Value (USD)",
-        line=dict(color="skyblue")
-    ))
-
-    # Add Cumulative Deposit (USD) line
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df["Cumulative Deposit (USD)"],
-        mode="lines",
-        name="Cumulative Deposit (USD)",
-        line=dict(color="orange", dash="dot")
-    ))
-
-    # Add Cash line
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df["Cash"],
-        mode="lines",
-        name="Cash",
-        line=dict(color="lightgrey", dash="dash")
-    ))
-
-    # Add Unrealized PnL (USD) stacked bar
-    fig.add_trace(go.Bar(
-        x=df.index,
-        y=df["Portfolio Unrealized PnL (USD)"],
-        name="Unrealized PnL (USD)",
-        marker=dict(color="green")
-    ))
-
-    # Add Net Profit (USD) stacked bar
-    fig.add_trace(go.Bar(
-        x=df.index,
-        y=df["Portfolio Net Profit (USD)"],
-        name="Net Profit (USD)",
-        marker=dict(color="rgb(0,255,0)")
-    ))
-
-    # Update layout for stacked bar and line chart
-    fig.update_layout(
-        title="Portfolio USD",
-        xaxis_title="Date",
-        yaxis_title="Value (USD)",
-        template="plotly_dark",
-        barmode="relative",  # Stacks the bars on top of each other
-        autosize=True,
-        legend=dict(
-            orientation="h",
-            yanchor="top",
-            y=-0.2,
-            xanchor="center",
-            x=0.5
-        )
-    )
+    fig = cached_portfolio_usd_figure(metrics_version, df, start_date, end_date, chart_points(width))
 
     # Display the plot in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, width=width)
 
 # Use the function to plot the graph
 plot_portfolio_usd(df_portfolio_metrics)
@@ -320,16 +332,17 @@ plot_portfolio_usd(df_portfolio_metrics)
 
 st.subheader("Asset Graphs")
 
-def plot_asset_line_graph(df, default_value_column="Market Price (USD)"):
+def plot_asset_line_graph(ticker_index, default_value_column="Market Price (USD)", width="stretch"):
     """
     Plots a line graph for selected tickers and columns in the portfolio.
 
     Args:
-        df (DataFrame): The DataFrame containing portfolio data.
+        ticker_index (TickerIndex): Per-ticker index of the portfolio data.
         default_value_column (str): The default column to plot if no other column is selected.
+        width ("stretch" or int): Chart width; its pixels set the point budget.
     """
     # Get unique tickers for filtering
-    tickers = df["Ticker"].unique()
+    tickers = ticker_index.tickers
 
     # Multi-select widget for filtering tickers
     selected_tickers = st.multiselect(
@@ -339,96 +352,37 @@ def plot_asset_line_graph(df, default_value_column="Market Price (USD)"):
     )
 
     # Multi-select widget for selecting columns to display
-    available_columns = ["Average Cost Price (USD)",
-                         "Cumulative Volume",
-                         "Market Price (USD)",
-                         "Asset Value (USD)",
-                         "Asset Unrealized PnL (USD)",
-                         "Asset Unrealized PnL (%)"]
     selected_columns = st.multiselect(
         "Select features to display:",
-        options=available_columns,
+        options=ASSET_COLUMNS,
         default=[default_value_column]
     )
 
-    # Filter DataFrame for selected tickers
-    filtered_df = df[df["Ticker"].isin(selected_tickers)]
-
-    # Define colors and line styles
-    colors = px.colors.qualitative.Plotly  # Get a set of colors from Plotly's palette
-    dash_styles = ["solid", "dot", "dash", "longdash", "dashdot", "longdashdot"]  # Different line styles
-
-    # Map each ticker to a unique color
-    ticker_colors = {ticker: colors[i % len(colors)] for i, ticker in enumerate(selected_tickers)}
-
-    # Create a line plot for each selected ticker and column combination
-    fig = go.Figure()
-
-    for ticker in selected_tickers:
-        ticker_df = filtered_df[filtered_df["Ticker"] == ticker]
-
-        for i, column in enumerate(selected_columns):
-            fig.add_trace(
-                go.Scatter(
-                    x=ticker_df["Date"],
-                    y=ticker_df[column],
-                    mode="lines",
-                    name=f"{ticker} - {column}",
-                    line=dict(color=ticker_colors[ticker], dash=dash_styles[i % len(dash_styles)])
-                )
-            )
-
-    # Update the layout for the line chart
-    fig.update_layout(
-        xaxis_title="Date",
-        yaxis_title="Value",
-        template="plotly_dark",
-        height=600,
-        autosize=True,
-        legend=dict(
-            orientation="h",
-            yanchor="top",
-            y=-0.2,
-            xanchor="center",
-            x=0.5
-        )
+    fig = cached_asset_line_figure(
+        portfolio_version,
+        ticker_index,
+        tuple(selected_tickers),
+        tuple(selected_columns),
+        start_date,
+        end_date,
+        chart_points(width)
     )
 
     # Display the plot in Streamlit
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(fig, width=width)
 
 # Use the function to plot the graph
-plot_asset_line_graph(df_portfolio)
+plot_asset_line_graph(portfolio_index)
 
 
 
 # Stacked Bar Chart Plotting Function
-def plot_stacked_bar_chart(df, x_column, value_column, category_column):
-    df = df.sort_values(by=x_column)
-    fig = go.Figure()
-
-    for category in df[category_column].unique():
-        category_df = df[df[category_column] == category]
-        fig.add_trace(go.Bar(
-            x=category_df[x_column],
-            y=category_df[value_column],
-            name=category
-        ))
-
-    fig.update_layout(
-        barmode='stack',
-        title=f"Stacked Bar Chart of {value_column} by {category_column}",
-        xaxis_title=x_column,
-        yaxis_title=value_column,
-        template="plotly_dark",
-        autosize=True,
-    )
-    st.plotly_chart(fig, use_container_width=True)
+def plot_stacked_bar_chart(ticker_index, value_column):
+    fig = cached_stacked_bar_figure(portfolio_version, ticker_index, value_column, start_date, end_date)
+    st.plotly_chart(fig, width="stretch")
 
 # Plotting the stacked bar chart with Asset Value (USD) as the bar size
 plot_stacked_bar_chart(
-    df_portfolio,
-    x_column="Date",
-    value_column="Asset Value (USD)",
-    category_column="Ticker"
+    portfolio_index,
+    value_column="Asset Value (USD)"
 )
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# --- System and Path --- #
+REPO_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_PATH not in sys.path:
+    sys.path.append(REPO_PATH)
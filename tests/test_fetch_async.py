@@ -0,0 +1,66 @@
+import asyncio
+import pytest
+from src.DataTerminal import *
+from src.StubSource import *
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "VOO"]
+
+
+def collect(data_terminal, tickers, **kwargs):
+    async def run():
+        return {ticker: df async for ticker, df in data_terminal.afetch(tickers, **kwargs)}
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def stub():
+    return StubSource.random_walk(TICKERS + ["DELISTED"], start="2024-01-01", failures=["DELISTED"])
+
+
+def test_afetch_matches_fetch_data(tmp_path, stub):
+    frames = collect(DataTerminal(str(tmp_path / "async"), downloader=stub), TICKERS, start="2024-02-01")
+    df = DataTerminal(str(tmp_path / "sync"), downloader=stub).fetch_data(TICKERS, start="2024-02-01")
+
+    assert sorted(frames) == TICKERS
+    for ticker, frame in frames.items():
+        expected = df[df["Ticker"] == ticker]
+        assert frame["Date"].tolist() == expected["Date"].tolist()
+        assert frame["Adj Close"].tolist() == pytest.approx(expected["Adj Close"].tolist())
+
+
+def test_afetch_collects_failures(tmp_path, stub):
+    data_terminal = DataTerminal(str(tmp_path), downloader=stub)
+    frames = collect(data_terminal, TICKERS + ["DELISTED"])
+
+    assert sorted(frames) == TICKERS
+    assert list(data_terminal.failures) == ["DELISTED"]
+
+
+class InFlightStub(StubSource):
+    """Counts the requests in flight. Each is held open until `target` are in flight at
+    once, or every request left is, so the peak does not depend on timing."""
+
+    def __init__(self, frames, target):
+        super().__init__(frames)
+        self.target = target
+        self.in_flight = self.peak = self.answered = 0
+
+    async def adownload(self, tickers, *args, **kwargs):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            while self.in_flight < min(self.target, len(self.frames) - self.answered):
+                await asyncio.sleep(0.01)
+            return await super().adownload(tickers, *args, **kwargs)
+        finally:
+            self.in_flight -= 1
+            self.answered += 1
+
+
+def test_afetch_runs_concurrently(tmp_path):
+    tickers = TICKERS + ["QQQ", "SPY"]
+    stub = InFlightStub(StubSource.random_walk(tickers, start="2024-10-01").frames, target=3)
+    frames = collect(DataTerminal(str(tmp_path), downloader=stub), tickers, concurrency=3)
+
+    assert sorted(frames) == sorted(tickers)
+    assert stub.peak == 3
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from src.DataTerminal import *
+from src.StubSource import *
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "VOO", "QQQM"]
+
+
+@pytest.fixture
+def stub():
+    return StubSource.random_walk(TICKERS + ["DELISTED"], start="2024-01-01", failures=["DELISTED"])
+
+
+@pytest.mark.parametrize("store", ["csv", "parquet"])
+def test_batched_fetch_matches_the_stub(tmp_path, stub, store):
+    data_terminal = DataTerminal(str(tmp_path), store=store, downloader=stub)
+    df = data_terminal.fetch_data(TICKERS + ["DELISTED"], batch_size=2)
+
+    # 6 tickers missing the same range: 3 requests of 2
+    assert len(stub.calls) == 3
+    assert all(len(tickers) <= 2 for tickers, _, _ in stub.calls)
+    assert list(data_terminal.failures) == ["DELISTED"]
+    assert sorted(df["Ticker"].unique()) == sorted(TICKERS)
+    for ticker in TICKERS:
+        expected = stub.frames[ticker]["Adj Close"].to_numpy()
+        np.testing.assert_allclose(df.loc[df["Ticker"] == ticker, "Adj Close"].to_numpy(), expected)
+
+
+def test_batched_fetch_reuses_the_cache(tmp_path, stub):
+    data_terminal = DataTerminal(str(tmp_path), downloader=stub)
+    first = data_terminal.fetch_data(TICKERS, batch_size=10)
+    calls = len(stub.calls)
+    second = data_terminal.fetch_data(TICKERS, batch_size=10)
+
+    # Cached up to today: at most one delta request for the whole batch
+    assert len(stub.calls) - calls <= 1
+    assert len(second) == len(first)
+    assert data_terminal.failures == {}
+
+
+def test_batched_fetch_slices_dates(tmp_path, stub):
+    data_terminal = DataTerminal(str(tmp_path), downloader=stub)
+    df = data_terminal.fetch_data(TICKERS, start="2024-03-01", end="2024-03-31", batch_size=3)
+
+    assert df["Date"].min() >= pd.Timestamp("2024-03-01")
+    assert df["Date"].max() <= pd.Timestamp("2024-03-31")
+    assert df.groupby("Ticker").size().to_dict() == {ticker: 21 for ticker in TICKERS}
@@ -0,0 +1,36 @@
+import threading
+from src.FetchScheduler import *
+
+
+def test_task_past_its_deadline_is_reported_failed():
+    release = threading.Event()
+
+    def hang():
+        release.wait(timeout=10)
+        return "late"
+
+    scheduler = FetchScheduler(max_workers=2, rate=100, deadline=0.2)
+    try:
+        results, failures = scheduler.run({"HANG": hang, "AAPL": lambda: "ok"})
+    finally:
+        release.set()
+
+    assert results == {"AAPL": "ok"}
+    assert failures["HANG"].startswith("DeadlineExceeded")
+    assert scheduler.summary["failed"] == 1
+
+
+def test_failing_task_is_retried():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    scheduler = FetchScheduler(max_workers=1, rate=100, backoff=0.01, seed=0)
+    results, failures = scheduler.run({"AAPL": flaky})
+
+    assert results == {"AAPL": "ok"} and failures == {}
+    assert scheduler.summary["retries"] == 2
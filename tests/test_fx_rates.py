@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.DataTerminal import *
+from src.FXRates import *
+from src.StubSource import *
+
+
+@pytest.mark.parametrize("store", ["csv", "parquet"])
+def test_offline_rates_read_the_cache_only(tmp_path, store):
+    stub = StubSource.random_walk(["THB=X"], start="2024-06-03", end="2024-06-28")
+    cached = DataTerminal(str(tmp_path), store=store, downloader=stub).fetch_data(["THB=X"])
+    downloads = len(stub.calls)
+
+    fx_rates = FXRates(
+        DataTerminal(str(tmp_path), store=store, downloader=stub),
+        offline=True,
+        fallback={("USD", "THB"): 34.275},
+    )
+    dates = pd.to_datetime(["2024-05-31", "2024-06-10", "2024-06-29"])
+    rates = fx_rates.rate_at(dates)
+
+    assert len(stub.calls) == downloads
+    adj_close = cached.set_index("Date")["Adj Close"]
+    assert rates[0] == 34.275
+    assert rates[1] == pytest.approx(adj_close[pd.Timestamp("2024-06-10")])
+    assert rates[2] == pytest.approx(adj_close.iloc[-1])
+
+
+def test_offline_rates_without_a_cache_use_the_fallback(tmp_path):
+    fx_rates = FXRates(DataTerminal(str(tmp_path)), offline=True, fallback={("USD", "THB"): 34.275})
+
+    assert fx_rates.rates("USD", "THB").empty
+    np.testing.assert_array_equal(fx_rates.rate_at(pd.to_datetime(["2024-06-10"])), [34.275])
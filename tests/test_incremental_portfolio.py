@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+from src.IncrementalPortfolio import *
+from src.synthetic import *
+
+END = pd.Timestamp("2024-11-08")
+
+
+@pytest.fixture
+def inputs():
+    return synthetic_portfolio(n_tickers=5, years=1, n_fills=200, end=END)
+
+
+def assert_outputs_equal(incremental, full):
+    df, df_full = incremental._read_outputs()[0], full._read_outputs()[0]
+    df = df.sort_values(["Ticker", "Date"], ignore_index=True)
+    df_full = df_full.sort_values(["Ticker", "Date"], ignore_index=True)
+    assert df[["Ticker", "Date"]].equals(df_full[["Ticker", "Date"]])
+    for column in ["Market Price (USD)", "Asset Value (USD)", "Portfolio Value (USD)", "Cash"]:
+        np.testing.assert_allclose(df[column].to_numpy(), df_full[column].to_numpy(), rtol=1e-9, equal_nan=True)
+
+
+@pytest.mark.parametrize("format", ["csv", "parquet"])
+def test_backdated_fill_of_a_new_ticker(tmp_path, inputs, format):
+    prices, transactions, deposits = inputs["prices"], inputs["transactions"], inputs["deposits"]
+    ticker = transactions["Ticker"].iloc[-1]
+    old = transactions[transactions["Ticker"] != ticker]
+    # Backdated to a date between the stored rows, for a ticker the outputs do not hold
+    fill = pd.DataFrame({
+        "Date": [pd.Timestamp("2024-06-15")],
+        "Position": ["Buy"],
+        "Ticker": [ticker],
+        "Executed Price (USD)": [100.0],
+        "Shares": [3.0],
+    })
+
+    incremental = IncrementalPortfolio(data_dir=str(tmp_path / "incremental"), format=format)
+    incremental.rebuild(old, prices, deposits, end=END)
+    incremental.update(fill, new_prices=prices, end=END)
+
+    full = IncrementalPortfolio(data_dir=str(tmp_path / "full"), format=format)
+    full.rebuild(pd.concat([old, fill], ignore_index=True), prices, deposits, end=END)
+
+    assert_outputs_equal(incremental, full)
+
+
+def test_daily_update_matches_rebuild(tmp_path, inputs):
+    prices, transactions, deposits = inputs["prices"], inputs["transactions"], inputs["deposits"]
+    cut = pd.Timestamp("2024-10-01")
+
+    incremental = IncrementalPortfolio(data_dir=str(tmp_path / "incremental"))
+    incremental.rebuild(transactions[transactions["Date"] < cut], prices, deposits, end=cut - pd.DateOffset(1))
+    incremental.update(transactions[transactions["Date"] >= cut], new_prices=prices, new_deposit=deposits, end=END)
+
+    full = IncrementalPortfolio(data_dir=str(tmp_path / "full"))
+    full.rebuild(transactions, prices, deposits, end=END)
+
+    assert_outputs_equal(incremental, full)
+
+
+def test_rebuild_applies_corporate_actions(tmp_path, inputs):
+    prices, transactions, deposits = inputs["prices"], inputs["transactions"], inputs["deposits"]
+    ticker = transactions["Ticker"].iloc[0]
+    actions = pd.DataFrame({"Ticker": [ticker], "Date": [pd.Timestamp("2024-06-10")], "Stock Splits": [10.0]})
+
+    incremental = IncrementalPortfolio(data_dir=str(tmp_path))
+    df_portfolio, _ = incremental.rebuild(transactions, prices, deposits, end=END, actions=actions)
+    expected = build_portfolio(transactions, prices, deposits, end=END, actions=actions)
+    pd.testing.assert_frame_equal(df_portfolio, expected)
+
+    # The persisted state is on the post-split basis too
+    ticker_state = incremental._load_state()[1].set_index("Ticker")
+    last = expected[expected["Date"] == expected["Date"].max()].set_index("Ticker")
+    assert ticker_state.loc[ticker, "Cumulative Volume"] == pytest.approx(last.loc[ticker, "Cumulative Volume"])
@@ -0,0 +1,65 @@
+import os
+import pytest
+from src.ReceiptOCR import *
+from src.synthetic import *
+
+pytest.importorskip("PIL")
+
+
+def shout(path):
+    return embedded_text(path).upper()
+
+
+@pytest.fixture
+def slips(tmp_path):
+    folder = str(tmp_path / "slips")
+    synthetic_slips(folder, 12, seed=0)
+    return folder
+
+
+def test_second_run_reads_from_the_cache(tmp_path, slips):
+    cache_path = str(tmp_path / "ocr_cache.jsonl")
+    first = ReceiptOCR(cache_path=cache_path, engine="embedded")
+    df_first = first.read(slips)
+    assert first.summary["read"] == 12 and first.summary["cached"] == 0
+
+    second = ReceiptOCR(cache_path=cache_path, engine="embedded")
+    df_second = second.read(slips)
+    assert second.summary["read"] == 0 and second.summary["cached"] == 12
+    pd.testing.assert_frame_equal(df_first, df_second)
+
+
+def test_results_match_across_worker_counts(tmp_path, slips):
+    frames = [
+        ReceiptOCR(cache_path=str(tmp_path / f"cache-{workers}.jsonl"), engine="embedded").read(slips, max_workers=workers)
+        for workers in (1, 2)
+    ]
+    assert len(frames[0]) == 12
+    pd.testing.assert_frame_equal(*frames)
+
+
+def test_unreadable_slip_is_reported_and_skipped(tmp_path, slips):
+    with open(os.path.join(slips, "corrupt.png"), "wb") as f:
+        f.write(b"not an image")
+    output = str(tmp_path / "slips.csv")
+    ocr = ReceiptOCR(cache_path=str(tmp_path / "ocr_cache.jsonl"), engine="embedded")
+    df = ocr.read(slips, output=output)
+
+    assert list(ocr.summary["failures"]) == ["corrupt.png"]
+    assert len(df) == 12
+    assert pd.read_csv(output)["File"].tolist() == df["File"].tolist()
+
+
+def test_another_engine_does_not_read_the_cache(tmp_path, slips):
+    cache_path = str(tmp_path / "ocr_cache.jsonl")
+    ReceiptOCR(cache_path=cache_path, engine="embedded").read(slips)
+
+    shouted = ReceiptOCR(cache_path=cache_path, engine=shout)
+    assert shouted.engine_id.endswith(".shout")
+    shouted.read(slips)
+    assert shouted.summary["read"] == 12 and shouted.summary["cached"] == 0
+
+    embedded = ReceiptOCR(cache_path=cache_path, engine="embedded")
+    embedded.read(slips)
+    assert embedded.summary["cached"] == 12
+    assert ReceiptOCR(cache_path=cache_path, engine="tesseract", lang="tha").cache == {}
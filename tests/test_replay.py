@@ -0,0 +1,53 @@
+import pytest
+from src.DataTerminal import *
+from src.StubSource import *
+from src.RecordingSource import *
+
+TICKERS = ["AAPL", "MSFT", "NVDA"]
+
+
+@pytest.fixture
+def recording(tmp_path):
+    """Recording of a stub run through the batched fetch path."""
+    path = str(tmp_path / "recording")
+    stub = StubSource.random_walk(TICKERS, start="2024-01-01")
+    df = DataTerminal(str(tmp_path / "recorded"), downloader=RecordingSource(path, source=stub)).fetch_data(
+        TICKERS, batch_size=2
+    )
+    return path, df
+
+
+@pytest.mark.parametrize("batch_size", [None, 2])
+def test_replay_serves_the_recorded_run(tmp_path, recording, batch_size):
+    path, recorded = recording
+    data_terminal = DataTerminal(str(tmp_path / "replayed"), downloader=ReplaySource(path))
+    df = data_terminal.fetch_data(TICKERS, batch_size=batch_size)
+
+    assert data_terminal.failures == {}
+    for ticker in TICKERS:
+        expected = recorded[recorded["Ticker"] == ticker]
+        replayed = df[df["Ticker"] == ticker]
+        assert replayed["Date"].tolist() == expected["Date"].tolist()
+        assert replayed["Adj Close"].tolist() == pytest.approx(expected["Adj Close"].tolist())
+
+
+def test_replay_by_name_is_deterministic(tmp_path, recording):
+    path, _ = recording
+    first = DataTerminal(str(tmp_path / "first"), downloader=get_source("replay", path=path)).fetch_data(TICKERS)
+    second = DataTerminal(str(tmp_path / "second"), downloader=get_source("replay", path=path)).fetch_data(TICKERS)
+
+    pd.testing.assert_frame_equal(first.reset_index(drop=True), second.reset_index(drop=True))
+
+
+def test_replay_fails_unrecorded_tickers(tmp_path, recording):
+    path, _ = recording
+    data_terminal = DataTerminal(str(tmp_path), downloader=ReplaySource(path))
+    df = data_terminal.fetch_data(TICKERS + ["UNKNOWN"])
+
+    assert list(data_terminal.failures) == ["UNKNOWN"]
+    assert sorted(df["Ticker"].unique()) == TICKERS
+
+
+def test_replay_needs_a_recording(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ReplaySource(str(tmp_path / "missing"))